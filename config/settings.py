@@ -42,10 +42,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'events.instrumentation.RequestMetricsMiddleware',   # first, so its timing covers the rest
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'events.page_cache.AnonymousPageCacheMiddleware',  # after CSRF: hits get their visitor's token
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -55,7 +57,9 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates plus render timing for RequestMetricsMiddleware
+        'BACKEND': 'events.instrumentation.TimedDjangoTemplates',
+        'NAME': 'django',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -63,6 +67,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'events.reference.reference_data',
             ],
         },
     },
@@ -78,6 +83,12 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # WAL lets readers run while a write commits, and NORMAL syncs
+            # at checkpoints instead of every commit: many small concurrent
+            # writes (check-in scans, webhooks) stop queueing behind fsync
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+        },
     }
 }
 
@@ -124,6 +135,72 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 PAYSTACK_SECRET_KEY="sk_test_f703ed91e65546ea1981ae553a470af6b61c7fb7"
 
+# Paystack HTTP client (events/paystack.py)
+PAYSTACK_BASE_URL = "https://api.paystack.co"
+PAYSTACK_TIMEOUT = (3.05, 10)        # (connect, read) seconds
+PAYSTACK_MAX_RETRIES = 2             # idempotent calls only
+PAYSTACK_BREAKER_THRESHOLD = 5       # failures in a row before failing fast
+PAYSTACK_BREAKER_COOLDOWN = 30       # seconds before trying Paystack again
+
+# How long tickets stay reserved for a buyer between booking and payment
+TICKET_HOLD_MINUTES = 15
+
+# Cache for dashboard stats, page sections and whole pages. It holds the
+# section versions and recompute locks too, so every worker process must
+# see the same one: files in DJANGO_CACHE_DIR, shared by all the workers
+# on this machine. Every write passes its own timeout; TIMEOUT = None keeps
+# counters from expiring when they are incremented (incr keeps no timeout)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', str(BASE_DIR / 'cache')),
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    }
+}
+
+# Organizer dashboard stats are cached this long (seconds); 0 disables
+ORG_DASHBOARD_STATS_CACHE_SECONDS = 300
+
+# Home and events_list sections (events/sections.py). Entries are replaced
+# as soon as events, tickets, orders or categories change; this only bounds
+# the life of an entry nothing changed. 0 disables
+SECTION_CACHE_SECONDS = 300
+SECTION_CACHE_LOCK_SECONDS = 10      # one worker recomputes a stale section...
+SECTION_CACHE_LOCK_WAIT = 2.0        # ...others wait this long if there's nothing to serve meanwhile
+
+# Hot/popular event rankings (events/rankings.py): a sale, save or view
+# counts half as much every RANKING_HALF_LIFE_HOURS. Run rebuild_rankings
+# after changing these. The ranked lists are cached RANKING_CACHE_SECONDS
+RANKING_HALF_LIFE_HOURS = 72
+RANKING_WEIGHTS = {"ticket": 5.0, "save": 2.0, "view": 0.1}
+RANKING_CACHE_SECONDS = 60
+
+# Event views and listing impressions are counted in memory and written
+# (events/viewcounts.py) every VIEW_COUNTS_FLUSH_SECONDS, or sooner once
+# VIEW_COUNTS_FLUSH_THRESHOLD have piled up in a worker
+VIEW_COUNTS_FLUSH_SECONDS = 30
+VIEW_COUNTS_FLUSH_THRESHOLD = 1000
+
+# Whole pages for anonymous visitors (events/page_cache.py), invalidated
+# like the sections above. 0 disables
+PAGE_CACHE_SECONDS = 300
+
+# Platform commission taken from every paid order before it reaches the
+# organizer's balance (percent)
+PLATFORM_FEE_PERCENT = 0
+
+# Request instrumentation (events/instrumentation.py): Server-Timing header
+# and a JSON log line ("events.requests" logger) for slow or query-heavy requests
+REQUEST_METRICS_SAMPLE_RATE = 0.1    # share of requests with query/template detail
+REQUEST_METRICS_SLOW_MS = 500
+REQUEST_METRICS_MAX_QUERIES = 50
+REQUEST_METRICS_MAX_SIMILAR = 10     # same query fingerprint repeated (N+1)
+# Server-Timing shows query counts and timings to whoever makes the
+# request, so it's only sent in development. The slow-request log is
+# always on
+REQUEST_METRICS_SERVER_TIMING = DEBUG
+
 
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, "static"),
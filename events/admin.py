@@ -1,4 +1,6 @@
 from django.contrib import admin
+
+from . import jobs
 from .models import (
     Profile,
     Organizer,
@@ -10,6 +12,13 @@ from .models import (
     OrderItem,
     Attendee,
     ContactMessage,
+    TicketHold,
+    PaymentEvent,
+    LedgerEntry,
+    OrganizerBalance,
+    Job,
+    DeadJob,
+    JobStats,
 
 )
 
@@ -53,6 +62,19 @@ class TicketAdmin(admin.ModelAdmin):
     search_fields = ("name",)
 
 
+@admin.register(TicketHold)
+class TicketHoldAdmin(admin.ModelAdmin):
+    list_display = ("ticket", "order", "quantity", "status", "expires_at")
+    list_filter = ("status",)
+
+
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ("event_type", "reference", "status", "attempts", "received_at", "processed_at")
+    list_filter = ("status", "event_type")
+    search_fields = ("reference",)
+
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
@@ -79,6 +101,42 @@ class AttendeeAdmin(admin.ModelAdmin):
 
 
 
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ("created_at", "organizer", "kind", "account", "amount", "order", "payout")
+    list_filter = ("kind", "account")
+    search_fields = ("posting",)
+
+
+@admin.register(OrganizerBalance)
+class OrganizerBalanceAdmin(admin.ModelAdmin):
+    list_display = ("organizer", "available", "earned", "fees", "paid_out", "updated_at")
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("name", "status", "attempts", "available_at", "locked_by", "created_at")
+    list_filter = ("status", "name")
+
+
+@admin.register(DeadJob)
+class DeadJobAdmin(admin.ModelAdmin):
+    list_display = ("name", "job_id", "attempts", "last_error", "died_at")
+    list_filter = ("name",)
+    actions = ["requeue"]
+
+    @admin.action(description="Put back on the queue")
+    def requeue(self, request, queryset):
+        count = jobs.requeue(queryset)
+        self.message_user(request, f"{count} job(s) queued again.")
+
+
+@admin.register(JobStats)
+class JobStatsAdmin(admin.ModelAdmin):
+    list_display = ("name", "hour", "succeeded", "failed", "dead", "runtime_ms", "max_runtime_ms")
+    list_filter = ("name",)
+
+
 @admin.register(ContactMessage)
 class ContactMessageAdmin(admin.ModelAdmin):
     list_display = ("name", "email", "subject", "created_at", "is_resolved")
@@ -0,0 +1,257 @@
+"""
+Daily sales rollups (DailySales) and the reports built on them.
+
+Buckets are keyed by (day, ticket tier) and carry the event and organizer,
+so a year of one organizer's revenue is a few hundred rows, whatever the
+number of orders behind them.
+
+Writes are small upserts made from signals.py:
+
+* an order line is created       -> orders_placed + 1
+* an order moves into "paid"     -> paid_orders, tickets, revenue +
+* an order moves out of "paid"   -> the same amounts -
+
+always on the day the order was placed: orders have no paid-at time, so
+that is the only day backfill() can give them, and the live writes use
+it too. A day's conversion is then how many of that day's checkouts
+were paid, whenever they were paid.
+
+Like every bucket column, orders_placed and paid_orders are per tier:
+they count order lines, so an order for two tiers counts once in each
+tier's bucket (and twice in a total over both).
+
+backfill() rebuilds everything from the orders table
+(``python manage.py backfill_daily_sales``).
+"""
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .cards import LINE_TOTAL
+from .models import DailySales, OrderItem, Ticket
+
+
+COUNTERS = ("orders_placed", "paid_orders", "tickets_sold", "revenue")
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def _bump(day, ticket_id, create=True, **deltas):
+    """
+    Add deltas to one bucket, creating it on first use.
+    """
+    changes = {name: F(name) + value for name, value in deltas.items()}
+
+    if DailySales.objects.filter(day=day, ticket_id=ticket_id).update(**changes):
+        return
+    if not create:
+        return
+
+    ticket = Ticket.objects.filter(pk=ticket_id).values("event_id", "event__organizer_id").first()
+    if ticket is None:
+        return
+
+    try:
+        with transaction.atomic():
+            DailySales.objects.create(
+                day=day,
+                ticket_id=ticket_id,
+                event_id=ticket["event_id"],
+                organizer_id=ticket["event__organizer_id"],
+                **deltas,
+            )
+    except IntegrityError:
+        # Someone else created the bucket in between
+        DailySales.objects.filter(day=day, ticket_id=ticket_id).update(**changes)
+
+
+def order_line_placed(ticket_id, order_created_at, count=1):
+    """
+    count=-1 takes a line back off (a pending order re-booked with new lines).
+    That never creates a bucket: the line may be going away because its
+    ticket tier is being deleted.
+    """
+    _bump(timezone.localdate(order_created_at), ticket_id, create=count > 0, orders_placed=count)
+
+
+def order_status_changed(order, old_status, new_status):
+    if (old_status == "paid") == (new_status == "paid"):
+        return
+
+    sign = 1 if new_status == "paid" else -1
+    day = timezone.localdate(order.created_at)
+
+    # ticket_id -> [lines, tickets, revenue]
+    lines = defaultdict(lambda: [0, 0, Decimal("0")])
+    for ticket_id, quantity, line_total in order.items.values_list("ticket_id", "quantity", LINE_TOTAL):
+        lines[ticket_id][0] += 1
+        lines[ticket_id][1] += quantity
+        lines[ticket_id][2] += line_total or 0
+
+    for ticket_id, (count, sold, revenue) in lines.items():
+        _bump(
+            day,
+            ticket_id,
+            paid_orders=sign * count,
+            tickets_sold=sign * sold,
+            revenue=sign * revenue,
+        )
+
+
+def backfill(chunk_size=5000, progress=None):
+    """
+    Recompute every bucket from the orders table, reading order lines in
+    primary-key chunks.
+    Returns (order lines read, buckets written).
+    """
+    # (day, ticket_id) -> [event_id, organizer_id, placed, paid, sold, revenue]
+    buckets = {}
+    lines_read = 0
+    last_pk = 0
+
+    while True:
+        chunk = list(
+            OrderItem.objects
+            .filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list(
+                "pk",
+                "ticket_id",
+                "order__event_id",
+                "order__event__organizer_id",
+                "order__status",
+                "order__created_at",
+                "quantity",
+                LINE_TOTAL,
+            )[:chunk_size]
+        )
+        if not chunk:
+            break
+
+        for _, ticket_id, event_id, organizer_id, status, created_at, quantity, line_total in chunk:
+            key = (timezone.localdate(created_at), ticket_id)
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = [event_id, organizer_id, 0, 0, 0, Decimal("0")]
+
+            bucket[2] += 1
+            if status == "paid":
+                bucket[3] += 1
+                bucket[4] += quantity
+                bucket[5] += line_total or 0
+
+        lines_read += len(chunk)
+        last_pk = chunk[-1][0]
+        if progress:
+            progress(lines_read)
+
+    rows = [
+        DailySales(
+            day=day,
+            ticket_id=ticket_id,
+            event_id=event_id,
+            organizer_id=organizer_id,
+            orders_placed=placed,
+            paid_orders=paid,
+            tickets_sold=sold,
+            revenue=revenue,
+        )
+        for (day, ticket_id), (event_id, organizer_id, placed, paid, sold, revenue) in buckets.items()
+    ]
+
+    with transaction.atomic():
+        DailySales.objects.all().delete()
+        DailySales.objects.bulk_create(rows, batch_size=2000)
+
+    return lines_read, len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def _buckets(start, end, organizer=None, event=None):
+    """
+    Buckets with start <= day <= end, optionally for one organizer or event.
+    """
+    buckets = DailySales.objects.filter(day__gte=start, day__lte=end)
+    if organizer is not None:
+        buckets = buckets.filter(organizer=organizer)
+    if event is not None:
+        buckets = buckets.filter(event=event)
+    return buckets
+
+
+def _sums():
+    # Aliased: an annotation can't reuse a model field's name
+    return {f"total_{name}": Sum(name) for name in COUNTERS}
+
+
+def _clean(row):
+    for name in COUNTERS:
+        value = row.pop(f"total_{name}", None)
+        row[name] = value or (Decimal("0") if name == "revenue" else 0)
+
+    placed = row["orders_placed"]
+    row["conversion"] = row["paid_orders"] / placed if placed > 0 else 0.0
+    return row
+
+
+def totals(start, end, organizer=None, event=None):
+    """
+    Revenue, tickets sold, order lines placed/paid and conversion
+    (paid / placed) over a date range. organizer=None and event=None means platform-wide.
+    """
+    return _clean(_buckets(start, end, organizer, event).aggregate(**_sums()))
+
+
+def by_day(start, end, organizer=None, event=None):
+    """
+    The totals() numbers for every day in the range (days without sales
+    included, with zeros).
+    """
+    rows = {
+        row["day"]: _clean(row)
+        for row in _buckets(start, end, organizer, event)
+        .values("day")
+        .annotate(**_sums())
+    }
+
+    series = []
+    day = start
+    while day <= end:
+        series.append(rows.get(day) or _clean({"day": day}))
+        day += datetime.timedelta(days=1)
+    return series
+
+
+def by_event(start, end, organizer=None):
+    """
+    The totals() numbers per event, best selling first.
+    """
+    rows = (
+        _buckets(start, end, organizer)
+        .values("event_id", "event__title")
+        .annotate(**_sums())
+        .order_by("-total_revenue")
+    )
+    return [_clean(row) for row in rows]
+
+
+def by_tier(start, end, organizer=None, event=None):
+    """
+    The totals() numbers per ticket tier, best selling first.
+    """
+    rows = (
+        _buckets(start, end, organizer, event)
+        .values("ticket_id", "ticket__name", "event_id")
+        .annotate(**_sums())
+        .order_by("-total_revenue")
+    )
+    return [_clean(row) for row in rows]
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class EventsConfig(AppConfig):
     name = 'events'
+
+    def ready(self):
+        # Register model signal receivers and background jobs
+        from . import signals, tasks  # noqa: F401
@@ -0,0 +1,451 @@
+"""
+End-to-end benchmarks for the browse → book → pay flows
+(``python manage.py benchmark_flows``).
+
+Every iteration of a virtual user requests:
+
+* home, events_list with a set of filter combinations, and event_detail
+  for a rotating sample of upcoming events;
+* booking_confirm (POST) → initialize_payment → verify_payment on a
+  benchmark event, with Paystack played by paystack_stub (every payment
+  succeeds);
+* the organizer pages (org_dashboard, my_events, organizer_tickets,
+  payouts) as the organizer with the most events.
+
+Two modes:
+
+    client   Django's test client in this process, one request at a time,
+             queries counted with CaptureQueriesContext. Runs inside a
+             transaction that is rolled back: nothing is left behind.
+    server   The real WSGI stack: a pre-forked server (N worker processes
+             sharing one socket, like gunicorn's sync workers) driven by
+             concurrent HTTP clients. Queries come from the Server-Timing
+             header (instrumentation.py). Orders it places are kept, so
+             run it against a seeded copy of the database (seed_pointa).
+
+Per endpoint the results hold p50/p95/p99/mean latency, queries per
+request, errors, and rps: requests per second of time spent on that
+endpoint, times the number of concurrent clients (what the setup would
+serve if it only served that endpoint). compare() checks a result
+against a saved baseline.
+"""
+import datetime
+import logging
+import math
+import os
+import re
+import signal
+import threading
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.wsgi import get_wsgi_application
+from django.db import connection, connections
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import paystack
+from .models import Category, Event, Order, Organizer, Ticket
+from .paystack_stub import StubPaystackServer
+
+
+BENCH_PREFIX = "bench-"
+DETAIL_SAMPLE = 50               # upcoming events event_detail rotates through
+
+EVENT_FILTERS = [
+    ("all", {}),
+    ("category", {"category": "{category}"}),
+    ("location", {"location": "lagos"}),
+    ("price", {"min_price": 1000, "max_price": 10000}),
+    ("search", {"q": "tech"}),
+    ("combined", {"location": ["lagos", "abuja"], "category": "{category}", "max_price": 20000}),
+    ("json", {"format": "json"}),
+]
+
+ORGANIZER_PAGES = ["org_dashboard", "my_events", "organizer_tickets", "payouts"]
+
+_QUERIES = re.compile(r'desc="(\d+) queries')
+
+
+def percentile(ordered, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not ordered:
+        return 0.0
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+class Results:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.queries = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, name, seconds, queries=None, ok=True):
+        with self.lock:
+            self.latencies[name].append(seconds * 1000)
+            if queries is not None:
+                self.queries[name].append(queries)
+            if not ok:
+                self.errors[name] += 1
+
+    def summary(self, concurrency=1):
+        endpoints = {}
+        for name, latencies in sorted(self.latencies.items()):
+            ordered = sorted(latencies)
+            queries = self.queries.get(name)
+            endpoints[name] = {
+                "requests": len(ordered),
+                "errors": self.errors.get(name, 0),
+                "p50_ms": round(percentile(ordered, 0.50), 2),
+                "p95_ms": round(percentile(ordered, 0.95), 2),
+                "p99_ms": round(percentile(ordered, 0.99), 2),
+                "mean_ms": round(sum(ordered) / len(ordered), 2),
+                "rps": round(len(ordered) * concurrency * 1000 / sum(ordered), 1) if sum(ordered) else 0.0,
+                "queries": round(sum(queries) / len(queries), 1) if queries else None,
+            }
+        return endpoints
+
+
+# ---------------------------------------------------------------------------
+# What to request
+# ---------------------------------------------------------------------------
+
+class Plan:
+    """
+    The data a run needs: benchmark buyers and event (created if missing),
+    the organizer whose pages are requested, events to browse.
+    """
+
+    def __init__(self, buyers):
+        self.event, self.ticket = self._bench_event()
+        self.buyers = [self._user(f"{BENCH_PREFIX}buyer-{n}") for n in range(buyers)]
+
+        organizer = (
+            Organizer.objects.annotate(event_count=Count("events"))
+            .order_by("-event_count", "pk")
+            .select_related("user")
+            .first()
+        )
+        self.organizer_user = organizer.user
+
+        self.detail_ids = list(
+            Event.objects.filter(status="active", date__gte=timezone.localdate())
+            .order_by("pk")
+            .values_list("pk", flat=True)[:DETAIL_SAMPLE]
+        ) or [self.event.pk]
+
+        busiest = (
+            Category.objects.annotate(event_count=Count("events"))
+            .order_by("-event_count", "pk")
+            .first()
+        )
+        category = str(busiest.pk) if busiest else ""
+        self.list_paths = []
+        for label, params in EVENT_FILTERS:
+            params = {
+                key: value.format(category=category) if isinstance(value, str) else value
+                for key, value in params.items()
+            }
+            query = urlencode(params, doseq=True)
+            self.list_paths.append((f"events_list[{label}]", reverse("events_list") + (f"?{query}" if query else "")))
+
+    def _user(self, username):
+        user, _ = User.objects.get_or_create(username=username, defaults={"email": f"{username}@example.com"})
+        return user
+
+    def _bench_event(self):
+        organizer, _ = Organizer.objects.get_or_create(
+            user=self._user(f"{BENCH_PREFIX}organizer"),
+            defaults={"organization_name": "Benchmark"},
+        )
+        event, _ = Event.objects.get_or_create(
+            organizer=organizer,
+            title="Benchmark Live",
+            defaults={
+                "date": timezone.localdate() + datetime.timedelta(days=365),
+                "state": "lagos",
+                "status": "active",
+            },
+        )
+        ticket, _ = Ticket.objects.get_or_create(
+            event=event,
+            name="Regular",
+            defaults={"price": 5000, "quantity_available": 10_000_000},
+        )
+        return event, ticket
+
+
+def run_iteration(buyer, organizer, plan, stub, iteration):
+    """
+    One pass of a virtual user. buyer and organizer are logged-in sessions.
+    """
+    buyer.get("home", reverse("home"))
+    for name, path in plan.list_paths:
+        buyer.get(name, path)
+    event_id = plan.detail_ids[iteration % len(plan.detail_ids)]
+    buyer.get("event_detail", reverse("event_detail", args=[event_id]))
+
+    # Book → pay → come back from Paystack
+    buyer.get("event_detail", reverse("event_detail", args=[plan.event.pk]))
+    buyer.post(
+        "booking_confirm",
+        reverse("booking_confirm", args=[plan.event.pk]),
+        {"ticket_id": plan.ticket.pk, "quantity": 1},
+    )
+    order_id = (
+        Order.objects.filter(user=buyer.user, event=plan.event, status="pending")
+        .order_by("-pk").values_list("pk", flat=True).first()
+    )
+    if order_id is None:
+        buyer.results.add("initialize_payment", 0, ok=False)
+    else:
+        response = buyer.get("initialize_payment", reverse("initialize_payment", args=[order_id]))
+        reference = response.headers.get("Location", "").rsplit("/", 1)[-1]
+        with stub.lock:
+            if reference in stub.transactions:
+                stub.transactions[reference]["status"] = "success"
+        buyer.get(
+            "verify_payment",
+            reverse("verify_payment") + f"?reference={reference}",
+            expect=reverse("payment_success"),
+        )
+
+    for name in ORGANIZER_PAGES:
+        organizer.get(name, reverse(name))
+
+
+def host():
+    allowed = [name for name in settings.ALLOWED_HOSTS if name not in ("*", "")]
+    return allowed[0].lstrip(".") if allowed else "localhost"
+
+
+# ---------------------------------------------------------------------------
+# Client mode
+# ---------------------------------------------------------------------------
+
+class ClientSession:
+
+    def __init__(self, user, results):
+        self.user = user
+        self.results = results
+        self.client = Client(HTTP_HOST=host())
+        self.client.force_login(user)
+
+    def get(self, name, path, expect=None):
+        return self._request(name, "get", path, None, expect)
+
+    def post(self, name, path, data, expect=None):
+        return self._request(name, "post", path, data, expect)
+
+    def _request(self, name, method, path, data, expect):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(self.client, method)(path, data)
+            elapsed = time.perf_counter() - started
+        self.results.add(name, elapsed, len(queries), ok=_ok(response.status_code, response.headers, expect))
+        return response
+
+
+def _ok(status, headers, expect):
+    if status >= 400:
+        return False
+    return expect is None or expect in headers.get("Location", "")
+
+
+def run_client(plan, iterations, warmup=0, results=None):
+    results = results or Results()
+    stub = StubPaystackServer().start()
+    previous, paystack._client = paystack._client, paystack.PaystackClient(base_url=stub.url)
+    try:
+        for iteration in range(warmup + iterations):
+            target = results if iteration >= warmup else Results()
+            buyer = ClientSession(plan.buyers[0], target)
+            organizer = ClientSession(plan.organizer_user, target)
+            run_iteration(buyer, organizer, plan, stub, iteration)
+    finally:
+        paystack._client = previous
+        stub.stop()
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Server mode
+# ---------------------------------------------------------------------------
+
+class _QuietHandler(WSGIRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+
+class PreforkServer:
+    """
+    A WSGI server of `workers` forked processes accepting on one socket
+    (stdlib only, so Linux/macOS). Each worker talks to `paystack_url`.
+    """
+
+    def __init__(self, workers, paystack_url, host="127.0.0.1", port=0):
+        self.workers = workers
+        self.paystack_url = paystack_url
+        self.server = make_server(host, port, get_wsgi_application(), WSGIServer, _QuietHandler)
+        self.pids = []
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        # Children must not share the parent's database connections
+        connections.close_all()
+        for _ in range(self.workers):
+            pid = os.fork()
+            if pid == 0:
+                self._serve()
+            self.pids.append(pid)
+        return self
+
+    def _serve(self):
+        try:
+            signal.signal(signal.SIGTERM, lambda *args: os._exit(0))
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            paystack._client = paystack.PaystackClient(base_url=self.paystack_url)
+            # Query counts for every request, in the Server-Timing header
+            settings.REQUEST_METRICS_SAMPLE_RATE = 1.0
+            settings.REQUEST_METRICS_SERVER_TIMING = True
+            # ...and the slow-request log would only repeat what we measure
+            logging.getLogger("events.requests").disabled = True
+            self.server.serve_forever()
+        finally:
+            os._exit(0)
+
+    def stop(self):
+        for pid in self.pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in self.pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.server.server_close()
+
+
+class HTTPSession:
+
+    def __init__(self, user, results, base_url):
+        self.user = user
+        self.results = results
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.session.headers["Host"] = host()
+
+        # Log in the way the test client does: a session row + its cookie
+        client = Client()
+        client.force_login(user)
+        cookie = client.cookies[settings.SESSION_COOKIE_NAME]
+        self.session.cookies.set(settings.SESSION_COOKIE_NAME, cookie.value)
+
+    def get(self, name, path, expect=None):
+        return self._request(name, "GET", path, None, expect)
+
+    def post(self, name, path, data, expect=None):
+        token = self.session.cookies.get(settings.CSRF_COOKIE_NAME, "")
+        return self._request(name, "POST", path, data, expect, headers={"X-CSRFToken": token})
+
+    def _request(self, name, method, path, data, expect, headers=None):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                method, self.base_url + path, data=data, headers=headers,
+                allow_redirects=False, timeout=30,
+            )
+        except requests.RequestException:
+            self.results.add(name, time.perf_counter() - started, ok=False)
+            return requests.Response()
+        elapsed = time.perf_counter() - started
+
+        match = _QUERIES.search(response.headers.get("Server-Timing", ""))
+        self.results.add(
+            name, elapsed,
+            int(match.group(1)) if match else None,
+            ok=_ok(response.status_code, response.headers, expect),
+        )
+        return response
+
+
+def run_server(plan, iterations, workers, concurrency, warmup=0, results=None):
+    results = results or Results()
+    with StubPaystackServer() as stub:
+        server = PreforkServer(workers, stub.url).start()
+        try:
+            def virtual_user(index):
+                warm, target = Results(), results
+                buyer = HTTPSession(plan.buyers[index], warm, server.url)
+                organizer = HTTPSession(plan.organizer_user, warm, server.url)
+                try:
+                    for iteration in range(warmup + iterations):
+                        if iteration == warmup:
+                            buyer.results = organizer.results = target
+                        run_iteration(buyer, organizer, plan, stub, iteration)
+                finally:
+                    connection.close()
+
+            threads = [threading.Thread(target=virtual_user, args=(n,)) for n in range(concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            server.stop()
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Baselines
+# ---------------------------------------------------------------------------
+
+def compare(current, baseline, tolerance=0.2, min_ms=1.0):
+    """
+    Regressions of `current` against `baseline` (two saved results):
+    p95 latency or queries per request up, or rps down, by more than
+    `tolerance`. Latency changes under min_ms are noise and ignored.
+    Returns a list of human readable problems (empty = no regression).
+    """
+    problems = []
+    for key in ("mode", "workers", "concurrency"):
+        if current.get(key) != baseline.get(key):
+            problems.append(
+                f"{key} differs from the baseline ({baseline.get(key)} → {current.get(key)}): "
+                f"the numbers are not comparable"
+            )
+
+    for name, old in sorted(baseline["endpoints"].items()):
+        new = current["endpoints"].get(name)
+        if new is None:
+            continue
+
+        if new["p95_ms"] - old["p95_ms"] > max(old["p95_ms"] * tolerance, min_ms):
+            problems.append(f"{name}: p95 {old['p95_ms']}ms → {new['p95_ms']}ms")
+        if old["rps"] and new["rps"] < old["rps"] * (1 - tolerance):
+            problems.append(f"{name}: {old['rps']} → {new['rps']} requests/s")
+        if old["queries"] is not None and new["queries"] is not None and new["queries"] > old["queries"] + 0.5:
+            problems.append(f"{name}: {old['queries']} → {new['queries']} queries per request")
+        if new["errors"] > old["errors"]:
+            problems.append(f"{name}: {new['errors']} errors (baseline {old['errors']})")
+
+    return problems
@@ -0,0 +1,330 @@
+"""
+Maintenance of the EventCard read model.
+
+Every Event has one EventCard row holding the numbers its card needs
+(price range, capacity, tickets sold, paid orders, category name).
+Templates read ``event.card`` after ``select_related("card")`` so a page
+of cards costs a single query.
+
+Every ticket tier likewise has a TicketSales row (sold, paid orders,
+revenue) read through ``ticket.sales``.
+
+Ticket changes recompute the ticket columns for that one event.
+Order/OrderItem changes apply small +/- deltas when an order moves into
+or out of "paid", so nothing here ever scans an event's full order history.
+The deltas run inside the transaction that changes the order status.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Max, Min, Sum
+
+from .models import Event, EventCard, Order, OrderItem, Ticket, TicketSales
+
+
+# Revenue of one order line (OrderItem has no price of its own)
+LINE_TOTAL = ExpressionWrapper(
+    F("quantity") * F("ticket__price"),
+    output_field=DecimalField(max_digits=14, decimal_places=2),
+)
+
+
+def _ticket_stats(event_id):
+    stats = Ticket.objects.filter(event_id=event_id).aggregate(
+        tiers=Count("id"),
+        min_price=Min("price"),
+        max_price=Max("price"),
+        total_capacity=Sum("quantity_available"),
+    )
+    return {
+        "has_tickets": stats["tiers"] > 0,
+        "min_price": stats["min_price"],
+        "max_price": stats["max_price"],
+        "total_capacity": stats["total_capacity"] or 0,
+    }
+
+
+def _order_stats(event_id):
+    paid_items = OrderItem.objects.filter(
+        order__event_id=event_id,
+        order__status="paid"
+    ).aggregate(
+        total_sold=Sum("quantity"),
+        paid_orders=Count("order", distinct=True),
+    )
+    revenue = Order.objects.filter(event_id=event_id, status="paid").aggregate(
+        total=Sum("total_amount")
+    )["total"]
+    return {
+        "total_sold": paid_items["total_sold"] or 0,
+        "paid_orders": paid_items["paid_orders"],
+        "revenue": revenue or Decimal("0"),
+    }
+
+
+def _tier_stats(ticket_id):
+    stats = OrderItem.objects.filter(
+        ticket_id=ticket_id,
+        order__status="paid"
+    ).aggregate(
+        sold=Sum("quantity"),
+        paid_orders=Count("order", distinct=True),
+        revenue=Sum(LINE_TOTAL),
+    )
+    return {
+        "sold": stats["sold"] or 0,
+        "paid_orders": stats["paid_orders"],
+        "revenue": stats["revenue"] or Decimal("0"),
+    }
+
+
+def rebuild_ticket_sales(ticket_id):
+    """
+    Recompute one tier's sales from scratch (creates the row if missing).
+    """
+    TicketSales.objects.update_or_create(ticket_id=ticket_id, defaults=_tier_stats(ticket_id))
+
+
+def rebuild_card(event):
+    """
+    Recompute an event's card from scratch (creates it if missing).
+    """
+    category_name = event.category.name if event.category_id else ""
+
+    card, _ = EventCard.objects.update_or_create(
+        event=event,
+        defaults={
+            "category_name": category_name,
+            **_ticket_stats(event.pk),
+            **_order_stats(event.pk),
+        },
+    )
+    return card
+
+
+def rebuild_all_cards():
+    """
+    Recompute every card in a fixed number of queries.
+    Returns the number of cards written.
+    """
+    events = Event.objects.select_related("category").annotate(
+        tier_count=Count("tickets", distinct=True),
+        min_ticket_price=Min("tickets__price"),
+        max_ticket_price=Max("tickets__price"),
+    )
+
+    capacity = dict(
+        Ticket.objects.values_list("event_id").annotate(Sum("quantity_available"))
+    )
+    sold = {
+        row["order__event_id"]: row
+        for row in OrderItem.objects.filter(order__status="paid")
+        .values("order__event_id")
+        .annotate(total_sold=Sum("quantity"), paid_orders=Count("order", distinct=True))
+    }
+    revenue = dict(
+        Order.objects.filter(status="paid").values_list("event_id").annotate(Sum("total_amount"))
+    )
+
+    cards = []
+    for event in events.iterator(chunk_size=2000):
+        paid = sold.get(event.pk, {})
+        cards.append(EventCard(
+            event=event,
+            category_name=event.category.name if event.category_id else "",
+            has_tickets=event.tier_count > 0,
+            min_price=event.min_ticket_price,
+            max_price=event.max_ticket_price,
+            total_capacity=capacity.get(event.pk) or 0,
+            total_sold=paid.get("total_sold") or 0,
+            paid_orders=paid.get("paid_orders") or 0,
+            revenue=revenue.get(event.pk) or Decimal("0"),
+        ))
+
+    EventCard.objects.all().delete()
+    EventCard.objects.bulk_create(cards, batch_size=2000)
+    return len(cards)
+
+
+def rebuild_all_ticket_sales():
+    """
+    Recompute every tier's TicketSales row in two queries.
+    Returns the number of rows written.
+    """
+    paid = {
+        row["ticket_id"]: row
+        for row in OrderItem.objects.filter(order__status="paid")
+        .values("ticket_id")
+        .annotate(
+            sold=Sum("quantity"),
+            paid_orders=Count("order", distinct=True),
+            revenue=Sum(LINE_TOTAL),
+        )
+    }
+
+    rows = []
+    for ticket_id in Ticket.objects.values_list("pk", flat=True).iterator(chunk_size=2000):
+        stats = paid.get(ticket_id, {})
+        rows.append(TicketSales(
+            ticket_id=ticket_id,
+            sold=stats.get("sold") or 0,
+            paid_orders=stats.get("paid_orders") or 0,
+            revenue=stats.get("revenue") or Decimal("0"),
+        ))
+
+    TicketSales.objects.all().delete()
+    TicketSales.objects.bulk_create(rows, batch_size=2000)
+    return len(rows)
+
+
+def event_saved(event, created):
+    if created:
+        rebuild_card(event)
+        return
+
+    category_name = event.category.name if event.category_id else ""
+    EventCard.objects.filter(event=event).update(category_name=category_name)
+
+
+def category_renamed(category):
+    EventCard.objects.filter(event__category=category).update(category_name=category.name)
+
+
+def category_deleted():
+    # Event.category is SET_NULL, so the old category's events have none now
+    EventCard.objects.filter(event__category__isnull=True).exclude(
+        category_name=""
+    ).update(category_name="")
+
+
+def ticket_created(ticket):
+    TicketSales.objects.get_or_create(ticket=ticket)
+
+
+def tickets_changed(event_id, deleted=False):
+    updated = EventCard.objects.filter(event_id=event_id).update(**_ticket_stats(event_id))
+
+    # Card missing (e.g. event was bulk created): build it, unless this is
+    # the event itself being deleted and its tickets cascading away
+    if not updated and not deleted:
+        event = Event.objects.filter(pk=event_id).select_related("category").first()
+        if event is not None:
+            rebuild_card(event)
+
+
+def capacity_changed(event_id, delta):
+    """
+    Tickets were held, sold or released through a queryset update
+    (events.inventory), which doesn't fire Ticket signals.
+    """
+    if delta > 0:
+        EventCard.objects.filter(event_id=event_id).update(
+            total_capacity=F("total_capacity") + delta
+        )
+    elif delta < 0:
+        updated = EventCard.objects.filter(
+            event_id=event_id,
+            total_capacity__gte=-delta,
+        ).update(total_capacity=F("total_capacity") + delta)
+
+        if not updated:
+            EventCard.objects.filter(event_id=event_id).update(**_ticket_stats(event_id))
+
+
+def order_status_changed(order, old_status, new_status):
+    """
+    Move an order's tickets and money into or out of the paid totals
+    of its event card and ticket tiers.
+    """
+    if (old_status == "paid") == (new_status == "paid"):
+        return
+
+    # ticket_id -> [quantity, revenue]
+    lines = defaultdict(lambda: [0, Decimal("0")])
+    for ticket_id, quantity, line_total in order.items.values_list(
+        "ticket_id", "quantity", LINE_TOTAL
+    ):
+        lines[ticket_id][0] += quantity
+        lines[ticket_id][1] += line_total or 0
+
+    sold = sum(quantity for quantity, _ in lines.values())
+
+    if new_status == "paid":
+        EventCard.objects.filter(event_id=order.event_id).update(
+            total_sold=F("total_sold") + sold,
+            paid_orders=F("paid_orders") + 1,
+            revenue=F("revenue") + order.total_amount,
+        )
+        for ticket_id, (quantity, revenue) in lines.items():
+            updated = TicketSales.objects.filter(ticket_id=ticket_id).update(
+                sold=F("sold") + quantity,
+                paid_orders=F("paid_orders") + 1,
+                revenue=F("revenue") + revenue,
+            )
+            if not updated:
+                rebuild_ticket_sales(ticket_id)
+    else:
+        _subtract(order.event_id, sold=sold, orders=1, revenue=order.total_amount)
+        for ticket_id, (quantity, revenue) in lines.items():
+            _subtract_tier(ticket_id, quantity, revenue)
+
+
+def paid_item_changed(event_id, ticket_id, quantity_delta):
+    """
+    A ticket line was added to / removed from an order that is already paid.
+    """
+    if quantity_delta > 0:
+        EventCard.objects.filter(event_id=event_id).update(
+            total_sold=F("total_sold") + quantity_delta
+        )
+    elif quantity_delta < 0:
+        _subtract(event_id, sold=-quantity_delta, orders=0)
+
+    tier_changed(ticket_id)
+
+
+def tier_changed(ticket_id):
+    # Update only: when the tier itself is being deleted its lines cascade
+    # away and its TicketSales row must not be created again
+    TicketSales.objects.filter(ticket_id=ticket_id).update(**_tier_stats(ticket_id))
+
+
+def paid_order_deleted(order):
+    # Its items were deleted first and already taken off the totals
+    _subtract(order.event_id, sold=0, orders=1, revenue=order.total_amount)
+
+
+def _subtract(event_id, sold, orders, revenue=0):
+    # Counters are unsigned; if they would go negative the card has drifted,
+    # so rebuild it instead of writing a bad value
+    updated = EventCard.objects.filter(
+        event_id=event_id,
+        total_sold__gte=sold,
+        paid_orders__gte=orders,
+        revenue__gte=revenue,
+    ).update(
+        total_sold=F("total_sold") - sold,
+        paid_orders=F("paid_orders") - orders,
+        revenue=F("revenue") - revenue,
+    )
+
+    if not updated:
+        card = EventCard.objects.filter(event_id=event_id)
+        if card.exists():
+            card.update(**_order_stats(event_id))
+
+
+def _subtract_tier(ticket_id, quantity, revenue):
+    updated = TicketSales.objects.filter(
+        ticket_id=ticket_id,
+        sold__gte=quantity,
+        paid_orders__gte=1,
+        revenue__gte=revenue,
+    ).update(
+        sold=F("sold") - quantity,
+        paid_orders=F("paid_orders") - 1,
+        revenue=F("revenue") - revenue,
+    )
+
+    if not updated:
+        rebuild_ticket_sales(ticket_id)
@@ -0,0 +1,80 @@
+"""
+Organizer dashboard numbers.
+
+organizer_stats() computes the dashboard's stat block in two aggregate
+queries (orders, then page views) and caches it per organizer. The cache
+entry is dropped whenever one of the organizer's orders changes status
+(or an event is added/removed), see signals.py, so it never shows stale
+revenue. Page views aren't invalidated: they lag by up to the cache time
+plus the viewcounts flush interval.
+
+Set ORG_DASHBOARD_STATS_CACHE_SECONDS = 0 to turn the cache off.
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from . import viewcounts
+from .models import Event
+
+
+CACHE_SECONDS = getattr(settings, "ORG_DASHBOARD_STATS_CACHE_SECONDS", 300)
+
+
+def _cache_key(organizer_id):
+    return f"org-dashboard-stats:{organizer_id}"
+
+
+def compute_organizer_stats(organizer):
+    """
+    One query: the organizer's events LEFT JOIN their orders. Then one
+    for the views and impressions of those events.
+    """
+    events = Event.objects.filter(organizer=organizer)
+    stats = events.aggregate(
+        total_events=Count("id", distinct=True),
+        total_orders=Count("order"),
+        total_paid_orders=Count("order", filter=Q(order__status="paid")),
+        total_revenue=Coalesce(
+            Sum("order__total_amount", filter=Q(order__status="paid")),
+            Value(Decimal("0")),
+            output_field=DecimalField(),
+        ),
+    )
+    traffic = viewcounts.totals(events)
+    stats["total_views"] = traffic["views"]
+    stats["total_impressions"] = traffic["impressions"]
+    return stats
+
+
+def organizer_stats(organizer):
+    if not CACHE_SECONDS:
+        return compute_organizer_stats(organizer)
+
+    key = _cache_key(organizer.pk)
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_organizer_stats(organizer)
+        cache.set(key, stats, CACHE_SECONDS)
+    return stats
+
+
+def invalidate_organizer_stats(organizer_id):
+    cache.delete(_cache_key(organizer_id))
+
+
+def order_changed(order):
+    """
+    Drop the stats of the organizer running the order's event.
+    """
+    organizer_id = (
+        Event.objects
+        .filter(pk=order.event_id)
+        .values_list("organizer_id", flat=True)
+        .first()
+    )
+    if organizer_id is not None:
+        invalidate_organizer_stats(organizer_id)
@@ -0,0 +1,148 @@
+"""
+Streaming attendee exports (CSV and JSON Lines).
+
+Rows are read with ``.values_list(...).iterator(chunk_size=...)`` and
+written out one at a time through a StreamingHttpResponse, so memory use
+stays flat however many attendees an event has: nothing builds a list of
+rows or model instances.
+
+An attendee row covers a whole booking, so a booking with several ticket
+tiers is written as one row per order line: the booking's other columns
+repeat, and ticket_tier, ticket_price and tickets_qty come from the line
+(matched through booking_ref → Order.reference). Each chunk of attendees
+fetches its lines in one extra query.
+"""
+import csv
+import json
+from itertools import batched
+
+from .models import Attendee, OrderItem
+
+
+CHUNK_SIZE = 2000              # rows fetched per query
+BUFFER_SIZE = 64 * 1024        # bytes handed to the server per write
+
+COLUMNS = [
+    ("booking_ref", "booking_ref"),
+    ("full_name", "full_name"),
+    ("email", "email"),
+    ("phone", "phone"),
+    ("ticket_tier", "ticket__name"),
+    ("ticket_price", "ticket__price"),
+    ("tickets_qty", "tickets_qty"),
+    ("payment_status", "payment_status"),
+    ("registered_at", "registered_at"),
+]
+
+HEADER = [name for name, _ in COLUMNS]
+
+# Columns that describe one order line, and the OrderItem field for each
+LINE_COLUMNS = [
+    ("ticket_tier", "ticket__name"),
+    ("ticket_price", "ticket__price"),
+    ("tickets_qty", "quantity"),
+]
+
+FORMATS = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+}
+
+
+def _order_lines(booking_refs):
+    """
+    {booking_ref: [(tier, price, quantity), ...]} for the given bookings.
+    """
+    lines = {}
+    items = (
+        OrderItem.objects
+        .filter(order__reference__in=booking_refs)
+        .order_by("pk")
+        .values_list("order__reference", *[field for _, field in LINE_COLUMNS])
+    )
+    for reference, *line in items:
+        lines.setdefault(reference, []).append(line)
+    return lines
+
+
+def attendee_rows(event, chunk_size=CHUNK_SIZE):
+    """
+    Yield one tuple per order line of each attendee of the event (in
+    COLUMNS order). Attendees without order lines get one row as stored.
+    """
+    ref_index = HEADER.index("booking_ref")
+    line_indexes = [HEADER.index(name) for name, _ in LINE_COLUMNS]
+
+    attendees = (
+        Attendee.objects
+        .filter(event=event)
+        .order_by("pk")
+        .values_list(*[field for _, field in COLUMNS])
+        .iterator(chunk_size=chunk_size)
+    )
+    for chunk in batched(attendees, chunk_size):
+        lines = _order_lines([row[ref_index] for row in chunk if row[ref_index]])
+        for row in chunk:
+            booking_lines = lines.get(row[ref_index])
+            if not booking_lines:
+                yield row
+                continue
+            for line in booking_lines:
+                line_row = list(row)
+                for index, value in zip(line_indexes, line):
+                    line_row[index] = value
+                yield tuple(line_row)
+
+
+class _Echo:
+    """
+    File-like object for csv.writer that hands each line back instead of
+    storing it.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(HEADER)
+    for row in rows:
+        yield writer.writerow([_text(value) for value in row])
+
+
+def jsonl_lines(rows):
+    for row in rows:
+        # ints and None stay JSON numbers/null; Decimal and datetime go via _text
+        yield json.dumps(dict(zip(HEADER, row)), default=_text) + "\n"
+
+
+def _buffered(lines, size=BUFFER_SIZE):
+    # One write per row is slow; join lines into blocks of about `size`
+    block, length = [], 0
+    for line in lines:
+        block.append(line)
+        length += len(line)
+        if length >= size:
+            yield "".join(block)
+            block, length = [], 0
+    if block:
+        yield "".join(block)
+
+
+def stream(event, export_format, chunk_size=CHUNK_SIZE):
+    """
+    The export as a generator of text blocks.
+    """
+    rows = attendee_rows(event, chunk_size=chunk_size)
+    if export_format == "jsonl":
+        return _buffered(jsonl_lines(rows))
+    return _buffered(csv_lines(rows))
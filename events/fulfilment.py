@@ -0,0 +1,115 @@
+"""
+Order state transitions, shared by every path that learns a payment's
+outcome (the Paystack webhook worker, verify_payment, reconciliation).
+
+All of them are idempotent: the status change is a conditional UPDATE
+("... WHERE status IN ('pending', 'failed')"), so when the webhook and the
+browser redirect race, exactly one of them fulfils the order.
+"""
+import logging
+
+from django.db import transaction
+
+from . import inventory
+from .models import Attendee, Order
+from .signals import order_status_changed
+
+
+logger = logging.getLogger(__name__)
+
+# fulfil_order() results
+PAID = "paid"
+ALREADY_PAID = "already_paid"
+AMOUNT_MISMATCH = "amount_mismatch"
+SOLD_OUT = "sold_out"
+
+
+def set_order_status(order, new_status, from_statuses):
+    """
+    Move order to new_status if it is currently in one of from_statuses.
+    Returns False (changing nothing) if another worker got there first.
+
+    The change is a queryset update, so order_status_changed is sent here
+    rather than by the post_save receiver.
+    """
+    claimed = Order.objects.filter(
+        pk=order.pk,
+        status__in=from_statuses
+    ).update(status=new_status)
+
+    if not claimed:
+        return False
+
+    old_status = order.status
+    order.status = new_status
+    order._loaded_status = new_status
+
+    order_status_changed.send(
+        sender=Order,
+        order=order,
+        old_status=old_status,
+        new_status=new_status,
+    )
+    return True
+
+
+def fulfil_order(order, amount=None):
+    """
+    Mark a successfully charged order as paid: sell its held tickets and
+    register the booking. amount (kobo), when given, must match the order.
+    """
+    if order.status == "paid":
+        return ALREADY_PAID
+
+    if amount is not None and int(amount) != int(order.total_amount * 100):
+        logger.error(
+            "Payment %s charged %s kobo but order total is %s",
+            order.reference, amount, order.total_amount
+        )
+        return AMOUNT_MISMATCH
+
+    try:
+        with transaction.atomic():
+            if not set_order_status(order, "paid", ["pending", "failed"]):
+                return ALREADY_PAID
+
+            # Held tickets become sold tickets
+            inventory.commit_order(order)
+
+            # One attendee row per booking: booking_ref is unique and the
+            # buyer gets a single QR code for the whole order. An order
+            # paid again after a reversal already has its row
+            items = list(order.items.order_by("pk"))
+            if items:
+                Attendee.objects.update_or_create(
+                    booking_ref=order.reference,
+                    defaults=dict(
+                        event_id=order.event_id,
+                        user=order.user,
+                        ticket_id=items[0].ticket_id,
+                        full_name=order.user.get_full_name(),
+                        email=order.user.email,
+                        tickets_qty=sum(item.quantity for item in items),
+                        payment_status="paid",
+                    ),
+                )
+
+    except inventory.InsufficientInventory:
+        # Hold expired and the tickets were sold to someone else
+        logger.error("Order %s paid but its tickets are sold out", order.reference)
+        order.refresh_from_db(fields=["status"])
+        order._loaded_status = order.status
+        fail_order(order)
+        return SOLD_OUT
+
+    return PAID
+
+
+def fail_order(order):
+    """
+    Mark a pending order as failed and put its held tickets back on sale.
+    """
+    with transaction.atomic():
+        changed = set_order_status(order, "failed", ["pending"])
+        inventory.release_order(order)
+    return changed
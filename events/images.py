@@ -0,0 +1,178 @@
+"""
+Resized, re-encoded copies ("derivatives") of uploaded images.
+
+When an Event.image is saved, a background job (tasks.refresh_image)
+writes each size in SIZES next to the original as WebP and JPEG:
+
+    events/party.jpg
+    events/party.3f2a9c1b7d4e.card.webp
+    events/party.3f2a9c1b7d4e.card.jpg
+    ...
+
+The middle part is a hash of the original's bytes, so names are the same
+every time for the same upload (re-running is a no-op and the files can
+be cached forever), and a replaced image never reuses an old name.
+
+The names are recorded in <field>_derivatives on the model, e.g.
+
+    {"source": "events/party.jpg",
+     "sizes": {"card": {"width": 640, "webp": "...", "jpeg": "..."}, ...}}
+
+so templates ({% picture %} in templatetags/images.py) never touch storage.
+Cached pages embed that markup, so writing new derivatives bumps the
+events section version.
+"""
+import hashlib
+import io
+import logging
+import posixpath
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from . import sections
+
+
+logger = logging.getLogger(__name__)
+
+# Target widths; originals are never scaled up
+SIZES = {
+    "thumb": 160,
+    "card": 640,
+    "hero": 1600,
+}
+
+WEBP_QUALITY = 80
+JPEG_QUALITY = 82
+
+# Models and image fields that get derivatives (only ones a template
+# renders with {% picture %})
+FIELDS = [
+    ("events.Event", "image"),
+]
+
+
+def derivatives_field(field_name):
+    return f"{field_name}_derivatives"
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def derivative_name(source_name, digest, size, extension):
+    stem, _ = posixpath.splitext(source_name)
+    return f"{stem}.{digest}.{size}.{extension}"
+
+
+def _flatten(image):
+    # JPEG has no alpha channel: put transparent images on white
+    if image.mode in ("RGBA", "LA") or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _encode(image, extension):
+    buffer = io.BytesIO()
+    if extension == "webp":
+        image.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+    else:
+        image.save(buffer, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def build_derivatives(field_file):
+    """
+    Write every derivative of an image (skipping ones that already exist)
+    and return the dict to store in <field>_derivatives.
+    Raises ValueError if the file isn't an image Pillow can read.
+    """
+    storage = field_file.storage
+    with storage.open(field_file.name, "rb") as f:
+        data = f.read()
+
+    digest = content_hash(data)
+
+    try:
+        original = Image.open(io.BytesIO(data))
+        original.load()
+    except (UnidentifiedImageError, OSError) as exc:
+        raise ValueError(f"{field_file.name} is not a readable image") from exc
+
+    # Phone photos are often stored sideways with an EXIF rotation flag
+    original = _flatten(ImageOps.exif_transpose(original))
+
+    sizes = {}
+    for size, target in SIZES.items():
+        width = min(target, original.width)
+        height = max(round(original.height * width / original.width), 1)
+        resized = None
+
+        entry = {"width": width}
+        for extension, key in (("webp", "webp"), ("jpg", "jpeg")):
+            name = derivative_name(field_file.name, digest, size, extension)
+            if not storage.exists(name):
+                if resized is None:
+                    resized = original.resize((width, height), Image.Resampling.LANCZOS)
+                storage.save(name, ContentFile(_encode(resized, extension)))
+            entry[key] = name
+        sizes[size] = entry
+
+    return {"source": field_file.name, "sizes": sizes}
+
+
+def is_current(instance, field_name):
+    """
+    True if the instance's stored derivatives were built from its current
+    image (or it has no image and none are stored).
+    """
+    field_file = getattr(instance, field_name)
+    derivatives = getattr(instance, derivatives_field(field_name)) or {}
+    if not field_file:
+        return not derivatives
+    return derivatives.get("source") == field_file.name
+
+
+def refresh(instance, field_name, force=False):
+    """
+    Bring <field>_derivatives up to date for one instance. Saved with a
+    queryset update, so no save signals fire again.
+    Returns True if anything was written.
+    """
+    if not force and is_current(instance, field_name):
+        return False
+
+    field_file = getattr(instance, field_name)
+    derivatives = {}
+    if field_file:
+        try:
+            derivatives = build_derivatives(field_file)
+        except (ValueError, OSError) as exc:
+            # Missing or corrupt originals keep being served as they are
+            logger.warning("Could not build derivatives for %s: %s", field_file.name, exc)
+            return False
+
+    column = derivatives_field(field_name)
+    setattr(instance, column, derivatives)
+    type(instance).objects.filter(pk=instance.pk).update(**{column: derivatives})
+    # Pages cached with the plain <img> fallback pick up the <picture>
+    sections.bump(sections.EVENTS)
+    return True
+
+
+def srcset(derivatives, key, storage):
+    """
+    "url 160w, url 640w, ..." for one format ("webp" or "jpeg").
+    """
+    entries = sorted((derivatives.get("sizes") or {}).values(), key=lambda entry: entry["width"])
+    seen, parts = set(), []
+    for entry in entries:
+        # Small originals give several sizes the same width; list each once
+        if entry["width"] in seen:
+            continue
+        seen.add(entry["width"])
+        parts.append(f"{storage.url(entry[key])} {entry['width']}w")
+    return ", ".join(parts)
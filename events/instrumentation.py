@@ -0,0 +1,201 @@
+"""
+Per-request performance instrumentation.
+
+RequestMetricsMiddleware times every request. For a sample of them
+(REQUEST_METRICS_SAMPLE_RATE) it also records:
+
+* every SQL query: count, total time, and "fingerprints" (the SQL with
+  numbers and IN lists collapsed), so an N+1 shows up as one fingerprint
+  run 30 times;
+* template render time, through the TimedDjangoTemplates backend.
+
+The numbers go out as a Server-Timing header (visible in the browser's
+network panel):
+
+    Server-Timing: db;dur=41.2;desc="38 queries (30 similar)", tpl;dur=55.0, total;dur=112.4
+
+and requests over the thresholds below are written as one JSON line to
+the "events.requests" logger:
+
+    REQUEST_METRICS_SAMPLE_RATE   fraction of requests with query/template detail
+    REQUEST_METRICS_SLOW_MS       log requests slower than this
+    REQUEST_METRICS_MAX_QUERIES   log sampled requests running more queries
+    REQUEST_METRICS_MAX_SIMILAR   log sampled requests repeating one fingerprint more often
+    REQUEST_METRICS_SERVER_TIMING send the Server-Timing header (default: DEBUG;
+                                  it tells anyone how many queries a page runs)
+
+Requests that aren't sampled only pay for two perf_counter() calls.
+"""
+import contextvars
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import DjangoTemplates, Template
+
+
+logger = logging.getLogger("events.requests")
+
+MAX_LOGGED_FINGERPRINTS = 5
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+
+_IN_LIST = re.compile(r"\bIN \((?:%s|\?|\d+)(?:, (?:%s|\?|\d+))*\)")
+_NUMBER = re.compile(r"\b\d+\b")
+
+
+def fingerprint(sql):
+    """
+    Collapse the parts of a query that change between otherwise
+    identical calls (IN lists, LIMIT/OFFSET numbers).
+    """
+    return _NUMBER.sub("?", _IN_LIST.sub("IN (...)", sql))
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook: runs around every query
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def similar(self):
+        """
+        Queries that repeated an earlier fingerprint.
+        """
+        return sum(count - 1 for count in self.fingerprints.values())
+
+    def repeated(self, limit=MAX_LOGGED_FINGERPRINTS):
+        return [
+            {"sql": sql[:300], "count": count}
+            for sql, count in self.fingerprints.most_common(limit)
+            if count > 1
+        ]
+
+
+class RequestMetricsMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sampled = random.random() < _setting("REQUEST_METRICS_SAMPLE_RATE", 1.0)
+        metrics = RequestMetrics() if sampled else None
+
+        started = time.perf_counter()
+        if metrics is None:
+            response = self.get_response(request)
+        else:
+            token = _current.set(metrics)
+            try:
+                response = self._call_instrumented(request, metrics)
+            finally:
+                _current.reset(token)
+        total_ms = (time.perf_counter() - started) * 1000
+
+        if _setting("REQUEST_METRICS_SERVER_TIMING", settings.DEBUG):
+            response["Server-Timing"] = self.server_timing(metrics, total_ms)
+
+        if self.is_slow(metrics, total_ms):
+            logger.warning(json.dumps(self.summary(request, response, metrics, total_ms)))
+
+        return response
+
+    def _call_instrumented(self, request, metrics):
+        # Wrap every configured database, not just the default one
+        wrappers = [connection.execute_wrapper(metrics) for connection in connections.all()]
+        for wrapper in wrappers:
+            wrapper.__enter__()
+        try:
+            return self.get_response(request)
+        finally:
+            for wrapper in reversed(wrappers):
+                wrapper.__exit__(None, None, None)
+
+    def server_timing(self, metrics, total_ms):
+        parts = []
+        if metrics is not None:
+            parts.append(
+                f'db;dur={metrics.db_seconds * 1000:.1f};'
+                f'desc="{metrics.queries} queries ({metrics.similar} similar)"'
+            )
+            parts.append(f"tpl;dur={metrics.template_seconds * 1000:.1f}")
+        parts.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(parts)
+
+    def is_slow(self, metrics, total_ms):
+        if total_ms >= _setting("REQUEST_METRICS_SLOW_MS", 500):
+            return True
+        if metrics is None:
+            return False
+        return (
+            metrics.queries > _setting("REQUEST_METRICS_MAX_QUERIES", 50)
+            or max(metrics.fingerprints.values(), default=0) > _setting("REQUEST_METRICS_MAX_SIMILAR", 10)
+        )
+
+    def summary(self, request, response, metrics, total_ms):
+        match = getattr(request, "resolver_match", None)
+        data = {
+            "method": request.method,
+            "path": request.path,
+            "view": match.view_name if match else None,
+            "status": response.status_code,
+            "total_ms": round(total_ms, 1),
+            "sampled": metrics is not None,
+        }
+        if metrics is not None:
+            data.update(
+                queries=metrics.queries,
+                db_ms=round(metrics.db_seconds * 1000, 1),
+                similar_queries=metrics.similar,
+                template_ms=round(metrics.template_seconds * 1000, 1),
+                repeated=metrics.repeated(),
+            )
+        return data
+
+
+class TimedTemplate(Template):
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            metrics.template_seconds += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    The standard Django template backend, timing top-level renders for
+    RequestMetricsMiddleware ({% include %}s count towards their parent).
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code).template, self)
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name).template, self)
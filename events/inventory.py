@@ -0,0 +1,205 @@
+"""
+Ticket inventory: timed holds and oversell-proof sales.
+
+    booking_confirm  → place_hold()     stock moves from available to held
+    checkout retried → hold_order()     (a failed order: every item again)
+                     → renew_holds()    (a pending one: holds run 15 more minutes)
+    verify_payment   → commit_order()   held stock becomes sold
+    payment failed   → release_order()  held stock goes back on sale
+    hold expired     → release_expired_holds() (also run on every booking)
+
+Every counter change is a single conditional UPDATE, e.g.
+
+    UPDATE ticket SET quantity_available = quantity_available - 2
+    WHERE id = 7 AND quantity_available >= 2
+
+so two buyers racing for the last seat can't both win, and no request
+ever writes back a stale Python-side count.
+"""
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import cards, sections
+from .models import Ticket, TicketHold
+
+
+logger = logging.getLogger(__name__)
+
+HOLD_MINUTES = getattr(settings, "TICKET_HOLD_MINUTES", 15)
+
+
+class InsufficientInventory(Exception):
+    """
+    Not enough tickets left on a tier to cover the request.
+    """
+
+    def __init__(self, ticket, quantity):
+        self.ticket = ticket
+        self.quantity = quantity
+        super().__init__(f"Not enough tickets left for {quantity} x {ticket}")
+
+
+def _take(ticket_id, quantity, sell=False):
+    """
+    Atomically remove quantity from a tier's available stock.
+    Returns False (and changes nothing) if there isn't enough.
+    """
+    changes = {"quantity_available": F("quantity_available") - quantity}
+    if sell:
+        changes["quantity_sold"] = F("quantity_sold") + quantity
+
+    return Ticket.objects.filter(
+        pk=ticket_id,
+        quantity_available__gte=quantity
+    ).update(**changes) == 1
+
+
+def place_hold(order, ticket, quantity, now=None):
+    """
+    Reserve tickets for an order. Raises InsufficientInventory if the
+    tier can't cover it.
+    """
+    now = now or timezone.now()
+
+    with transaction.atomic():
+        if not _take(ticket.pk, quantity):
+            raise InsufficientInventory(ticket, quantity)
+
+        hold = TicketHold.objects.create(
+            ticket=ticket,
+            order=order,
+            quantity=quantity,
+            expires_at=now + datetime.timedelta(minutes=HOLD_MINUTES),
+        )
+        cards.capacity_changed(ticket.event_id, -quantity)
+
+    return hold
+
+
+def hold_order(order, now=None):
+    """
+    Reserve every item of an order (a failed order going back to
+    checkout). Raises InsufficientInventory, holding nothing, if a tier
+    can't cover its item.
+    """
+    with transaction.atomic():
+        return [
+            place_hold(order, item.ticket, item.quantity, now=now)
+            for item in order.items.select_related("ticket")
+        ]
+
+
+def renew_holds(order, now=None):
+    """
+    Restart the clock on an order's active holds (the buyer went back to
+    checkout). Returns how many holds were renewed.
+    """
+    now = now or timezone.now()
+    return order.holds.filter(status="active").update(
+        expires_at=now + datetime.timedelta(minutes=HOLD_MINUTES)
+    )
+
+
+def release_hold(hold):
+    """
+    Give a hold's tickets back. Safe to call twice: only the call that
+    flips the hold from active to released returns the stock.
+    """
+    with transaction.atomic():
+        flipped = TicketHold.objects.filter(
+            pk=hold.pk,
+            status="active"
+        ).update(status="released")
+
+        if not flipped:
+            return False
+
+        Ticket.objects.filter(pk=hold.ticket_id).update(
+            quantity_available=F("quantity_available") + hold.quantity
+        )
+        cards.capacity_changed(hold.ticket.event_id, hold.quantity)
+        # No order changed status, but "tickets left" did
+        sections.bump(sections.SALES)
+
+    hold.status = "released"
+    return True
+
+
+def release_order(order):
+    """
+    Release every active hold of an order (payment failed / order rebuilt).
+    """
+    released = 0
+    for hold in order.holds.filter(status="active").select_related("ticket"):
+        released += release_hold(hold)
+    return released
+
+
+def commit_order(order):
+    """
+    Turn an order's holds into sold tickets.
+
+    Items whose hold has expired (or orders placed before holds existed)
+    are sold straight from available stock. Raises InsufficientInventory,
+    changing nothing, if that stock is gone.
+    """
+    with transaction.atomic():
+        holds = list(order.holds.filter(status="active").select_related("ticket"))
+
+        for item in order.items.select_related("ticket"):
+            hold = next(
+                (h for h in holds if h.ticket_id == item.ticket_id and h.quantity == item.quantity),
+                None
+            )
+
+            if hold is not None:
+                holds.remove(hold)
+                converted = TicketHold.objects.filter(
+                    pk=hold.pk,
+                    status="active"
+                ).update(status="converted")
+
+                if converted:
+                    Ticket.objects.filter(pk=item.ticket_id).update(
+                        quantity_sold=F("quantity_sold") + item.quantity
+                    )
+                    continue
+
+            # No live hold: sell from what's left
+            if not _take(item.ticket_id, item.quantity, sell=True):
+                raise InsufficientInventory(item.ticket, item.quantity)
+            cards.capacity_changed(item.ticket.event_id, -item.quantity)
+
+        # Holds that no longer match an item go back on sale
+        for hold in holds:
+            release_hold(hold)
+
+
+def release_expired_holds(now=None, ticket=None, batch_size=500):
+    """
+    Release active holds past their expiry, optionally for one tier only.
+    Returns the number released.
+    """
+    now = now or timezone.now()
+
+    expired = TicketHold.objects.filter(status="active", expires_at__lte=now)
+    if ticket is not None:
+        expired = expired.filter(ticket=ticket)
+
+    released = 0
+    while True:
+        batch = list(expired.select_related("ticket").order_by("expires_at")[:batch_size])
+        for hold in batch:
+            released += release_hold(hold)
+
+        if len(batch) < batch_size:
+            break
+
+    if released:
+        logger.info("Released %s expired ticket holds", released)
+    return released
@@ -0,0 +1,317 @@
+"""
+A small database-backed job queue, for work that shouldn't run inside a
+request (image processing, calls to Paystack that can wait, ...).
+
+Jobs are plain functions registered by name:
+
+    @jobs.job("images.refresh", max_attempts=3)
+    def refresh_image(model, pk, field):
+        ...
+
+    jobs.enqueue("images.refresh", model="events.Event", pk=1, field="image")
+    jobs.enqueue("payments.verify", delay=datetime.timedelta(minutes=1), reference=...)
+
+Arguments are stored as JSON in a Job row, written in the caller's
+transaction: a job queued by a request that rolls back never runs.
+``python manage.py run_jobs`` runs due jobs on a thread pool. Claiming is
+a conditional UPDATE (like webhooks.process_pending_events), so several
+workers, threads or processes can share the table.
+
+A worker claims a batch but runs only a few jobs at a time, so a job's
+lock is renewed when it actually starts: STALE_LOCK counts from then, not
+from the claim. One that waited so long that another worker took it over
+is skipped.
+
+A job that raises is retried with exponential backoff; after max_attempts
+it moves to DeadJob. Successful jobs are deleted. Every attempt is counted
+in JobStats (per name, per hour) for throughput reporting.
+
+Registered jobs live in events/tasks.py, imported by EventsConfig.ready().
+"""
+import datetime
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count, F, Max, Q, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import DeadJob, Job, JobStats
+
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETRY_DELAY = datetime.timedelta(seconds=30)    # doubled on every attempt
+MAX_RETRY_DELAY = datetime.timedelta(hours=1)
+STALE_LOCK = datetime.timedelta(minutes=10)     # worker died mid-job
+
+REGISTRY = {}
+
+
+class UnknownJob(LookupError):
+    pass
+
+
+def job(name, max_attempts=MAX_ATTEMPTS, retry_delay=RETRY_DELAY):
+    """
+    Register a function as a job under `name`.
+    """
+    def register(func):
+        REGISTRY[name] = func
+        func.job_name = name
+        func.max_attempts = max_attempts
+        func.retry_delay = retry_delay
+        return func
+    return register
+
+
+def enqueue(name, delay=None, run_at=None, **kwargs):
+    """
+    Queue a registered job. It runs as soon as a worker is free, or not
+    before run_at / now + delay. Returns the Job.
+    """
+    name = getattr(name, "job_name", name)
+    func = REGISTRY.get(name)
+    if func is None:
+        raise UnknownJob(name)
+
+    if run_at is None:
+        run_at = timezone.now() + (delay or datetime.timedelta(0))
+
+    return Job.objects.create(
+        name=name,
+        kwargs=kwargs,
+        max_attempts=func.max_attempts,
+        available_at=run_at,
+    )
+
+
+def worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"[:100]
+
+
+# ---------------------------------------------------------------------------
+# Running
+# ---------------------------------------------------------------------------
+
+def _due(now):
+    return Q(status="pending", available_at__lte=now) | Q(status="processing", locked_at__lt=now - STALE_LOCK)
+
+
+def claim(batch_size=100, now=None, worker=None):
+    """
+    Claim up to batch_size due jobs for this worker. Returns the Jobs.
+    """
+    now = now or timezone.now()
+    worker = worker or worker_id()
+
+    due = list(
+        Job.objects.filter(_due(now))
+        .order_by("available_at")
+        .values_list("pk", flat=True)[:batch_size]
+    )
+
+    claimed = []
+    for job_id in due:
+        if Job.objects.filter(_due(now), pk=job_id).update(
+            status="processing",
+            locked_at=timezone.now(),
+            locked_by=worker,
+            attempts=F("attempts") + 1,
+        ):
+            claimed.append(job_id)
+
+    return list(Job.objects.filter(pk__in=claimed, locked_by=worker).order_by("available_at"))
+
+
+def run(job):
+    """
+    Run one claimed job and record the outcome. Returns True on success.
+    """
+    # Still ours? (attempts changes if it was reclaimed as stale)
+    if not Job.objects.filter(
+        pk=job.pk, status="processing", locked_by=job.locked_by, attempts=job.attempts
+    ).update(locked_at=timezone.now()):
+        logger.info("Job %s #%s was taken over by another worker", job.name, job.pk)
+        return False
+
+    func = REGISTRY.get(job.name)
+    if func is None:
+        _bury(job, f"UnknownJob({job.name!r})")
+        return False
+
+    if job.attempts > job.max_attempts:
+        # Claimed again after its last attempt never reported back
+        _bury(job, job.last_error or "worker stopped while running the job")
+        return False
+
+    started = time.monotonic()
+    try:
+        func(**job.kwargs)
+    except Exception as exc:
+        elapsed = _elapsed_ms(started)
+        logger.exception("Job %s #%s failed (attempt %s)", job.name, job.pk, job.attempts)
+
+        if job.attempts >= job.max_attempts:
+            _bury(job, repr(exc), runtime_ms=elapsed)
+        else:
+            delay = min(func.retry_delay * (2 ** (job.attempts - 1)), MAX_RETRY_DELAY)
+            Job.objects.filter(pk=job.pk).update(
+                status="pending",
+                available_at=timezone.now() + delay,
+                last_error=repr(exc),
+                locked_at=None,
+                locked_by="",
+            )
+            record(job.name, failed=1, runtime_ms=elapsed)
+        return False
+
+    Job.objects.filter(pk=job.pk).delete()
+    record(job.name, succeeded=1, runtime_ms=_elapsed_ms(started))
+    return True
+
+
+def _elapsed_ms(started):
+    return int((time.monotonic() - started) * 1000)
+
+
+def _bury(job, error, runtime_ms=0):
+    with transaction.atomic():
+        DeadJob.objects.create(
+            job_id=job.pk,
+            name=job.name,
+            kwargs=job.kwargs,
+            attempts=job.attempts,
+            last_error=error,
+            created_at=job.created_at,
+        )
+        Job.objects.filter(pk=job.pk).delete()
+    record(job.name, dead=1, runtime_ms=runtime_ms)
+    logger.error("Job %s #%s moved to the dead-letter table: %s", job.name, job.pk, error)
+
+
+def _run_in_thread(job):
+    # Each pool thread has its own database connection; don't leave
+    # broken or expired ones behind
+    close_old_connections()
+    try:
+        return run(job)
+    finally:
+        close_old_connections()
+
+
+def run_pending(batch_size=100, workers=1, now=None):
+    """
+    Claim and run one batch of due jobs, on `workers` threads.
+    Returns the number of jobs run.
+    """
+    claimed = claim(batch_size=batch_size, now=now)
+    if workers <= 1:
+        for claimed_job in claimed:
+            run(claimed_job)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_run_in_thread, claimed))
+    return len(claimed)
+
+
+def requeue(dead_jobs):
+    """
+    Put dead jobs back on the queue with fresh attempts.
+    Returns the number requeued.
+    """
+    count = 0
+    for dead in dead_jobs:
+        with transaction.atomic():
+            Job.objects.create(
+                name=dead.name,
+                kwargs=dead.kwargs,
+                max_attempts=getattr(REGISTRY.get(dead.name), "max_attempts", MAX_ATTEMPTS),
+            )
+            dead.delete()
+        count += 1
+    return count
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+def record(name, runtime_ms=0, **counts):
+    """
+    Add to this hour's JobStats row for a job name.
+    """
+    hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+    changes = {field: F(field) + value for field, value in counts.items()}
+    changes.update(
+        runtime_ms=F("runtime_ms") + runtime_ms,
+        max_runtime_ms=Greatest(F("max_runtime_ms"), runtime_ms),
+    )
+
+    if JobStats.objects.filter(name=name, hour=hour).update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            JobStats.objects.create(
+                name=name, hour=hour, runtime_ms=runtime_ms, max_runtime_ms=runtime_ms, **counts
+            )
+    except IntegrityError:
+        # Another worker created this hour's row in between
+        JobStats.objects.filter(name=name, hour=hour).update(**changes)
+
+
+def metrics(since=None):
+    """
+    Per job name since `since` (default: the last 24 hours): succeeded,
+    failed, dead, jobs per minute, average and max runtime, plus what is
+    waiting in the queue now.
+    """
+    now = timezone.now()
+    since = since or now - datetime.timedelta(hours=24)
+    minutes = max((now - since).total_seconds() / 60, 1)
+
+    report = {}
+    rows = (
+        JobStats.objects
+        .filter(hour__gte=since.replace(minute=0, second=0, microsecond=0))
+        .values("name")
+        .annotate(
+            total_succeeded=Sum("succeeded"),
+            total_failed=Sum("failed"),
+            total_dead=Sum("dead"),
+            total_runtime_ms=Sum("runtime_ms"),
+            slowest_ms=Max("max_runtime_ms"),
+        )
+    )
+    for row in rows:
+        attempts = row["total_succeeded"] + row["total_failed"] + row["total_dead"]
+        report[row["name"]] = {
+            "succeeded": row["total_succeeded"],
+            "failed": row["total_failed"],
+            "dead": row["total_dead"],
+            "per_minute": row["total_succeeded"] / minutes,
+            "avg_ms": row["total_runtime_ms"] / attempts if attempts else 0,
+            "max_ms": row["slowest_ms"],
+            "queued": 0,
+            "due": 0,
+        }
+
+    queued = Job.objects.values("name").annotate(
+        total=Count("pk"),
+        due=Count("pk", filter=Q(available_at__lte=now)),
+    )
+    for row in queued:
+        entry = report.setdefault(row["name"], {
+            "succeeded": 0, "failed": 0, "dead": 0, "per_minute": 0.0, "avg_ms": 0, "max_ms": 0,
+        })
+        entry["queued"] = row["total"]
+        entry["due"] = row["due"]
+
+    return report
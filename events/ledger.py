@@ -0,0 +1,314 @@
+"""
+Organizer ledger: what each organizer has earned and been paid.
+
+Every money movement is a posting of LedgerEntry lines that sum to zero:
+
+    sale of 10,000 with a 5% fee       sales -10,000 / organizer +9,500 / fees +500
+    payout request of 9,500            organizer -9,500 / payouts +9,500
+
+and the outstanding lines negated to undo one (a paid order that is
+reversed, a payout that is rejected), so a reversal always gives back
+exactly what was posted. OrganizerBalance keeps the running totals of
+the organizer lines; it is updated in the transaction that writes the
+posting, so reading a balance never touches orders or payouts.
+
+``python manage.py verify_ledger`` checks all of this against the Order and
+Payout tables.
+"""
+import uuid
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import Event, LedgerEntry, Order, OrganizerBalance, Payout
+
+
+FEE_PERCENT = Decimal(str(getattr(settings, "PLATFORM_FEE_PERCENT", 0)))
+CENT = Decimal("0.01")
+
+
+class InsufficientBalance(Exception):
+    pass
+
+
+def fee_for(amount):
+    return (Decimal(amount) * FEE_PERCENT / 100).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+# ---------------------------------------------------------------------------
+# Balances
+# ---------------------------------------------------------------------------
+
+def get_balance(organizer):
+    """
+    The organizer's OrganizerBalance (an unsaved all-zero one if nothing
+    has been posted yet).
+    """
+    return (
+        OrganizerBalance.objects.filter(organizer=organizer).first()
+        or OrganizerBalance(organizer=organizer)
+    )
+
+
+def _update_balance(organizer_id, **deltas):
+    changes = {name: F(name) + value for name, value in deltas.items()}
+
+    if OrganizerBalance.objects.filter(organizer_id=organizer_id).update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            OrganizerBalance.objects.create(organizer_id=organizer_id, **deltas)
+    except IntegrityError:
+        OrganizerBalance.objects.filter(organizer_id=organizer_id).update(**changes)
+
+
+def _post(organizer_id, kind, lines, **link):
+    """
+    Write one posting. lines is a list of (account, amount) summing to zero;
+    zero lines are left out. link is order=/payout= (or their _id).
+    """
+    assert sum(amount for _, amount in lines) == 0, lines
+
+    posting = uuid.uuid4()
+    LedgerEntry.objects.bulk_create([
+        LedgerEntry(
+            posting=posting,
+            organizer_id=organizer_id,
+            account=account,
+            kind=kind,
+            amount=amount,
+            **link,
+        )
+        for account, amount in lines
+        if amount
+    ])
+
+
+# ---------------------------------------------------------------------------
+# Sales
+# ---------------------------------------------------------------------------
+
+def organizer_of(order):
+    return Event.objects.filter(pk=order.event_id).values_list("organizer_id", flat=True).first()
+
+
+def _outstanding(**link):
+    """
+    Net amount per account of everything posted so far for one order or
+    payout, e.g. {"sales": -10000, "organizer": 9500, "fees": 500}.
+    """
+    return {
+        account: total
+        for account, total in LedgerEntry.objects.filter(**link)
+        .values_list("account")
+        .annotate(Sum("amount"))
+        if total
+    }
+
+
+def _apply(organizer_id, kind, lines, **link):
+    amounts = dict(lines)
+    owed = amounts.get("organizer", 0)
+
+    with transaction.atomic():
+        _post(organizer_id, kind, lines, **link)
+        _update_balance(
+            organizer_id,
+            available=owed,
+            earned=owed if "sales" in amounts else 0,
+            fees=amounts.get("fees", 0),
+            paid_out=amounts.get("payouts", 0),
+        )
+
+
+def post_sale(order):
+    """
+    Credit the organizer for a paid order, minus the platform fee.
+    """
+    organizer_id = organizer_of(order)
+    if organizer_id is None:
+        return
+
+    gross = order.total_amount
+    fee = fee_for(gross)
+    _apply(organizer_id, "sale", [("sales", -gross), ("organizer", gross - fee), ("fees", fee)], order=order)
+
+
+def reverse_sale(order):
+    """
+    Undo what was posted for an order that is no longer paid, at the fee
+    it was charged back then.
+    """
+    outstanding = _outstanding(order_id=order.pk)
+    if not outstanding:
+        return
+
+    organizer_id = (
+        LedgerEntry.objects.filter(order_id=order.pk).values_list("organizer_id", flat=True).first()
+    )
+    lines = [(account, -total) for account, total in outstanding.items()]
+    _apply(organizer_id, "sale_reversal", lines, order_id=order.pk)
+
+
+def order_status_changed(order, old_status, new_status):
+    if (old_status == "paid") == (new_status == "paid"):
+        return
+
+    if new_status == "paid":
+        post_sale(order)
+    else:
+        reverse_sale(order)
+
+
+# ---------------------------------------------------------------------------
+# Payouts
+# ---------------------------------------------------------------------------
+
+def request_payout(organizer, amount=None):
+    """
+    Create a pending payout of `amount` (default: the whole available
+    balance) and debit the balance for it.
+
+    The balance check and the debit are one conditional UPDATE, so two
+    requests racing for the same money can't both succeed.
+    Raises InsufficientBalance if there isn't enough.
+    """
+    with transaction.atomic():
+        if amount is None:
+            amount = get_balance(organizer).available
+
+        if amount <= 0:
+            raise InsufficientBalance()
+
+        debited = OrganizerBalance.objects.filter(
+            organizer=organizer,
+            available__gte=amount,
+        ).update(
+            available=F("available") - amount,
+            paid_out=F("paid_out") + amount,
+        )
+        if not debited:
+            raise InsufficientBalance()
+
+        payout = Payout(organizer=organizer, amount=amount, status="pending")
+        payout._ledger_posted = True   # the signal must not debit it again
+        payout.save()
+
+        _post(organizer.pk, "payout", [("organizer", -amount), ("payouts", amount)], payout=payout)
+
+    return payout
+
+
+def post_payout(payout):
+    """
+    Debit the organizer for a payout created outside request_payout()
+    (e.g. in the admin) or moved back out of "rejected".
+    """
+    _apply(
+        payout.organizer_id,
+        "payout",
+        [("organizer", -payout.amount), ("payouts", payout.amount)],
+        payout=payout,
+    )
+
+
+def reverse_payout(payout):
+    """
+    Credit back a payout that was rejected or deleted.
+    """
+    outstanding = _outstanding(payout_id=payout.pk)
+    if outstanding:
+        lines = [(account, -total) for account, total in outstanding.items()]
+        _apply(payout.organizer_id, "payout_reversal", lines, payout_id=payout.pk)
+
+
+def payout_saved(payout, created):
+    if created:
+        if not getattr(payout, "_ledger_posted", False) and payout.status != "rejected":
+            post_payout(payout)
+    else:
+        was_rejected = getattr(payout, "_loaded_status", None) == "rejected"
+        is_rejected = payout.status == "rejected"
+
+        if is_rejected and not was_rejected:
+            reverse_payout(payout)
+        elif was_rejected and not is_rejected:
+            post_payout(payout)
+
+    payout._loaded_status = payout.status
+
+
+def payout_deleted(payout):
+    reverse_payout(payout)
+
+
+# ---------------------------------------------------------------------------
+# Verification
+# ---------------------------------------------------------------------------
+
+def _by_organizer(queryset, field="amount"):
+    return dict(queryset.values_list("organizer_id").annotate(Sum(field)))
+
+
+def verify():
+    """
+    Compare the ledger with the tables it describes.
+    Returns a list of human readable problems (empty = ledger is correct).
+    """
+    problems = []
+
+    unbalanced = (
+        LedgerEntry.objects.values("posting")
+        .annotate(total=Sum("amount"))
+        .exclude(total=0)
+        .values_list("posting", flat=True)
+    )
+    for posting in unbalanced[:20]:
+        problems.append(f"posting {posting} does not sum to zero")
+
+    entries = LedgerEntry.objects.all()
+    owed = _by_organizer(entries.filter(account="organizer"))
+    sold = _by_organizer(entries.filter(account="sales"))
+    paid_out = _by_organizer(entries.filter(account="payouts"))
+
+    expected_sales = dict(
+        Order.objects.filter(status="paid")
+        .values_list("event__organizer_id")
+        .annotate(Sum("total_amount"))
+    )
+    expected_payouts = _by_organizer(Payout.objects.exclude(status="rejected"))
+    balances = {
+        row.organizer_id: row for row in OrganizerBalance.objects.all()
+    }
+
+    organizers = set(owed) | set(sold) | set(paid_out) | set(expected_sales) | set(expected_payouts) | set(balances)
+    zero = Decimal("0")
+
+    for organizer_id in sorted(organizers):
+        ledger_sales = -sold.get(organizer_id, zero)
+        order_sales = expected_sales.get(organizer_id) or zero
+        if ledger_sales != order_sales:
+            problems.append(
+                f"organizer {organizer_id}: ledger sales {ledger_sales}, paid orders {order_sales}"
+            )
+
+        ledger_payouts = paid_out.get(organizer_id, zero)
+        payout_requests = expected_payouts.get(organizer_id) or zero
+        if ledger_payouts != payout_requests:
+            problems.append(
+                f"organizer {organizer_id}: ledger payouts {ledger_payouts}, "
+                f"payout requests {payout_requests}"
+            )
+
+        balance = balances.get(organizer_id)
+        available = balance.available if balance else zero
+        if available != owed.get(organizer_id, zero):
+            problems.append(
+                f"organizer {organizer_id}: balance row says {available}, "
+                f"ledger says {owed.get(organizer_id, zero)}"
+            )
+
+    return problems
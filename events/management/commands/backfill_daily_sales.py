@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events import analytics
+
+
+class Command(BaseCommand):
+    help = "Rebuild the DailySales revenue rollups from the full order history."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Number of order lines read per query.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(lines_read):
+            self.stdout.write(f"  {lines_read} order lines read...")
+
+        lines_read, buckets = analytics.backfill(
+            chunk_size=options["chunk_size"],
+            progress=progress if options["verbosity"] > 1 else None,
+        )
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {buckets} daily buckets from {lines_read} order lines in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,85 @@
+import time
+import tracemalloc
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from events import exports
+from events.models import Attendee, Event, Organizer, Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure attendee export throughput (rows/second) and peak memory on "
+        "a throwaway event with N attendees. Nothing is left in the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000, help="Attendees to generate.")
+        parser.add_argument("--format", choices=sorted(exports.FORMATS), default="csv")
+        parser.add_argument("--chunk-size", type=int, default=exports.CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+
+        with transaction.atomic():
+            event = self._seed(rows)
+
+            # Pass 1: speed (tracemalloc slows Python down, so not here)
+            started = time.perf_counter()
+            size = self._drain(event, options)
+            elapsed = time.perf_counter() - started
+
+            # Pass 2: peak memory while streaming
+            tracemalloc.start()
+            self._drain(event, options)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{rows} rows ({size / 1_000_000:.1f} MB {options['format']}) in {elapsed:.2f}s: "
+            f"{rows / elapsed:,.0f} rows/s, peak Python memory {peak / 1_000_000:.1f} MB"
+        ))
+
+    def _drain(self, event, options):
+        size = 0
+        for block in exports.stream(event, options["format"], chunk_size=options["chunk_size"]):
+            size += len(block)
+        return size
+
+    def _seed(self, rows):
+        self.stdout.write(f"Generating {rows} attendees...")
+
+        user = User.objects.create_user(username=f"bench-{uuid.uuid4().hex[:8]}")
+        organizer = Organizer.objects.create(user=user, organization_name="Benchmark")
+        event = Event.objects.create(
+            organizer=organizer,
+            title="Export benchmark",
+            date=timezone.now().date(),
+            state="lagos",
+        )
+        ticket = Ticket.objects.create(event=event, name="Regular", price=5000, quantity_available=0)
+
+        batch = []
+        for i in range(rows):
+            batch.append(Attendee(
+                event=event,
+                user=user,
+                ticket=ticket,
+                full_name=f"Attendee {i}",
+                email=f"attendee{i}@example.com",
+                tickets_qty=1,
+                payment_status="paid",
+                booking_ref=f"BENCH-{i}",
+            ))
+            if len(batch) == 5000:
+                Attendee.objects.bulk_create(batch)
+                batch = []
+        Attendee.objects.bulk_create(batch)
+
+        return event
@@ -0,0 +1,139 @@
+import json
+import subprocess
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from events import benchmarks
+from events.models import Event, Order
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the browse → book → pay flows and organizer pages with a stub "
+        "Paystack: p50/p95/p99 latency, requests/s and queries per request per "
+        "endpoint, saved as JSON and optionally compared with a baseline. "
+        "Server mode keeps the orders it places: use a seeded copy of the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--mode",
+            choices=["client", "server"],
+            default="client",
+            help="client: Django test client, rolled back. server: pre-forked WSGI server over HTTP.",
+        )
+        parser.add_argument("--iterations", type=int, default=20, help="Flows per virtual user.")
+        parser.add_argument("--warmup", type=int, default=2, help="Unrecorded flows per virtual user first.")
+        parser.add_argument("--workers", type=int, default=4, help="Server worker processes (server mode).")
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=None,
+            help="Virtual users requesting at once (server mode; default: --workers).",
+        )
+        parser.add_argument("--output", default="benchmark-results.json", help="Where to write the results.")
+        parser.add_argument("--baseline", help="Earlier results file to compare against.")
+        parser.add_argument(
+            "--tolerance",
+            type=float,
+            default=20,
+            help="Percent change in p95 or requests/s reported as a regression.",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error when the baseline comparison finds regressions.",
+        )
+
+    def handle(self, *args, **options):
+        mode = options["mode"]
+        iterations, warmup = options["iterations"], options["warmup"]
+        workers = options["workers"] if mode == "server" else 1
+        concurrency = (options["concurrency"] or workers) if mode == "server" else 1
+
+        baseline = None
+        if options["baseline"]:
+            with open(options["baseline"]) as f:
+                baseline = json.load(f)
+
+        self.stdout.write(
+            f"Running {warmup}+{iterations} flows × {concurrency} users in {mode} mode"
+            + (f" ({workers} workers)" if mode == "server" else "") + "..."
+        )
+        started = time.monotonic()
+
+        if mode == "client":
+            with transaction.atomic():
+                plan = benchmarks.Plan(buyers=1)
+                data = self._data_size()
+                results = benchmarks.run_client(plan, iterations, warmup=warmup)
+                transaction.set_rollback(True)
+            # Pages and stats cached from the rolled-back rows would outlive
+            # them in the cache the site's workers share
+            cache.clear()
+        else:
+            plan = benchmarks.Plan(buyers=concurrency)
+            data = self._data_size()
+            results = benchmarks.run_server(plan, iterations, workers, concurrency, warmup=warmup)
+
+        elapsed = time.monotonic() - started
+        endpoints = results.summary(concurrency=concurrency)
+        report = {
+            "mode": mode,
+            "workers": workers,
+            "concurrency": concurrency,
+            "iterations": iterations,
+            "finished_at": timezone.now().isoformat(),
+            "commit": self._commit(),
+            "data": data,
+            "wall_seconds": round(elapsed, 2),
+            "requests": sum(endpoint["requests"] for endpoint in endpoints.values()),
+            "endpoints": endpoints,
+        }
+
+        self._print(endpoints)
+        with open(options["output"], "w") as f:
+            json.dump(report, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['requests']} requests in {elapsed:.1f}s; results written to {options['output']}."
+        ))
+
+        if baseline is not None:
+            problems = benchmarks.compare(report, baseline, tolerance=options["tolerance"] / 100)
+            for problem in problems:
+                self.stdout.write(self.style.WARNING(f"  {problem}"))
+            if not problems:
+                self.stdout.write(self.style.SUCCESS(f"No regressions against {options['baseline']}."))
+            elif options["fail_on_regression"]:
+                raise CommandError(f"{len(problems)} regression(s) against {options['baseline']}.")
+
+    def _data_size(self):
+        return {
+            "events": Event.objects.count(),
+            "orders": Order.objects.count(),
+            "users": User.objects.count(),
+        }
+
+    def _commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    def _print(self, endpoints):
+        self.stdout.write(
+            f"{'endpoint':<28} {'req':>5} {'err':>4} {'p50':>8} {'p95':>8} {'p99':>8} {'rps':>8} {'queries':>8}"
+        )
+        for name, row in endpoints.items():
+            queries = "-" if row["queries"] is None else f"{row['queries']:.1f}"
+            self.stdout.write(
+                f"{name:<28} {row['requests']:>5} {row['errors']:>4} {row['p50_ms']:>8.1f} "
+                f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f} {row['rps']:>8.1f} {queries:>8}"
+            )
@@ -0,0 +1,105 @@
+import datetime
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from events import gate_manifest
+from events.models import Attendee, Event, Organizer, Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure gate manifest size and build time on a throwaway event with "
+        "N attendees. Nothing is left in the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50_000, help="Attendees to generate.")
+        parser.add_argument("--tiers", type=int, default=3)
+        parser.add_argument("--repeat", type=int, default=5, help="Builds to time (best is reported).")
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+
+        with transaction.atomic():
+            event = self._seed(rows, options["tiers"])
+
+            timings = []
+            for _ in range(options["repeat"]):
+                started = time.perf_counter()
+                data, version = gate_manifest.build(event)
+                timings.append(time.perf_counter() - started)
+
+            # A delta after 1% of tickets change
+            changed = list(
+                Attendee.objects.filter(event=event).values_list("pk", flat=True)[: max(rows // 100, 1)]
+            )
+            Attendee.objects.filter(pk__in=changed).update(
+                payment_status="pending", changed_at=timezone.now()
+            )
+            started = time.perf_counter()
+            delta, _ = gate_manifest.build(event, since=version)
+            delta_time = time.perf_counter() - started
+
+            key = gate_manifest.gate_key(event.pk)
+            started = time.perf_counter()
+            manifest = gate_manifest.read(data, key)
+            assert gate_manifest.lookup(manifest, key, "BENCH-0") is not None
+            read_time = time.perf_counter() - started
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{rows} attendees: full manifest {len(data) / 1000:,.1f} KB "
+            f"({len(data) / rows:.1f} bytes/attendee), built in {min(timings) * 1000:.0f} ms "
+            f"(best of {len(timings)}); scanner load {read_time * 1000:.0f} ms"
+        ))
+        self.stdout.write(
+            f"Delta after {len(changed)} revoked tickets: {len(delta) / 1000:,.1f} KB in {delta_time * 1000:.0f} ms"
+        )
+
+    def _seed(self, rows, tiers):
+        self.stdout.write(f"Generating {rows} attendees...")
+
+        user = User.objects.create_user(username=f"bench-{uuid.uuid4().hex[:8]}")
+        organizer = Organizer.objects.create(user=user, organization_name="Benchmark")
+        event = Event.objects.create(
+            organizer=organizer,
+            title="Gate manifest benchmark",
+            date=timezone.now().date(),
+            state="lagos",
+        )
+        ticket_tiers = [
+            Ticket.objects.create(event=event, name=f"Tier {i}", price=5000, quantity_available=0)
+            for i in range(max(tiers, 1))
+        ]
+
+        # Tickets sell in the run-up to the event: one batch per hour here
+        sold_at = timezone.now() - datetime.timedelta(hours=rows // 5000 + 1)
+
+        batch = []
+        for i in range(rows):
+            batch.append(Attendee(
+                event=event,
+                user=user,
+                ticket=ticket_tiers[i % len(ticket_tiers)],
+                full_name=f"Attendee {i}",
+                email=f"attendee{i}@example.com",
+                tickets_qty=1,
+                payment_status="paid",
+                booking_ref=f"BENCH-{i}",
+            ))
+            if len(batch) == 5000 or i == rows - 1:
+                self._create(batch, sold_at)
+                sold_at += datetime.timedelta(hours=1)
+                batch = []
+
+        return event
+
+    def _create(self, batch, sold_at):
+        Attendee.objects.bulk_create(batch)
+        Attendee.objects.filter(pk__in=[attendee.pk for attendee in batch]).update(changed_at=sold_at)
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events import gate_manifest
+from events.models import Event
+
+
+class Command(BaseCommand):
+    help = (
+        "Write an event's offline gate manifest to a file, for loading onto "
+        "scanners by hand. --since <version> writes a delta."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("event_id", type=int)
+        parser.add_argument("--since", type=int, default=0, help="Manifest version to build a delta from.")
+        parser.add_argument("--output", help="File to write (default gate-manifest-<event>-<version>.bin).")
+
+    def handle(self, *args, **options):
+        try:
+            event = Event.objects.get(pk=options["event_id"])
+        except Event.DoesNotExist:
+            raise CommandError(f"Event {options['event_id']} does not exist.")
+
+        data, version = gate_manifest.build(event, since=options["since"])
+        path = options["output"] or f"gate-manifest-{event.pk}-{version}.bin"
+        with open(path, "wb") as f:
+            f.write(data)
+
+        manifest = gate_manifest.read(data, gate_manifest.gate_key(event.pk))
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {path}: version {version}, {len(manifest['hashes'])} admitted, "
+            f"{len(manifest['removed'])} removed, {len(data):,} bytes"
+        ))
+        self.stdout.write(f"Gate key: {gate_manifest.gate_key(event.pk).hex()}")
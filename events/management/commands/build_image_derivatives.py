@@ -0,0 +1,48 @@
+import time
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from events import images
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the resized WebP/JPEG copies of event images that were "
+        "uploaded before derivatives existed (or whose image changed). "
+        "Files that already exist are not rewritten."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Rebuild every image, not only those without current derivatives.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        built = skipped = 0
+
+        for model_label, field_name in images.FIELDS:
+            model = apps.get_model(model_label)
+            rows = (
+                model.objects
+                .exclude(**{f"{field_name}__isnull": True})
+                .exclude(**{field_name: ""})
+                .only("pk", field_name, images.derivatives_field(field_name))
+                .iterator(chunk_size=200)
+            )
+            for instance in rows:
+                if images.refresh(instance, field_name, force=options["force"]):
+                    built += 1
+                    if options["verbosity"] > 1:
+                        self.stdout.write(f"  {getattr(instance, field_name).name}")
+                else:
+                    skipped += 1
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Built derivatives for {built} images ({skipped} already current or unreadable) "
+            f"in {elapsed:.2f}s."
+        ))
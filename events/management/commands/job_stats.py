@@ -0,0 +1,32 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from events import jobs
+
+
+class Command(BaseCommand):
+    help = "Show throughput, failures, runtimes and queue depth per background job type."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=24, help="How far back to report.")
+
+    def handle(self, *args, **options):
+        since = timezone.now() - datetime.timedelta(hours=options["hours"])
+        report = jobs.metrics(since=since)
+
+        if not report:
+            self.stdout.write("No jobs have run or are queued.")
+            return
+
+        self.stdout.write(
+            f"{'job':<24}{'ok':>8}{'retried':>9}{'dead':>6}{'per min':>9}"
+            f"{'avg ms':>9}{'max ms':>9}{'queued':>8}{'due':>6}"
+        )
+        for name, row in sorted(report.items()):
+            self.stdout.write(
+                f"{name:<24}{row['succeeded']:>8}{row['failed']:>9}{row['dead']:>6}"
+                f"{row['per_minute']:>9.2f}{row['avg_ms']:>9.0f}{row['max_ms']:>9}"
+                f"{row['queued']:>8}{row['due']:>6}"
+            )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from events import page_cache
+
+
+class Command(BaseCommand):
+    help = "Show anonymous page cache hits, misses and bypasses since the counters were last reset."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reset", action="store_true", help="Reset the counters after showing them.")
+
+    def handle(self, *args, **options):
+        counts = page_cache.stats()
+        cacheable = counts["hit"] + counts["miss"]
+
+        self.stdout.write(f"{'hit':>8}{'miss':>8}{'bypass':>8}{'hit rate':>10}")
+        rate = f"{counts['hit'] / cacheable:.0%}" if cacheable else "-"
+        self.stdout.write(f"{counts['hit']:>8}{counts['miss']:>8}{counts['bypass']:>8}{rate:>10}")
+
+        if options["reset"]:
+            page_cache.reset_stats()
+            self.stdout.write("Counters reset.")
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from events import webhooks
+
+
+class Command(BaseCommand):
+    help = "Fulfil orders from stored Paystack webhook events. Runs until stopped unless --once is given."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Process what is due, then exit.")
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when there is nothing to do.",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+
+        while True:
+            processed = webhooks.process_pending_events(batch_size=options["batch_size"])
+            total += processed
+
+            if processed:
+                self.stdout.write(f"Processed {processed} payment events.")
+                continue
+
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Done, {total} payment events processed."))
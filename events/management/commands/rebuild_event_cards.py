@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from events import cards
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the sales rollups from scratch: EventCard (prices, capacity, "
+        "sales, revenue) for every event and TicketSales for every ticket tier."
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        with transaction.atomic():
+            total = cards.rebuild_all_cards()
+            tiers = cards.rebuild_all_ticket_sales()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {total} event cards and {tiers} ticket tiers in {elapsed:.2f}s."
+        ))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from events import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index for all events."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2000,
+            help="Number of events written per INSERT batch.",
+        )
+
+    def handle(self, *args, **options):
+        if not search.search_available():
+            raise CommandError(
+                "Full-text search is not available on this database "
+                "(needs SQLite with FTS5 and migration 0013 applied)."
+            )
+
+        started = time.monotonic()
+
+        with transaction.atomic():
+            total = search.rebuild_index(batch_size=options["batch_size"])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {total} events in {elapsed:.2f}s."
+        ))
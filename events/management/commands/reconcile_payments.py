@@ -0,0 +1,70 @@
+import datetime
+
+from django.core.management.base import BaseCommand
+
+from events import reconciliation
+from events.paystack import PaystackClient
+
+
+class Command(BaseCommand):
+    help = "Verify stale pending orders against Paystack and mark them paid or failed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            default=30,
+            help="Only orders whose last checkout began at least this many minutes ago (default 30).",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=8,
+            help="Paystack requests in flight at once.",
+        )
+        parser.add_argument(
+            "--base-url",
+            help="Paystack API base URL (e.g. a local stand-in). Defaults to PAYSTACK_BASE_URL.",
+        )
+        parser.add_argument("--dry-run", action="store_true", help="Report only, change nothing.")
+
+    def handle(self, *args, **options):
+        client = PaystackClient(
+            base_url=options["base_url"],
+            pool_size=options["concurrency"],
+        )
+
+        def progress(report):
+            self.stdout.write(
+                f"  {report.checked} checked, {report.per_second:.0f} orders/s"
+            )
+
+        report = reconciliation.reconcile(
+            older_than=datetime.timedelta(minutes=options["older_than"]),
+            batch_size=options["batch_size"],
+            concurrency=options["concurrency"],
+            client=client,
+            dry_run=options["dry_run"],
+            progress=progress,
+        )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {report.checked} orders in {report.seconds:.1f}s "
+            f"({report.per_second:.0f} orders/s)"
+            + (" [dry run]" if options["dry_run"] else "")
+        ))
+        for label, count in [
+            ("paid", report.paid),
+            ("failed", report.failed),
+            ("still in progress", report.unchanged),
+            ("already resolved", report.already_resolved),
+            ("Paystack unreachable", report.unreachable),
+            ("errors (left pending)", report.errors),
+        ]:
+            self.stdout.write(f"  {label + ':':<22}{count}")
+
+        if report.problems:
+            self.stdout.write(self.style.WARNING("Discrepancies:"))
+            for reference, message in report.problems:
+                self.stdout.write(f"  {reference}: {message}")
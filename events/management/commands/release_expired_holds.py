@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from events import inventory
+
+
+class Command(BaseCommand):
+    help = "Put tickets from expired booking holds back on sale. Safe to run from cron."
+
+    def handle(self, *args, **options):
+        released = inventory.release_expired_holds()
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired holds."))
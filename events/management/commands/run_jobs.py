@@ -0,0 +1,51 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from events import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background jobs on a thread pool. Runs until stopped "
+        "(SIGINT/SIGTERM finish the current batch first) unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Run what is due, then exit.")
+        parser.add_argument("--workers", type=int, default=4, help="Threads running jobs.")
+        parser.add_argument("--batch-size", type=int, default=50, help="Jobs claimed at a time.")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when there is nothing to do.",
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, self._stop)
+
+        total = 0
+        started = time.monotonic()
+
+        while not self.stopping:
+            ran = jobs.run_pending(batch_size=options["batch_size"], workers=options["workers"])
+            total += ran
+
+            if ran:
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"Ran {ran} jobs.")
+                continue
+
+            if options["once"]:
+                break
+            time.sleep(options["interval"])
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Done, {total} jobs run in {elapsed:.1f}s."))
+
+    def _stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events import ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Check the organizer ledger against Orders and Payouts: every posting "
+        "balances, ledger sales match paid orders, ledger payouts match payout "
+        "requests, and every balance row matches its ledger lines."
+    )
+
+    def handle(self, *args, **options):
+        problems = ledger.verify()
+
+        if problems:
+            for problem in problems:
+                self.stdout.write(f"  {problem}")
+            raise CommandError(f"Ledger does not match: {len(problems)} problem(s).")
+
+        self.stdout.write(self.style.SUCCESS("Ledger matches orders and payouts."))
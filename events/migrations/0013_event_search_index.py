@@ -0,0 +1,54 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_search_index(apps, schema_editor):
+    from events.search import FTS_TABLE, create_index
+
+    if not create_index(schema_editor):
+        return
+
+    # Index the events that already exist
+    schema_editor.execute(
+        f"INSERT INTO {FTS_TABLE}"
+        "(rowid, title, description, venue, city, category) "
+        "SELECT e.id, e.title, e.description, e.venue, e.city, COALESCE(c.name, '') "
+        "FROM events_event e LEFT JOIN events_category c ON c.id = e.category_id"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    from events.search import FTS_TABLE
+
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0012_alter_contactmessage_subject'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventSearchIndex',
+            fields=[
+                ('event', models.OneToOneField(db_column='rowid', db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_index', serialize=False, to='events.event')),
+                ('title', models.TextField()),
+                ('description', models.TextField()),
+                ('venue', models.TextField()),
+                ('city', models.TextField()),
+                ('category', models.TextField()),
+                ('document', models.TextField(db_column='events_event_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'events_event_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
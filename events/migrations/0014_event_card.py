@@ -0,0 +1,68 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+
+
+def build_cards(apps, schema_editor):
+    Event = apps.get_model("events", "Event")
+    EventCard = apps.get_model("events", "EventCard")
+    Ticket = apps.get_model("events", "Ticket")
+    OrderItem = apps.get_model("events", "OrderItem")
+
+    capacity = dict(
+        Ticket.objects.values_list("event_id").annotate(Sum("quantity_available"))
+    )
+    sold = {
+        row["order__event_id"]: row
+        for row in OrderItem.objects.filter(order__status="paid")
+        .values("order__event_id")
+        .annotate(total_sold=Sum("quantity"), paid_orders=Count("order", distinct=True))
+    }
+
+    events = Event.objects.select_related("category").annotate(
+        tier_count=Count("tickets", distinct=True),
+        min_ticket_price=Min("tickets__price"),
+        max_ticket_price=Max("tickets__price"),
+    )
+
+    cards = []
+    for event in events:
+        paid = sold.get(event.pk, {})
+        cards.append(EventCard(
+            event_id=event.pk,
+            category_name=event.category.name if event.category_id else "",
+            has_tickets=event.tier_count > 0,
+            min_price=event.min_ticket_price,
+            max_price=event.max_ticket_price,
+            total_capacity=capacity.get(event.pk) or 0,
+            total_sold=paid.get("total_sold") or 0,
+            paid_orders=paid.get("paid_orders") or 0,
+        ))
+    EventCard.objects.bulk_create(cards, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_event_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventCard',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='events.event')),
+                ('category_name', models.CharField(blank=True, max_length=100)),
+                ('has_tickets', models.BooleanField(default=False)),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('total_capacity', models.PositiveIntegerField(default=0)),
+                ('total_sold', models.PositiveIntegerField(default=0)),
+                ('paid_orders', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(build_cards, migrations.RunPython.noop),
+    ]
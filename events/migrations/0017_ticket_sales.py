@@ -0,0 +1,73 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+
+
+def build_sales(apps, schema_editor):
+    EventCard = apps.get_model("events", "EventCard")
+    Order = apps.get_model("events", "Order")
+    OrderItem = apps.get_model("events", "OrderItem")
+    Ticket = apps.get_model("events", "Ticket")
+    TicketSales = apps.get_model("events", "TicketSales")
+
+    revenue = (
+        Order.objects.filter(status="paid")
+        .values_list("event_id")
+        .annotate(Sum("total_amount"))
+    )
+    for event_id, total in revenue:
+        EventCard.objects.filter(event_id=event_id).update(revenue=total)
+
+    line_total = ExpressionWrapper(
+        F("quantity") * F("ticket__price"),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )
+    paid = {
+        row["ticket_id"]: row
+        for row in OrderItem.objects.filter(order__status="paid")
+        .values("ticket_id")
+        .annotate(
+            sold=Sum("quantity"),
+            paid_orders=Count("order", distinct=True),
+            revenue=Sum(line_total),
+        )
+    }
+
+    rows = []
+    for ticket_id in Ticket.objects.values_list("pk", flat=True):
+        stats = paid.get(ticket_id, {})
+        rows.append(TicketSales(
+            ticket_id=ticket_id,
+            sold=stats.get("sold") or 0,
+            paid_orders=stats.get("paid_orders") or 0,
+            revenue=stats.get("revenue") or 0,
+        ))
+    TicketSales.objects.bulk_create(rows, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0016_payment_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketSales',
+            fields=[
+                ('ticket', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='sales', serialize=False, to='events.ticket')),
+                ('sold', models.PositiveIntegerField(default=0)),
+                ('paid_orders', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='eventcard',
+            name='revenue',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=14),
+        ),
+        migrations.RunPython(build_sales, migrations.RunPython.noop),
+    ]
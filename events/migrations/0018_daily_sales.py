@@ -0,0 +1,32 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0017_ticket_sales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySales',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('orders_placed', models.IntegerField(default=0)),
+                ('paid_orders', models.IntegerField(default=0)),
+                ('tickets_sold', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='events.event')),
+                ('organizer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='events.organizer')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_sales', to='events.ticket')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organizer', 'day'], name='events_dail_organiz_65ed0e_idx'), models.Index(fields=['event', 'day'], name='events_dail_event_i_472851_idx'), models.Index(fields=['day'], name='events_dail_day_ab1c51_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'ticket'), name='daily_sales_day_ticket')],
+            },
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:29
+
+import uuid
+from collections import defaultdict
+from decimal import ROUND_HALF_UP, Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def open_ledger(apps, schema_editor):
+    """
+    Post every paid order and every non-rejected payout so far.
+    """
+    LedgerEntry = apps.get_model("events", "LedgerEntry")
+    Order = apps.get_model("events", "Order")
+    OrganizerBalance = apps.get_model("events", "OrganizerBalance")
+    Payout = apps.get_model("events", "Payout")
+
+    fee_percent = Decimal(str(getattr(settings, "PLATFORM_FEE_PERCENT", 0)))
+    totals = defaultdict(lambda: {"available": 0, "earned": 0, "fees": 0, "paid_out": 0})
+    entries = []
+
+    def post(organizer_id, kind, lines, **links):
+        posting = uuid.uuid4()
+        for account, amount in lines:
+            if amount:
+                entries.append(LedgerEntry(
+                    posting=posting, organizer_id=organizer_id, account=account,
+                    kind=kind, amount=amount, **links
+                ))
+
+    paid = Order.objects.filter(status="paid").values_list("pk", "event__organizer_id", "total_amount")
+    for order_id, organizer_id, gross in paid.iterator(chunk_size=2000):
+        fee = (gross * fee_percent / 100).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        post(organizer_id, "sale", [("sales", -gross), ("organizer", gross - fee), ("fees", fee)], order_id=order_id)
+        totals[organizer_id]["available"] += gross - fee
+        totals[organizer_id]["earned"] += gross - fee
+        totals[organizer_id]["fees"] += fee
+
+    payouts = Payout.objects.exclude(status="rejected").values_list("pk", "organizer_id", "amount")
+    for payout_id, organizer_id, amount in payouts.iterator(chunk_size=2000):
+        post(organizer_id, "payout", [("organizer", -amount), ("payouts", amount)], payout_id=payout_id)
+        totals[organizer_id]["available"] -= amount
+        totals[organizer_id]["paid_out"] += amount
+
+    LedgerEntry.objects.bulk_create(entries, batch_size=2000)
+    OrganizerBalance.objects.bulk_create([
+        OrganizerBalance(organizer_id=organizer_id, **row) for organizer_id, row in totals.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0018_daily_sales'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrganizerBalance',
+            fields=[
+                ('organizer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='balance', serialize=False, to='events.organizer')),
+                ('available', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('earned', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('fees', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('paid_out', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posting', models.UUIDField(db_index=True)),
+                ('account', models.CharField(choices=[('organizer', 'Organizer balance'), ('sales', 'Ticket sales'), ('fees', 'Platform fees'), ('payouts', 'Payouts')], max_length=20)),
+                ('kind', models.CharField(choices=[('sale', 'Sale'), ('sale_reversal', 'Sale reversal'), ('payout', 'Payout request'), ('payout_reversal', 'Payout reversal')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('order', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='events.order')),
+                ('organizer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='events.organizer')),
+                ('payout', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='events.payout')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['organizer', 'account'], name='events_ledg_organiz_fff772_idx')],
+            },
+        ),
+        migrations.RunPython(open_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def link_tickets(apps, schema_editor):
+    """
+    Attendees created from an order share its reference as booking_ref;
+    take the ticket from that order's line.
+    """
+    Attendee = apps.get_model("events", "Attendee")
+    OrderItem = apps.get_model("events", "OrderItem")
+
+    Attendee.objects.filter(booking_ref__isnull=False).update(
+        ticket=Subquery(
+            OrderItem.objects.filter(order__reference=OuterRef("booking_ref"))
+            .order_by("pk")
+            .values("ticket_id")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0019_organizer_ledger'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendee',
+            name='ticket',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='attendees', to='events.ticket'),
+        ),
+        migrations.RunPython(link_tickets, migrations.RunPython.noop),
+    ]
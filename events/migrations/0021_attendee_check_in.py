@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0020_attendee_ticket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendee',
+            name='check_in_gate',
+            field=models.CharField(blank=True, max_length=50),
+        ),
+        migrations.AddField(
+            model_name='attendee',
+            name='checked_in_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
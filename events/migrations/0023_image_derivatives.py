@@ -0,0 +1,23 @@
+# Generated by Django 6.0.2 on 2026-10-18 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0022_attendee_changed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='image_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='profile_pic_derivatives',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
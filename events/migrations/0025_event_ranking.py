@@ -0,0 +1,75 @@
+# Generated by Django 6.0.2 on 2026-10-18 08:19
+
+import datetime
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def build_rankings(apps, schema_editor):
+    # Same scoring as events.rankings.rebuild_all(), as of this migration
+    Event = apps.get_model("events", "Event")
+    EventRanking = apps.get_model("events", "EventRanking")
+    OrderItem = apps.get_model("events", "OrderItem")
+    SavedEvent = apps.get_model("events", "SavedEvent")
+
+    epoch = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+    half_life = getattr(settings, "RANKING_HALF_LIFE_HOURS", 72)
+    weights = getattr(settings, "RANKING_WEIGHTS", {"ticket": 5.0, "save": 2.0, "view": 0.1})
+
+    def weight(kind, at):
+        return weights[kind] * 2 ** ((at - epoch).total_seconds() / 3600 / half_life)
+
+    scores = defaultdict(float)
+    sales = (
+        OrderItem.objects.filter(order__status="paid")
+        .values_list("order__event_id", "order__created_at")
+        .annotate(tickets=Sum("quantity"))
+    )
+    for event_id, created_at, tickets in sales.iterator(chunk_size=2000):
+        scores[event_id] += tickets * weight("ticket", created_at)
+    for event_id, created_at in SavedEvent.objects.values_list("event_id", "created_at").iterator(chunk_size=2000):
+        scores[event_id] += weight("save", created_at)
+
+    rows = [
+        EventRanking(
+            event_id=event.pk,
+            category_id=event.category_id,
+            state=event.state,
+            date=event.date,
+            status=event.status,
+            score=scores[event.pk],
+        )
+        for event in Event.objects.iterator(chunk_size=2000)
+    ]
+    EventRanking.objects.bulk_create(rows, batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0024_job_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventRanking',
+            fields=[
+                ('event', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ranking', serialize=False, to='events.event')),
+                ('state', models.CharField(blank=True, max_length=20)),
+                ('date', models.DateField()),
+                ('status', models.CharField(max_length=10)),
+                ('score', models.FloatField(default=0)),
+                ('view_score', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='events.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', '-score'], name='ranking_score'), models.Index(fields=['category', 'status', '-score'], name='ranking_category_score'), models.Index(fields=['state', 'status', '-score'], name='ranking_state_score')],
+            },
+        ),
+        migrations.RunPython(build_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.2 on 2026-10-18 08:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0025_event_ranking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('impressions', models.PositiveIntegerField(default=0)),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='events.event')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['event', 'day'], name='events_even_event_i_4300c5_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'event'), name='event_views_day_event')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 08:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0026_event_views'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendee',
+            name='booking_ref',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
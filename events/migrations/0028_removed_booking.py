@@ -0,0 +1,26 @@
+# Generated by Django 6.0.2 on 2026-10-18 08:59
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0027_attendee_booking_ref_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RemovedBooking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_id', models.PositiveIntegerField()),
+                ('booking_ref', models.CharField(max_length=100)),
+                ('removed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['event_id', 'removed_at'], name='events_remo_event_i_8e9761_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.2 on 2026-10-18 09:01
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0028_removed_booking'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='profile',
+            name='profile_pic_derivatives',
+        ),
+    ]
@@ -1,5 +1,6 @@
 import datetime
 from django.db import models
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 
@@ -162,6 +163,9 @@ class Event(models.Model):
         null=True
     )
 
+    # Resized copies of image, kept up to date by images.refresh()
+    image_derivatives = models.JSONField(default=dict, blank=True, editable=False)
+
     STATUS_CHOICES = [
         ("active", "Active"),
         ("cancelled", "Cancelled"),
@@ -193,6 +197,39 @@ class Event(models.Model):
         ordering = ["-created_at"]
 
 
+class EventCard(models.Model):
+    """
+    Denormalized numbers for one event, used to render event cards
+    (home page, events list) without hitting Ticket/Order per card.
+    Kept up to date by events.cards from model signals.
+    """
+
+    event = models.OneToOneField(
+        Event,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="card"
+    )
+
+    category_name = models.CharField(max_length=100, blank=True)
+
+    # From the event's ticket tiers
+    has_tickets = models.BooleanField(default=False)
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    total_capacity = models.PositiveIntegerField(default=0)  # sum of quantity_available
+
+    # From paid orders
+    total_sold = models.PositiveIntegerField(default=0)
+    paid_orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Card for event #{self.event_id}"
+
+
 
 
 class Ticket(models.Model):
@@ -215,6 +252,129 @@ class Ticket(models.Model):
         return f"{self.name} - {self.event.title}"
 
 
+class TicketSales(models.Model):
+    """
+    Paid sales of one ticket tier (the per-tier half of EventCard).
+    Kept up to date by events.cards when orders move into or out of "paid".
+    """
+
+    ticket = models.OneToOneField(
+        Ticket,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="sales"
+    )
+
+    sold = models.PositiveIntegerField(default=0)
+    paid_orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Sales for ticket #{self.ticket_id}"
+
+
+
+class DailySales(models.Model):
+    """
+    One day of sales for one ticket tier. Appended to by events.analytics
+    as orders are placed and paid, so revenue reports over a date range
+    read these buckets instead of scanning orders.
+
+    Sales count on the day the order was placed, and a paid order that is
+    later reversed is taken off that same bucket.
+    """
+
+    day = models.DateField()
+
+    ticket = models.ForeignKey(Ticket, on_delete=models.CASCADE, related_name="daily_sales")
+    # Copied from the ticket so reports can filter without joins
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="daily_sales")
+    organizer = models.ForeignKey(Organizer, on_delete=models.CASCADE, related_name="daily_sales")
+
+    orders_placed = models.IntegerField(default=0)   # order lines created (checkouts started)
+    paid_orders = models.IntegerField(default=0)     # order lines paid for
+    tickets_sold = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "ticket"], name="daily_sales_day_ticket"),
+        ]
+        indexes = [
+            models.Index(fields=["organizer", "day"]),
+            models.Index(fields=["event", "day"]),
+            models.Index(fields=["day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.day} ticket #{self.ticket_id}"
+
+
+class EventRanking(models.Model):
+    """
+    How hot one event is, for the "hot" and "popular" lists: paid tickets,
+    saves and detail-page views, each weighted by how recent it is.
+    Kept up to date by events.rankings; the category, state, date and
+    status are copied from the event so a top-N list is one index read.
+    """
+
+    event = models.OneToOneField(
+        Event,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="ranking"
+    )
+
+    # Copied from the event
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name="+")
+    state = models.CharField(max_length=20, blank=True)
+    date = models.DateField()
+    status = models.CharField(max_length=10)
+
+    # Decayed sums (see events.rankings); view_score is the part of score
+    # that came from views, which can't be recounted from other tables
+    score = models.FloatField(default=0)
+    view_score = models.FloatField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "-score"], name="ranking_score"),
+            models.Index(fields=["category", "status", "-score"], name="ranking_category_score"),
+            models.Index(fields=["state", "status", "-score"], name="ranking_state_score"),
+        ]
+
+    def __str__(self):
+        return f"Ranking for event #{self.event_id}"
+
+
+class EventViews(models.Model):
+    """
+    One day of traffic for one event: detail-page views and listing
+    impressions (its card shown on home or the events list). Counted in
+    memory and written in batches by events.viewcounts.
+    """
+
+    day = models.DateField()
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name="daily_views")
+
+    views = models.PositiveIntegerField(default=0)
+    impressions = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["day", "event"], name="event_views_day_event"),
+        ]
+        indexes = [
+            models.Index(fields=["event", "day"]),
+        ]
+
+    def __str__(self):
+        return f"{self.day} event #{self.event_id}"
+
 
 class Order(models.Model):
     """
@@ -243,6 +403,14 @@ class Order(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so signals can tell when an
+        # order actually moves from one status to another
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
     def __str__(self):
         return self.reference
 
@@ -265,6 +433,179 @@ class OrderItem(models.Model):
         return f"{self.ticket.name} x {self.quantity}"
 
 
+class TicketHold(models.Model):
+    """
+    Tickets reserved for an order while the buyer pays.
+    The hold's quantity is already taken out of Ticket.quantity_available;
+    events.inventory converts it into a sale or gives it back.
+    """
+
+    STATUS_CHOICES = [
+        ("active", "Active"),
+        ("converted", "Converted"),  # payment succeeded, tickets sold
+        ("released", "Released"),    # expired, failed or replaced
+    ]
+
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.CASCADE,
+        related_name="holds"
+    )
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.CASCADE,
+        related_name="holds"
+    )
+
+    quantity = models.PositiveIntegerField()
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default="active"
+    )
+
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # release_expired_holds scans active holds by expiry
+            models.Index(fields=["status", "expires_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.ticket.name} ({self.status})"
+
+
+class PaymentEvent(models.Model):
+    """
+    Paystack webhook deliveries. The webhook view only stores them;
+    events.webhooks processes them (fulfils orders) in a worker.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    # "<event type>:<paystack id>", so re-sent deliveries are stored once
+    event_key = models.CharField(max_length=150, unique=True)
+    event_type = models.CharField(max_length=50)
+    reference = models.CharField(max_length=100, blank=True, db_index=True)
+    payload = models.JSONField()
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default="pending"
+    )
+
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    received_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)  # not retried before this
+    locked_at = models.DateTimeField(null=True, blank=True)    # claimed by a worker
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} {self.reference} ({self.status})"
+
+
+class Job(models.Model):
+    """
+    Work queued for the background worker (events.jobs, run by
+    ``python manage.py run_jobs``). A row is deleted once its job succeeds;
+    one that fails every attempt is moved to DeadJob.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+    ]
+
+    name = models.CharField(max_length=100)     # registered with @jobs.job
+    kwargs = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default="pending"
+    )
+
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    available_at = models.DateTimeField(default=timezone.now)  # not run before this
+    locked_at = models.DateTimeField(null=True, blank=True)    # claimed by a worker
+    locked_by = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
+
+
+class DeadJob(models.Model):
+    """
+    Jobs that failed every attempt (or whose name is not registered),
+    kept for inspection. They can be put back on the queue from the admin.
+    """
+
+    job_id = models.PositiveBigIntegerField()
+    name = models.CharField(max_length=100, db_index=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField()           # when the job was first queued
+    died_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} #{self.job_id}"
+
+
+class JobStats(models.Model):
+    """
+    Per job name, per hour counters written by the worker, for throughput
+    and failure-rate reporting (``python manage.py job_stats``).
+    """
+
+    name = models.CharField(max_length=100)
+    hour = models.DateTimeField()
+
+    succeeded = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)     # attempts that raised (and were retried)
+    dead = models.PositiveIntegerField(default=0)
+    runtime_ms = models.PositiveBigIntegerField(default=0)  # all attempts
+    max_runtime_ms = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["name", "hour"], name="job_stats_name_hour"),
+        ]
+        indexes = [
+            models.Index(fields=["hour"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} @ {self.hour:%Y-%m-%d %H:00}"
+
+
 class Attendee(models.Model):
     """
     Attendees registered for an event
@@ -286,6 +627,15 @@ class Attendee(models.Model):
     email = models.EmailField()
     phone = models.CharField(max_length=50, blank=True)
 
+    # Ticket tier bought (empty for attendees registered before it was recorded)
+    ticket = models.ForeignKey(
+        Ticket,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="attendees"
+    )
+
     tickets_qty = models.PositiveIntegerField(default=1)
 
     PAYMENT_STATUS_CHOICES = [
@@ -300,8 +650,9 @@ class Attendee(models.Model):
         default="pending"
     )
 
+    # The order reference (a uuid4) for bookings made on the site
     booking_ref = models.CharField(
-        max_length=30,
+        max_length=100,
         unique=True,
         null=True,
         blank=True
@@ -309,10 +660,43 @@ class Attendee(models.Model):
 
     registered_at = models.DateTimeField(auto_now_add=True)
 
+    # Set once at the door by events.checkin
+    checked_in_at = models.DateTimeField(null=True, blank=True)
+    check_in_gate = models.CharField(max_length=50, blank=True)
+
+    # Last time the row was saved; offline gate manifests are versioned on it
+    changed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["event", "changed_at"]),
+        ]
+
     def __str__(self):
         return f"{self.full_name} - {self.event.title}"
 
 
+class RemovedBooking(models.Model):
+    """
+    A booking whose Attendee row was deleted, so gate manifest deltas can
+    still tell scanners to stop admitting it. Written by a post_delete
+    receiver; the event id is a plain column so deleting the whole event
+    doesn't trip over it.
+    """
+
+    event_id = models.PositiveIntegerField()
+    booking_ref = models.CharField(max_length=100)
+    removed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["event_id", "removed_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.booking_ref} (removed)"
+
+
 
 class SavedEvent(models.Model):
 
@@ -387,8 +771,90 @@ class Payout(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Lets the ledger tell when a payout is rejected or un-rejected
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
     def __str__(self):
         return f"{self.organizer.user.username} - {self.amount} - {self.status}"
+
+
+class LedgerEntry(models.Model):
+    """
+    One line of a double-entry posting (see events.ledger).
+    Lines sharing a posting id always sum to zero. Append-only: mistakes
+    are corrected with a reversing posting, never by editing a line.
+    """
+
+    ACCOUNT_CHOICES = [
+        ("organizer", "Organizer balance"),   # what we owe the organizer
+        ("sales", "Ticket sales"),            # money taken from buyers
+        ("fees", "Platform fees"),
+        ("payouts", "Payouts"),               # money sent to organizers
+    ]
+
+    KIND_CHOICES = [
+        ("sale", "Sale"),
+        ("sale_reversal", "Sale reversal"),
+        ("payout", "Payout request"),
+        ("payout_reversal", "Payout reversal"),
+    ]
+
+    posting = models.UUIDField(db_index=True)
+    organizer = models.ForeignKey(Organizer, on_delete=models.CASCADE, related_name="ledger_entries")
+    account = models.CharField(max_length=20, choices=ACCOUNT_CHOICES)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+
+    # Signed; the organizer line is what the organizer gains (+) or loses (-)
+    amount = models.DecimalField(max_digits=14, decimal_places=2)
+
+    # What the posting is about. No database constraint: the ledger keeps
+    # its history when an order or payout row is deleted
+    order = models.ForeignKey(
+        Order, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name="ledger_entries"
+    )
+    payout = models.ForeignKey(
+        Payout, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name="ledger_entries"
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["organizer", "account"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.account} {self.amount}"
+
+
+class OrganizerBalance(models.Model):
+    """
+    Running totals of an organizer's ledger, updated in the same
+    transaction as every posting so balance reads are a primary-key lookup.
+    """
+
+    organizer = models.OneToOneField(
+        Organizer,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="balance"
+    )
+
+    available = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    earned = models.DecimalField(max_digits=14, decimal_places=2, default=0)   # sales net of fees
+    fees = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid_out = models.DecimalField(max_digits=14, decimal_places=2, default=0)  # requested, not rejected
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Balance of organizer #{self.organizer_id}"
     
 
 
@@ -413,4 +879,55 @@ class ContactMessage(models.Model):
         ordering = ["-created_at"]
 
     def __str__(self):
-        return f"{self.name} - {self.get_subject_display()}"
\ No newline at end of file
+        return f"{self.name} - {self.get_subject_display()}"
+
+
+class FullTextMatch(models.Lookup):
+    """
+    SQLite FTS5 MATCH lookup, e.g. search_index__document__match='"lag"*'
+    """
+
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", (*lhs_params, *rhs_params)
+
+
+class EventSearchIndex(models.Model):
+    """
+    Read-only view of the events_event_fts FTS5 virtual table.
+    The table itself is created by migration 0013 and kept in sync
+    by events.search (see signals.py). Rows share their rowid with Event.
+    """
+
+    event = models.OneToOneField(
+        Event,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column="rowid",
+        db_constraint=False,
+        related_name="search_index"
+    )
+
+    title = models.TextField()
+    description = models.TextField()
+    venue = models.TextField()
+    city = models.TextField()
+    category = models.TextField()
+
+    # FTS5 hidden columns: the one named after the table is used for
+    # table-wide MATCH queries, "rank" holds the bm25 score of a match
+    document = models.TextField(db_column="events_event_fts")
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = "events_event_fts"
+
+    def __str__(self):
+        return self.title
+
+
+EventSearchIndex._meta.get_field("document").register_lookup(FullTextMatch)
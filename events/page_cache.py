@@ -0,0 +1,195 @@
+"""
+Full-page cache for anonymous visitors.
+
+Logged-out visitors see the same home, events_list, event_detail, about
+and contact pages, so AnonymousPageCacheMiddleware keeps the rendered
+response and serves it again without running the view, the ORM, or the
+template engine.
+
+A request is served from (or stored in) the cache when it is a GET for
+one of PAGES and carries no session cookie (so it isn't logged in and has
+no session messages), no messages cookie and no Authorization header.
+Everyone else goes through the normal stack.
+
+The cache key is the path plus the sorted query parameters: repeated
+values (?location=...) are sorted, blanks dropped, and campaign tracking
+parameters (utm_*, fbclid, gclid, ...) ignored, so campaign clicks share
+one entry. Entries are invalidated like the page sections
+(sections.py): each page depends on version namespaces bumped by
+signals, and only one worker re-renders a stale page while the others
+serve the previous copy.
+
+CSRF: pages with forms carry the renderer's CSRF token. It is replaced
+with a placeholder when the page is stored, and every hit gets a token
+for its own visitor (get_token(), so CsrfViewMiddleware sets their
+cookie). Pages using the token in a way we can't find aren't cached.
+That's why the middleware sits after CsrfViewMiddleware and before
+AuthenticationMiddleware in settings.MIDDLEWARE.
+
+Event views and impressions counted while rendering a page (viewcounts)
+are stored with it and counted again on every hit.
+
+Responses carry X-Page-Cache: hit / miss / bypass, and the counts are
+kept in the cache (stats(), ``python manage.py page_cache_stats``).
+
+Set PAGE_CACHE_SECONDS = 0 to turn the cache off.
+"""
+import re
+
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+from django.urls import Resolver404, resolve
+
+from . import sections, viewcounts
+
+
+CACHE_SECONDS = getattr(settings, "PAGE_CACHE_SECONDS", 300)
+
+# url name -> the version namespaces the page shows
+PAGES = {
+    "home": [sections.EVENTS, sections.SALES, sections.CATEGORIES],
+    "events_list": [sections.EVENTS, sections.SALES, sections.CATEGORIES],
+    "event_detail": [sections.EVENTS, sections.SALES, sections.CATEGORIES],
+    "about": [sections.CATEGORIES],
+    "contact": [sections.CATEGORIES],
+}
+
+TRACKING_PARAMS = re.compile(r"^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|_ga|ref)$")
+
+CSRF_PLACEHOLDER = b"--page-cache-csrf-token--"
+_CSRF_INPUT = re.compile(rb'name="csrfmiddlewaretoken" value="([A-Za-z0-9]+)"')
+
+OUTCOMES = ("hit", "miss", "bypass")
+
+
+class _Uncacheable(Exception):
+    pass
+
+
+def _count(outcome):
+    key = f"page-cache:{outcome}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def stats():
+    """
+    {"hit": n, "miss": n, "bypass": n} since the counters were last reset.
+    """
+    counts = cache.get_many([f"page-cache:{outcome}" for outcome in OUTCOMES])
+    return {outcome: counts.get(f"page-cache:{outcome}", 0) for outcome in OUTCOMES}
+
+
+def reset_stats():
+    cache.delete_many([f"page-cache:{outcome}" for outcome in OUTCOMES])
+
+
+def cache_params(request):
+    """
+    The query parameters that can change the page, normalized.
+    """
+    params = {}
+    for name, values in request.GET.lists():
+        if TRACKING_PARAMS.match(name):
+            continue
+        values = sorted(value.strip() for value in values if value.strip())
+        if values:
+            params[name] = values
+    return params
+
+
+class AnonymousPageCacheMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        depends_on = self.page(request)
+        if depends_on is None or not CACHE_SECONDS:
+            return self.get_response(request)
+
+        if not self.is_anonymous(request):
+            _count("bypass")
+            response = self.get_response(request)
+            response["X-Page-Cache"] = "bypass"
+            return response
+
+        rendered = []
+
+        def render():
+            response = self.get_response(request)
+            rendered.append(response)
+            frozen = self.freeze(request, response)
+            if frozen is None:
+                raise _Uncacheable
+            return frozen
+
+        try:
+            frozen = sections.cached(
+                f"page:{request.path}", depends_on, render, timeout=CACHE_SECONDS, **cache_params(request),
+            )
+        except _Uncacheable:
+            pass
+
+        # Rendered by this request (stored or not), or served from the cache
+        response = rendered[0] if rendered else self.thaw(request, frozen)
+
+        outcome = "miss" if rendered else "hit"
+        _count(outcome)
+        response["X-Page-Cache"] = outcome
+        return response
+
+    def page(self, request):
+        if request.method != "GET":
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        return PAGES.get(match.url_name)
+
+    def is_anonymous(self, request):
+        return not (
+            settings.SESSION_COOKIE_NAME in request.COOKIES
+            or CookieStorage.cookie_name in request.COOKIES
+            or "HTTP_AUTHORIZATION" in request.META
+        )
+
+    def freeze(self, request, response):
+        """
+        (status, headers, content, event counts) to store, or None if the
+        response mustn't be shared.
+        """
+        if response.status_code != 200 or response.streaming or response.cookies:
+            return None
+        if "private" in response.get("Cache-Control", "") or "no-store" in response.get("Cache-Control", ""):
+            return None
+
+        content = response.content
+        if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+            # The page asked for a CSRF token: cut it out
+            found = _CSRF_INPUT.search(content)
+            if found is None:
+                return None
+            content = content.replace(found.group(1), CSRF_PLACEHOLDER)
+
+        event_counts = request.__dict__.get("event_counts")
+        return response.status_code, list(response.items()), content, event_counts
+
+    def thaw(self, request, frozen):
+        status, headers, content, event_counts = frozen
+        if event_counts:
+            viewcounts.replay(event_counts)
+        if CSRF_PLACEHOLDER in content:
+            content = content.replace(CSRF_PLACEHOLDER, get_token(request).encode())
+
+        response = HttpResponse(content, status=status)
+        for header, value in headers:
+            response[header] = value
+        return response
@@ -0,0 +1,180 @@
+"""
+Keyset (cursor) pagination.
+
+Instead of OFFSET, every page remembers the sort values of its first and
+last row. The next page asks the database for rows *after* the last one
+("WHERE (date, id) > (last_date, last_id) ORDER BY date, id LIMIT n"), so
+page 1000 costs the same as page 1 and rows don't shift or repeat when
+events are added between clicks.
+
+Usage:
+
+    page = paginate(events, ("date", "id"), cursor=request.GET.get("cursor"))
+    page.items            # list of rows for this page
+    page.next_cursor      # token for ?cursor=..., or None on the last page
+    page.previous_cursor  # token for the page before, or None on the first
+
+Cursors are signed, so a tampered token is treated like no cursor.
+"""
+import datetime
+from dataclasses import dataclass, field
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from django.core import signing
+from django.db.models import Q
+
+
+DEFAULT_PAGE_SIZE = 12
+MAX_PAGE_SIZE = 60
+
+CURSOR_SALT = "events.pagination"
+
+
+@dataclass
+class KeysetPage:
+    items: list = field(default_factory=list)
+    next_cursor: str = None
+    previous_cursor: str = None
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def paginate(queryset, ordering, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Return one KeysetPage of queryset sorted by ordering.
+
+    ordering is a tuple of field names / annotations, "-" for descending,
+    e.g. ("date", "id") or ("-created_at", "-id"). The primary key is added
+    as the last column if missing so the order is always total.
+    """
+    ordering = _with_tiebreaker(queryset, ordering)
+    page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+
+    position = decode_cursor(cursor, len(ordering))
+    backwards = position is not None and position["direction"] == "previous"
+
+    if backwards:
+        queryset = queryset.order_by(*[_flip(name) for name in ordering])
+        queryset = queryset.filter(_after(ordering, position["values"], reverse=True))
+    else:
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(_after(ordering, position["values"]))
+
+    # One extra row tells us whether there is another page that way
+    rows = list(queryset[:page_size + 1])
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if backwards:
+        rows.reverse()
+        has_previous, has_next = more, True
+    else:
+        has_previous, has_next = position is not None, more
+
+    page = KeysetPage(items=rows)
+    if rows and has_next:
+        page.next_cursor = encode_cursor(_values(rows[-1], ordering), "next")
+    if rows and has_previous:
+        page.previous_cursor = encode_cursor(_values(rows[0], ordering), "previous")
+    return page
+
+
+def encode_cursor(values, direction):
+    return signing.dumps(
+        {"v": [_dump(value) for value in values], "d": direction},
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(cursor, size):
+    """
+    Returns {"values": [...], "direction": "next"|"previous"} or None
+    for a missing, tampered or mismatched cursor.
+    """
+    if not cursor:
+        return None
+
+    try:
+        data = signing.loads(cursor, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        return None
+
+    if (
+        not isinstance(data, dict)
+        or data.get("d") not in ("next", "previous")
+        or not isinstance(data.get("v"), list)
+        or len(data["v"]) != size
+    ):
+        return None
+
+    return {"values": data["v"], "direction": data["d"]}
+
+
+def _with_tiebreaker(queryset, ordering):
+    ordering = list(ordering)
+    pk = queryset.model._meta.pk.name
+    names = {name.lstrip("-") for name in ordering}
+
+    if pk not in names and "pk" not in names:
+        descending = ordering and ordering[-1].startswith("-")
+        ordering.append(f"-{pk}" if descending else pk)
+    return ordering
+
+
+def _flip(name):
+    return name[1:] if name.startswith("-") else f"-{name}"
+
+
+def _after(ordering, values, reverse=False):
+    """
+    Build the "row comes after the cursor" condition:
+
+        (a > x) OR (a = x AND b > y) OR (a = x AND b = y AND c > z)
+
+    with > / < chosen per column from its sort direction.
+    """
+    clauses = []
+    for i, name in enumerate(ordering):
+        descending = name.startswith("-") != reverse
+        column = name.lstrip("-")
+
+        equal = {ordering[j].lstrip("-"): values[j] for j in range(i)}
+        beyond = {f"{column}__{'lt' if descending else 'gt'}": values[i]}
+        clauses.append(Q(**equal, **beyond))
+
+    return reduce(or_, clauses)
+
+
+def _values(row, ordering):
+    values = []
+    for name in ordering:
+        value = row
+        for part in name.lstrip("-").split("__"):
+            value = getattr(value, part)
+        values.append(value)
+    return values
+
+
+def _dump(value):
+    # Keep full precision: JSON would drop microseconds and Decimals
+    if isinstance(value, (datetime.date, datetime.datetime, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
@@ -0,0 +1,284 @@
+"""
+Paystack API client.
+
+One shared client per process keeps a pool of keep-alive connections to
+api.paystack.co, so payments don't pay for a new TCP + TLS handshake on
+every call. On top of that it adds:
+
+- connect/read timeouts, so a slow Paystack can't pin a worker
+- retries with jittered exponential backoff, for idempotent calls only
+  (verify is a GET; initialize is never retried)
+- a circuit breaker: after several failures in a row calls fail fast
+  with PaystackUnavailable until a cool-down has passed
+- per-call latency metrics (see PaystackClient.metrics())
+
+Views use get_client(); tests can build a PaystackClient pointing at a
+local stub server with base_url=...
+"""
+import logging
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+logger = logging.getLogger(__name__)
+
+
+class PaystackError(Exception):
+    """
+    Paystack answered, but not with what we asked for.
+    """
+
+
+class PaystackUnavailable(PaystackError):
+    """
+    Paystack could not be reached (timeout, connection error, 5xx),
+    or the circuit breaker is open. The outcome of the call is unknown.
+    """
+
+
+class TransactionNotFound(PaystackError):
+    """
+    Paystack has no transaction with this reference: checkout was never
+    started, so nothing was paid.
+    """
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures. While open, calls are
+    refused until `cooldown` seconds have passed; then one trial call is
+    let through (half-open) and its result closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold=5, cooldown=30.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.threshold:
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+
+class CallMetrics:
+    """
+    Latency and outcome counters per operation, kept in memory.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, operation, seconds, outcome):
+        with self._lock:
+            stats = self._stats.setdefault(operation, {
+                "calls": 0,
+                "errors": 0,
+                "rejected": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+            })
+            if outcome == "rejected":
+                stats["rejected"] += 1
+                return
+
+            ms = seconds * 1000
+            stats["calls"] += 1
+            stats["total_ms"] += ms
+            stats["max_ms"] = max(stats["max_ms"], ms)
+            if outcome != "ok":
+                stats["errors"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            result = {}
+            for operation, stats in self._stats.items():
+                calls = stats["calls"]
+                result[operation] = {
+                    **stats,
+                    "avg_ms": stats["total_ms"] / calls if calls else 0.0,
+                }
+            return result
+
+
+class PaystackClient:
+
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        secret_key=None,
+        base_url=None,
+        timeout=None,
+        max_retries=None,
+        backoff=None,
+        pool_size=None,
+        breaker=None,
+    ):
+        self.secret_key = secret_key or settings.PAYSTACK_SECRET_KEY
+        self.base_url = (base_url or getattr(settings, "PAYSTACK_BASE_URL", "https://api.paystack.co")).rstrip("/")
+        self.timeout = timeout or getattr(settings, "PAYSTACK_TIMEOUT", (3.05, 10))
+        self.max_retries = getattr(settings, "PAYSTACK_MAX_RETRIES", 2) if max_retries is None else max_retries
+        self.backoff = getattr(settings, "PAYSTACK_RETRY_BACKOFF", 0.25) if backoff is None else backoff
+        self.breaker = breaker or CircuitBreaker(
+            threshold=getattr(settings, "PAYSTACK_BREAKER_THRESHOLD", 5),
+            cooldown=getattr(settings, "PAYSTACK_BREAKER_COOLDOWN", 30.0),
+        )
+        self.stats = CallMetrics()
+
+        pool_size = pool_size or getattr(settings, "PAYSTACK_POOL_SIZE", 10)
+        self.session = requests.Session()
+        # Retries are handled below, so urllib3's own are switched off
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Authorization": f"Bearer {self.secret_key}",
+            "Content-Type": "application/json",
+        })
+
+    # -- API calls ---------------------------------------------------------
+
+    def initialize_transaction(self, email, amount, reference, callback_url):
+        """
+        Start a payment. amount is in kobo. Returns Paystack's "data" dict
+        (authorization_url, access_code, reference).
+        """
+        return self._call(
+            "initialize",
+            "POST",
+            "/transaction/initialize",
+            json={
+                "email": email,
+                "amount": amount,
+                "reference": reference,
+                "callback_url": callback_url,
+            },
+            idempotent=False,
+        )
+
+    def verify_transaction(self, reference):
+        """
+        Look up a payment. Returns Paystack's "data" dict; data["status"]
+        is "success" for a completed payment.
+        """
+        return self._call(
+            "verify",
+            "GET",
+            f"/transaction/verify/{reference}",
+            idempotent=True,
+        )
+
+    def metrics(self):
+        return self.stats.snapshot()
+
+    # -- plumbing ----------------------------------------------------------
+
+    def _call(self, operation, method, path, idempotent, **kwargs):
+        if not self.breaker.allow():
+            self.stats.record(operation, 0, "rejected")
+            raise PaystackUnavailable("Paystack circuit breaker is open")
+
+        attempts = 1 + (self.max_retries if idempotent else 0)
+        url = self.base_url + path
+
+        for attempt in range(attempts):
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            except requests.RequestException as exc:
+                error = PaystackUnavailable(f"Paystack {operation} failed: {exc}")
+                retryable = True
+            else:
+                if response.status_code in self.RETRY_STATUSES:
+                    error = PaystackUnavailable(f"Paystack {operation} returned HTTP {response.status_code}")
+                    retryable = True
+                else:
+                    self.breaker.record_success()
+                    self._log(operation, started, attempt, response.status_code)
+                    return self._parse(operation, response)
+
+            self._log(operation, started, attempt, None, error)
+
+            if not retryable or attempt == attempts - 1:
+                break
+
+            # Exponential backoff with full jitter
+            time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+
+        self.breaker.record_failure()
+        raise error
+
+    def _parse(self, operation, response):
+        try:
+            body = response.json()
+        except ValueError:
+            raise PaystackError(f"Paystack {operation} returned a non-JSON body (HTTP {response.status_code})")
+
+        if not body.get("status"):
+            message = body.get("message") or f"Paystack {operation} was rejected"
+            if operation == "verify" and "reference not found" in message.lower():
+                raise TransactionNotFound(message)
+            raise PaystackError(message)
+        return body.get("data") or {}
+
+    def _log(self, operation, started, attempt, status_code, error=None):
+        elapsed = time.monotonic() - started
+        self.stats.record(operation, elapsed, "ok" if error is None else "error")
+        logger.debug(
+            "paystack %s attempt=%s status=%s %.1fms%s",
+            operation, attempt + 1, status_code, elapsed * 1000,
+            f" error={error}" if error else "",
+        )
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """
+    The process-wide client (and its connection pool).
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = PaystackClient()
+    return _client
@@ -0,0 +1,134 @@
+"""
+A tiny local stand-in for the Paystack API, for tests and benchmarks.
+
+    with StubPaystackServer() as stub:
+        client = PaystackClient(base_url=stub.url)
+        stub.transactions["ref-1"] = {"status": "success", "amount": 500000}
+        client.verify_transaction("ref-1")
+
+It speaks just enough of the API for this project:
+
+- POST /transaction/initialize  records the reference as "abandoned"
+  (Paystack's state for a started-but-unpaid transaction) and returns an
+  authorization_url on the stub itself
+- GET  /transaction/verify/<ref>  returns the stored transaction, or the
+  400 "Transaction reference not found" error
+
+Failure injection: stub.fail_next(n, status=503) answers the next n
+requests with that status, and stub.delay adds latency to every request.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    # Keep-alive, so clients can reuse pooled connections
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self._handle()
+
+    def do_POST(self):
+        self._handle()
+
+    def _handle(self):
+        stub = self.server.stub
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+
+        with stub.lock:
+            stub.requests.append((self.command, self.path))
+            failure = stub._failures.pop(0) if stub._failures else None
+
+        if stub.delay:
+            time.sleep(stub.delay)
+
+        if failure is not None:
+            return self._reply(failure, {"status": False, "message": "Stub failure"})
+
+        if self.command == "POST" and self.path == "/transaction/initialize":
+            payload = json.loads(body or b"{}")
+            reference = payload.get("reference")
+            with stub.lock:
+                stub.transactions.setdefault(reference, {
+                    "status": "abandoned",
+                    "amount": payload.get("amount"),
+                })
+            return self._reply(200, {
+                "status": True,
+                "message": "Authorization URL created",
+                "data": {
+                    "authorization_url": f"{stub.url}/pay/{reference}",
+                    "access_code": f"stub-{reference}",
+                    "reference": reference,
+                },
+            })
+
+        if self.command == "GET" and self.path.startswith("/transaction/verify/"):
+            reference = self.path.rsplit("/", 1)[-1]
+            with stub.lock:
+                transaction = stub.transactions.get(reference)
+
+            if transaction is None:
+                return self._reply(400, {"status": False, "message": "Transaction reference not found"})
+
+            return self._reply(200, {
+                "status": True,
+                "message": "Verification successful",
+                "data": {"reference": reference, **transaction},
+            })
+
+        self._reply(404, {"status": False, "message": "Not found"})
+
+    def _reply(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubPaystackServer:
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.lock = threading.Lock()
+        self.transactions = {}
+        self.requests = []
+        self.delay = 0
+        self._failures = []
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fail_next(self, count, status=503):
+        with self.lock:
+            self._failures.extend([status] * count)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
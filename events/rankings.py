@@ -0,0 +1,199 @@
+"""
+Hot and popular events (EventRanking).
+
+Every paid ticket, save and detail-page view adds to its event's score,
+weighted by how recent it is: a contribution loses half its weight every
+RANKING_HALF_LIFE_HOURS.
+
+    score = sum(weight * 0.5 ** (age / half_life))
+
+Decaying every score as time passes would mean rewriting every row. They
+are stored "forward decayed" instead: a contribution made at time t is
+added as weight * 2 ** ((t - EPOCH) / half_life), which grows with t
+rather than shrinking with age. Dividing every score by the same
+2 ** ((now - EPOCH) / half_life) gives the decayed sum above and doesn't
+change the order, so ranking by the stored number is ranking by the
+decayed one. Writes stay single-row increments:
+
+* an order moves into "paid"     -> its tickets are added
+* an order moves out of "paid"   -> the same amounts are taken off
+* a ticket line is added to / removed from a paid order -> likewise
+* an event is saved to / removed from someone's list
+* event_detail views are written (in batches, by viewcounts)
+
+Sales are dated by when the order was placed and saves by when they were
+made, so taking one off removes exactly what was added.
+
+Floats overflow at 2 ** 1024: with the default 72-hour half-life that is
+about eight years after EPOCH. Before then, move EPOCH forward and run
+``python manage.py rebuild_rankings`` (also needed after changing the
+half-life or the weights).
+
+The lists read the rows directly: top() for the plain, per-category and
+per-state lists (one index read), ranked() for any other filtered set of
+events. Scores change with every view, so instead of being invalidated
+the cached lists expire after RANKING_CACHE_SECONDS.
+"""
+import datetime
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .models import Event, EventRanking, OrderItem, SavedEvent
+
+
+EPOCH = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+HALF_LIFE_HOURS = getattr(settings, "RANKING_HALF_LIFE_HOURS", 72)
+WEIGHTS = getattr(settings, "RANKING_WEIGHTS", {"ticket": 5.0, "save": 2.0, "view": 0.1})
+CACHE_SECONDS = getattr(settings, "RANKING_CACHE_SECONDS", 60)
+
+
+def weight(kind, at=None):
+    """
+    What one ticket/save/view made at `at` (default: now) adds to a score.
+    """
+    at = at or timezone.now()
+    hours = (at - EPOCH).total_seconds() / 3600
+    return WEIGHTS[kind] * 2 ** (hours / HALF_LIFE_HOURS)
+
+
+def _copied(event):
+    return {
+        "category_id": event.category_id,
+        "state": event.state,
+        "date": event.date,
+        "status": event.status,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def _add(event_id, score, view_score=0, create=True):
+    changes = {"score": F("score") + score}
+    if view_score:
+        changes["view_score"] = F("view_score") + view_score
+
+    if EventRanking.objects.filter(event_id=event_id).update(**changes) or not create:
+        return
+
+    # No row yet (e.g. the event was bulk created): start one
+    event = Event.objects.filter(pk=event_id).first()
+    if event is not None:
+        event_saved(event)
+        EventRanking.objects.filter(event_id=event_id).update(**changes)
+
+
+def event_saved(event):
+    """
+    Create the event's row, or copy its category/state/date/status again.
+    """
+    if not EventRanking.objects.filter(event_id=event.pk).update(**_copied(event)):
+        EventRanking.objects.get_or_create(event_id=event.pk, defaults=_copied(event))
+
+
+def order_status_changed(order, old_status, new_status):
+    if (old_status == "paid") == (new_status == "paid"):
+        return
+
+    tickets = order.items.aggregate(tickets=Sum("quantity"))["tickets"] or 0
+    change = tickets * weight("ticket", order.created_at)
+    if new_status == "paid":
+        _add(order.event_id, change)
+    else:
+        _add(order.event_id, -change, create=False)
+
+
+def paid_item_changed(event_id, quantity_delta, order_created_at):
+    """
+    A ticket line was added to / removed from an order that is already paid.
+    """
+    # Update only on removal: the lines may be cascading from the event's
+    # own delete, and its row must not be created again
+    _add(event_id, quantity_delta * weight("ticket", order_created_at), create=quantity_delta > 0)
+
+
+def event_bookmarked(saved):
+    _add(saved.event_id, weight("save", saved.created_at))
+
+
+def event_unbookmarked(saved):
+    _add(saved.event_id, -weight("save", saved.created_at), create=False)
+
+
+def record_views(counts, at=None):
+    """
+    Add detail-page views: counts is {event_id: views}.
+    """
+    for event_id, views in counts.items():
+        change = views * weight("view", at)
+        _add(event_id, change, view_score=change)
+
+
+def rebuild_all():
+    """
+    Recompute every event's score from paid orders and saves (views are
+    kept: nothing else records them). Returns the number of rows written.
+    """
+    views = dict(EventRanking.objects.values_list("event_id", "view_score"))
+    scores = defaultdict(float)
+
+    sales = (
+        OrderItem.objects.filter(order__status="paid")
+        .values_list("order__event_id", "order__created_at")
+        .annotate(tickets=Sum("quantity"))
+    )
+    for event_id, created_at, tickets in sales.iterator(chunk_size=2000):
+        scores[event_id] += tickets * weight("ticket", created_at)
+
+    saves = SavedEvent.objects.values_list("event_id", "created_at")
+    for event_id, created_at in saves.iterator(chunk_size=2000):
+        scores[event_id] += weight("save", created_at)
+
+    rows = [
+        EventRanking(
+            event_id=event.pk,
+            score=scores[event.pk] + views.get(event.pk, 0),
+            view_score=views.get(event.pk, 0),
+            **_copied(event),
+        )
+        for event in Event.objects.only("category_id", "state", "date", "status").iterator(chunk_size=2000)
+    ]
+
+    with transaction.atomic():
+        EventRanking.objects.all().delete()
+        EventRanking.objects.bulk_create(rows, batch_size=2000)
+    return len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def top(limit, category=None, states=None):
+    """
+    The `limit` hottest upcoming active events, optionally in one
+    category and/or some states, with their cards.
+    """
+    events = Event.objects.filter(ranking__status="active", ranking__date__gte=timezone.localdate())
+    if category:
+        events = events.filter(ranking__category_id=category)
+    if states:
+        events = events.filter(ranking__state__in=states)
+
+    return list(events.select_related("card").order_by("-ranking__score", "ranking__date", "id")[:limit])
+
+
+def ranked(events, limit):
+    """
+    The `limit` hottest of a filtered queryset of events (search, price...).
+    """
+    return list(
+        events.select_related("card")
+        .order_by(F("ranking__score").desc(nulls_last=True), "date", "id")[:limit]
+    )
@@ -0,0 +1,228 @@
+"""
+Reconciliation of stale pending orders against Paystack.
+
+Orders whose buyer never came back through verify_payment (and whose
+webhook never arrived) stay "pending" forever. reconcile() walks them in
+primary-key batches, verifies each reference with a bounded thread pool,
+and applies the results batch by batch inside one transaction.
+
+An order is stale once its last checkout started more than older_than
+ago: when it was placed, or when initialize_payment last sent the buyer
+to Paystack (which renews the order's ticket holds, so the newest hold's
+expiry tells). Only answers that settle the payment change an order:
+"success", a definite failure, or Paystack not knowing the reference.
+Any other error is listed as a discrepancy and the order left pending.
+
+Only one batch of orders is in memory at a time, so it copes with tens
+of thousands of orders. Used by ``python manage.py reconcile_payments``.
+"""
+import datetime
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from . import fulfilment, inventory, paystack
+from .models import Order
+
+
+logger = logging.getLogger(__name__)
+
+# Paystack transaction states that mean the buyer did not pay
+NOT_PAID = {"failed", "reversed"}
+
+# "abandoned" is also the state of a checkout page that is still open, so
+# it only counts as not paid once the last checkout is this old
+ABANDONED_AFTER = datetime.timedelta(hours=24)
+
+MAX_LISTED_DISCREPANCIES = 20
+
+
+@dataclass
+class ReconciliationReport:
+    checked: int = 0
+    paid: int = 0             # pending here, paid at Paystack: fulfilled now
+    failed: int = 0           # not paid at Paystack: marked failed
+    unchanged: int = 0        # still in progress at Paystack
+    already_resolved: int = 0  # webhook / redirect got there during the run
+    unreachable: int = 0      # Paystack didn't answer; left pending
+    errors: int = 0           # unexpected answer or error; left pending, listed in problems
+    problems: list = field(default_factory=list)  # (reference, what's wrong)
+    seconds: float = 0.0
+
+    @property
+    def per_second(self):
+        return self.checked / self.seconds if self.seconds else 0.0
+
+    def add_problem(self, reference, message):
+        if len(self.problems) < MAX_LISTED_DISCREPANCIES:
+            self.problems.append((reference, message))
+
+
+def _verify(client, reference):
+    """
+    Runs in a worker thread: HTTP only, no database access.
+    Returns (reference, paystack data or None, error or None).
+    """
+    try:
+        return reference, client.verify_transaction(reference), None
+    except paystack.TransactionNotFound:
+        # Checkout was never started
+        return reference, {"status": "failed"}, None
+    except paystack.PaystackError as exc:
+        # Unreachable, or an answer that settles nothing (wrong secret
+        # key, a proxy's error page...)
+        return reference, None, exc
+
+
+def stale_orders(older_than, batch_size):
+    """
+    Yield lists of pending orders whose last checkout started before
+    older_than, in pk order.
+    """
+    # A hold expiring after this was placed or renewed after older_than
+    recent_hold = older_than + datetime.timedelta(minutes=inventory.HOLD_MINUTES)
+
+    last_pk = 0
+    while True:
+        batch = list(
+            Order.objects
+            .filter(status="pending", created_at__lt=older_than, pk__gt=last_pk)
+            .exclude(holds__expires_at__gte=recent_hold)
+            .annotate(checkout_expires=Max("holds__expires_at"))
+            .select_related("user")
+            .order_by("pk")[:batch_size]
+        )
+        if not batch:
+            return
+
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def reconcile(
+    older_than=datetime.timedelta(minutes=30),
+    batch_size=500,
+    concurrency=8,
+    client=None,
+    dry_run=False,
+    progress=None,
+):
+    """
+    Verify every pending order older than `older_than` and apply the outcome.
+    progress, if given, is called with the report after every batch.
+    """
+    client = client or paystack.get_client()
+    cutoff = timezone.now() - older_than
+    report = ReconciliationReport()
+    started = time.monotonic()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for batch in stale_orders(cutoff, batch_size):
+            orders = {order.reference: order for order in batch}
+            # Wait for every call before taking the write lock: map() is
+            # lazy, and iterating it inside atomic() would hold the lock
+            # for as long as Paystack takes to answer
+            results = list(pool.map(lambda ref: _verify(client, ref), orders))
+
+            with transaction.atomic():
+                for reference, payment, error in results:
+                    # A savepoint per order: one that can't be applied
+                    # mustn't undo (or stop) the rest of the batch
+                    try:
+                        with transaction.atomic():
+                            _apply(report, orders[reference], payment, error, dry_run)
+                    except Exception as exc:
+                        logger.exception("Could not reconcile order %s", reference)
+                        report.errors += 1
+                        report.add_problem(reference, f"could not apply Paystack's answer: {exc!r}")
+
+            report.checked += len(batch)
+            report.seconds = time.monotonic() - started
+            if progress:
+                progress(report)
+
+    report.seconds = time.monotonic() - started
+    return report
+
+
+def reconcile_order(order, client=None):
+    """
+    Verify and apply one pending order now (used by the payments.verify job).
+    Raises PaystackUnavailable if Paystack can't be reached.
+    """
+    client = client or paystack.get_client()
+    report = ReconciliationReport()
+
+    _, payment, error = _verify(client, order.reference)
+    if error is not None:
+        raise error
+
+    with transaction.atomic():
+        _apply(report, order, payment, None, dry_run=False)
+
+    report.checked = 1
+    return report
+
+
+def _checkout_started(order):
+    """
+    When the buyer last went to checkout for this order.
+    """
+    expires = getattr(order, "checkout_expires", None)
+    if expires is None:
+        expires = max((hold.expires_at for hold in order.holds.all()), default=None)
+    if expires is None:
+        return order.created_at
+    return expires - datetime.timedelta(minutes=inventory.HOLD_MINUTES)
+
+
+def _apply(report, order, payment, error, dry_run):
+    if isinstance(error, paystack.PaystackUnavailable):
+        report.unreachable += 1
+        return
+    if error is not None:
+        logger.error("Paystack verify for order %s failed: %s", order.reference, error)
+        report.errors += 1
+        report.add_problem(order.reference, f"Paystack error, left pending: {error}")
+        return
+
+    status = payment.get("status")
+    if status == "abandoned" and _checkout_started(order) <= timezone.now() - ABANDONED_AFTER:
+        status = "failed"
+
+    if status == "success":
+        if dry_run:
+            report.paid += 1
+            report.add_problem(order.reference, "paid at Paystack but pending here")
+            return
+
+        result = fulfilment.fulfil_order(order, amount=payment.get("amount"))
+
+        if result == fulfilment.PAID:
+            report.paid += 1
+            report.add_problem(order.reference, "paid at Paystack but pending here")
+        elif result == fulfilment.ALREADY_PAID:
+            report.already_resolved += 1
+        elif result == fulfilment.AMOUNT_MISMATCH:
+            report.add_problem(
+                order.reference,
+                f"charged {payment.get('amount')} kobo, order total {order.total_amount}"
+            )
+        elif result == fulfilment.SOLD_OUT:
+            report.failed += 1
+            report.add_problem(order.reference, "paid but tickets sold out: refund needed")
+
+    elif status in NOT_PAID:
+        if dry_run or fulfilment.fail_order(order):
+            report.failed += 1
+        else:
+            report.already_resolved += 1
+
+    else:
+        # "ongoing", "pending", "queued": leave it for the next run
+        report.unchanged += 1
@@ -0,0 +1,85 @@
+"""
+Reference data kept in process memory: categories and locations.
+
+Categories change a few times a year but are shown on almost every page
+(navigation, filters), so each worker process loads them once and keeps
+them:
+
+    reference.categories()        # every Category, as a list
+    reference.category("3")       # one of them by id, or None
+    reference.locations()         # Event.STATE_CHOICES values, for filters
+
+The context processor below puts categories and available_locations in
+every template context.
+
+Staleness is checked against the CATEGORIES version in sections.py, which
+signals.py bumps whenever a Category is saved or deleted. Reading it is a
+single cache get. The version lives in the file cache that every worker
+on the machine shares (settings.CACHES), so whichever worker made the
+change, the others reload on their next request.
+"""
+import threading
+
+from django.utils.functional import SimpleLazyObject
+
+from .models import Category, Event
+from . import sections
+
+
+_lock = threading.Lock()
+
+# (version, categories, categories by id), replaced as a whole
+_loaded = (None, [], {})
+
+
+def _current():
+    global _loaded
+
+    version = sections.versions([sections.CATEGORIES])
+    if _loaded[0] == version:
+        return _loaded
+
+    with _lock:
+        if _loaded[0] != version:
+            categories = list(Category.objects.all())
+            _loaded = (version, categories, {category.id: category for category in categories})
+    return _loaded
+
+
+def categories():
+    return _current()[1]
+
+
+def category(category_id):
+    """
+    The Category with this id (an int or a query string value), or None.
+    """
+    try:
+        category_id = int(category_id)
+    except (TypeError, ValueError):
+        return None
+    return _current()[2].get(category_id)
+
+
+def locations():
+    return [value for value, _ in Event.STATE_CHOICES]
+
+
+def clear():
+    """
+    Forget what this process has loaded (tests).
+    """
+    global _loaded
+    _loaded = (None, [], {})
+
+
+def reference_data(request):
+    """
+    Context processor: categories for the navigation and filters, and the
+    locations the events list can be filtered by. Lazy, so pages that
+    don't show categories don't even check the version.
+    """
+    return {
+        "categories": SimpleLazyObject(categories),
+        "available_locations": locations(),
+    }
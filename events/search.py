@@ -0,0 +1,217 @@
+"""
+Full-text search for events.
+
+Events are indexed into the SQLite FTS5 table ``events_event_fts``
+(title, description, venue, city and category name). The index is kept
+in sync by the receivers in signals.py and can be rebuilt from scratch
+with ``python manage.py rebuild_search_index``.
+
+When FTS5 is not available (another database backend, or an SQLite build
+without FTS5) search falls back to the old icontains filter.
+"""
+import re
+
+from django.db import DatabaseError, connection
+from django.db.models import F, FloatField, Q, Value
+
+from .models import Event, EventSearchIndex
+
+
+FTS_TABLE = EventSearchIndex._meta.db_table
+
+# Column weights for bm25(), in table column order:
+# title, description, venue, city, category
+RANK_WEIGHTS = (10.0, 1.0, 3.0, 3.0, 5.0)
+
+# Only plain words are sent to FTS5, everything else would be query syntax
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+_available = None
+
+
+def create_index(schema_editor):
+    """
+    Create the FTS5 table. Returns False if this database can't do FTS5.
+    Used by the migration, so it only talks to schema_editor.connection.
+    """
+    if schema_editor.connection.vendor != "sqlite":
+        return False
+
+    weights = ", ".join(str(w) for w in RANK_WEIGHTS)
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, description, venue, city, category, "
+            "tokenize = 'unicode61 remove_diacritics 2', "
+            "prefix = '2 3')"
+        )
+        # Store the ranking function so ORDER BY rank uses our weights
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) "
+            f"VALUES ('rank', 'bm25({weights})')"
+        )
+    except DatabaseError:
+        # SQLite compiled without FTS5
+        return False
+    return True
+
+
+def search_available():
+    """
+    True when the FTS5 table exists on the default database.
+    Checked once per process.
+    """
+    global _available
+    if _available is None:
+        _available = (
+            connection.vendor == "sqlite"
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _available
+
+
+def build_match_query(q):
+    """
+    Turn free text into an FTS5 query: every word must match,
+    and the last word typed is also matched as a prefix.
+
+    "lagos tech fe" -> '"lagos" "tech" "fe"*'
+    """
+    tokens = TOKEN_RE.findall(q.lower())
+    if not tokens:
+        return ""
+
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_events(events, q):
+    """
+    Filter an Event queryset down to events matching q, annotated with
+    search_rank and ordered best match first (soonest first without FTS).
+    """
+    match = build_match_query(q)
+
+    if not match or not search_available():
+        return events.filter(
+            Q(title__icontains=q) |
+            Q(category__name__icontains=q)
+        ).annotate(
+            search_rank=Value(0.0, output_field=FloatField())
+        ).order_by("date")
+
+    # search_rank is bm25: lower is a better match
+    return events.filter(
+        search_index__document__match=match
+    ).annotate(
+        search_rank=F("search_index__rank")
+    ).order_by("search_rank", "date")
+
+
+def _document(event):
+    return (
+        event.title,
+        event.description,
+        event.venue,
+        event.city,
+        event.category.name if event.category_id else "",
+    )
+
+
+def index_event(event):
+    """
+    Insert or replace the index row for one event.
+    """
+    if not search_available():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [event.pk])
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}"
+            "(rowid, title, description, venue, city, category) "
+            "VALUES (%s, %s, %s, %s, %s, %s)",
+            [event.pk, *_document(event)],
+        )
+
+
+def remove_event(event_id):
+    if not search_available():
+        return
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [event_id])
+
+
+def update_category(category_id, name):
+    """
+    Rewrite the category column for every event in a category
+    (used when a category is renamed, or deleted with name="").
+    """
+    if not search_available():
+        return
+
+    event_table = Event._meta.db_table
+
+    with connection.cursor() as cursor:
+        if category_id is None:
+            where = "category_id IS NULL"
+            params = [name]
+        else:
+            where = "category_id = %s"
+            params = [name, category_id]
+
+        cursor.execute(
+            f"UPDATE {FTS_TABLE} SET category = %s "
+            f"WHERE rowid IN (SELECT id FROM {event_table} WHERE {where})",
+            params,
+        )
+
+
+def rebuild_index(batch_size=2000):
+    """
+    Drop every index row and re-index all events in batches.
+    Returns the number of events indexed.
+    """
+    if not search_available():
+        return 0
+
+    events = (
+        Event.objects
+        .select_related("category")
+        .only("id", "title", "description", "venue", "city", "category__name")
+        .order_by("pk")
+    )
+
+    total = 0
+    batch = []
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+
+        for event in events.iterator(chunk_size=batch_size):
+            batch.append((event.pk, *_document(event)))
+
+            if len(batch) >= batch_size:
+                _insert_rows(cursor, batch)
+                total += len(batch)
+                batch = []
+
+        if batch:
+            _insert_rows(cursor, batch)
+            total += len(batch)
+
+        # Merge the b-tree segments written above into one
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+    return total
+
+
+def _insert_rows(cursor, rows):
+    cursor.executemany(
+        f"INSERT INTO {FTS_TABLE}"
+        "(rowid, title, description, venue, city, category) "
+        "VALUES (%s, %s, %s, %s, %s, %s)",
+        rows,
+    )
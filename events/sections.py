@@ -0,0 +1,157 @@
+"""
+Cached page sections for home and events_list.
+
+Most of the traffic on those pages is anonymous and asks for the same
+few lists (upcoming, hot, past, popular, recent events, categories), so
+each list is computed once and kept in the default cache:
+
+    upcoming = sections.cached(
+        "home.upcoming", [sections.EVENTS, sections.CATEGORIES],
+        lambda: list(events.order_by("date")[:6]),
+        category=category_id,
+    )
+
+The key is the section name plus its normalized parameters (so
+?location=abuja&location=lagos and ?location=lagos&location=abuja share
+an entry). The entry remembers the version of every namespace it
+depends on:
+
+    EVENTS      an event or ticket tier was saved or deleted
+    SALES       an order changed status or was deleted, or held tickets went
+                back on sale (hot/popular lists, tickets left)
+    CATEGORIES  a category was added, renamed or deleted
+
+signals.py (and inventory.release_hold) bump the versions, so an entry
+is recomputed on the first request after a change instead of when a TTL
+runs out. SECTION_CACHE_SECONDS only bounds how long a quiet entry lives
+(and how long a list can keep an event whose date has just passed).
+
+Stampedes: when an entry is missing or out of date, one worker takes a
+short lock (cache.add) and recomputes it. The others serve the previous
+value meanwhile, or, if there is none yet, wait up to
+SECTION_CACHE_LOCK_WAIT seconds for it.
+
+Versions live in the cache too, so every worker process must share it:
+settings.CACHES is a FileBasedCache directory, which all the workers on
+one machine read and write, and a bump made by any of them is seen by the
+others on their next request. Its add() and incr() aren't atomic across
+processes (incr is a read, then a write), so a bump doesn't increment:
+it overwrites the version with the current time in nanoseconds, a value
+no earlier version has. Two bumps at once both land on new values; at
+worst two workers recompute the same entry.
+
+Set SECTION_CACHE_SECONDS = 0 to turn the cache off.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+
+
+CACHE_SECONDS = getattr(settings, "SECTION_CACHE_SECONDS", 300)
+LOCK_SECONDS = getattr(settings, "SECTION_CACHE_LOCK_SECONDS", 10)
+LOCK_WAIT = getattr(settings, "SECTION_CACHE_LOCK_WAIT", 2.0)
+POLL_INTERVAL = 0.05
+
+EVENTS = "events"
+SALES = "sales"
+CATEGORIES = "categories"
+
+
+def _version_key(namespace):
+    return f"sections-version:{namespace}"
+
+
+def versions(namespaces):
+    """
+    Current version of each namespace, as a tuple.
+    """
+    keys = [_version_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys)
+
+    for key in keys:
+        if key not in found:
+            # Never set, or evicted: start from a value no old entry has
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+
+    return tuple(found[key] for key in keys)
+
+
+def _bump(namespaces):
+    version = time.time_ns()
+    cache.set_many({_version_key(namespace): version for namespace in namespaces}, None)
+
+
+def bump(*namespaces):
+    """
+    Mark every section depending on these namespaces out of date.
+
+    Inside a transaction the versions are bumped now and again after the
+    commit: a request that recomputed a section from the uncommitted
+    (old) data in between would otherwise keep it until the next change.
+    """
+    _bump(namespaces)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(namespaces))
+
+
+def _normalize(value):
+    if isinstance(value, (list, tuple)):
+        return sorted(str(item).strip() for item in value)
+    if value is None:
+        return ""
+    return str(value).strip()
+
+
+def section_key(name, params):
+    normalized = "&".join(
+        f"{param}={_normalize(value)}"
+        for param, value in sorted(params.items())
+        if value not in (None, "", [], ())
+    )
+    digest = hashlib.md5(normalized.encode(), usedforsecurity=False).hexdigest()
+    return f"section:{name}:{digest}"
+
+
+def cached(name, depends_on, compute, timeout=None, **params):
+    """
+    The value of compute() for this section and parameters, from the cache
+    while none of the namespaces in depends_on has changed.
+    compute() must return something picklable (evaluate querysets); if it
+    raises, nothing is cached.
+    """
+    timeout = CACHE_SECONDS if timeout is None else timeout
+    if not timeout:
+        return compute()
+
+    key = section_key(name, params)
+    current = versions(depends_on)
+
+    entry = cache.get(key)
+    if entry is not None and entry[0] == current:
+        return entry[1]
+
+    if cache.add(f"{key}:lock", True, LOCK_SECONDS):
+        try:
+            value = compute()
+            cache.set(key, (current, value), timeout)
+            return value
+        finally:
+            cache.delete(f"{key}:lock")
+
+    # Another worker is recomputing it
+    if entry is not None:
+        return entry[1]
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry[1]
+
+    # It's taking too long: don't keep the request waiting any longer
+    return compute()
@@ -0,0 +1,503 @@
+"""
+Synthetic data for benchmarks and load tests (``python manage.py seed_pointa``).
+
+Seeder builds a production-shaped dataset: buyers with profiles,
+organizers, categories, events (mostly Lagos, mostly recent, a few hugely
+popular), ticket tiers, orders in every status, attendees for paid
+orders, saved events, ledger postings and payouts, and contact messages.
+
+Everything comes from one random.Random(seed), and dates are relative to
+an anchor day, so the same (seed, scale, anchor) always gives the same
+rows. Rows are written with bulk_create, a chunk of events per
+transaction, and signals don't fire for bulk_create, so the denormalized
+tables (event cards, tier sales, daily sales, search index) are rebuilt
+and the cached page sections invalidated at the end. Ledger postings and
+balances are written directly.
+
+At scale 1 that is about 400k rows, written in about a minute on SQLite;
+both grow linearly with scale.
+"""
+import contextlib
+import datetime
+import random
+import time
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from . import analytics, cards, ledger, rankings, search, sections
+from .models import (
+    Attendee, Category, ContactMessage, Event, LedgerEntry, Order, OrderItem, Organizer,
+    OrganizerBalance, Payout, Profile, SavedEvent, Ticket,
+)
+
+
+PASSWORD = "pointa-seed"     # every seeded account's password
+
+# Rows per unit of scale
+USERS = 20_000
+ORGANIZERS = 400
+EVENTS = 4_000
+ORDERS_PER_EVENT = 25        # on average; a few events get far more
+SAVES_PER_EVENT = 10
+CONTACT_MESSAGES = 2_000
+
+EVENTS_PER_CHUNK = 250
+
+CATEGORIES = [
+    "Tech", "Music", "Food & Drink", "Business", "Fashion", "Sports", "Arts",
+    "Comedy", "Faith", "Health", "Film", "Nightlife",
+]
+
+CITIES = {
+    "lagos": ["Ikeja", "Lekki", "Victoria Island", "Yaba", "Surulere", "Ikoyi"],
+    "abuja": ["Wuse", "Garki", "Maitama", "Asokoro", "Gwarinpa"],
+}
+
+VENUES = [
+    "Eko Convention Centre", "Landmark Centre", "Muri Okunola Park", "Terra Kulture",
+    "Transcorp Hilton", "International Conference Centre", "Balmoral Hall", "Freedom Park",
+]
+
+FIRST_NAMES = [
+    "Tomide", "Chiamaka", "Emeka", "Aisha", "Tunde", "Ngozi", "Ibrahim", "Funke",
+    "Segun", "Zainab", "Kelechi", "Bola", "Uche", "Halima", "Femi", "Amaka",
+]
+LAST_NAMES = [
+    "Adeyemi", "Okafor", "Bello", "Eze", "Balogun", "Nwosu", "Abubakar", "Olawale",
+    "Obi", "Lawal", "Okonkwo", "Yusuf", "Adebayo", "Chukwu",
+]
+
+TITLE_WORDS = [
+    ("Lagos", "Abuja", "Naija", "Afro", "Summer", "Harmattan", "Island", "Mainland"),
+    ("Tech", "Jazz", "Food", "Startup", "Comedy", "Fashion", "Gospel", "Film", "Art"),
+    ("Fest", "Summit", "Night", "Expo", "Live", "Weekend", "Conference", "Party"),
+]
+
+TIERS = [("Early Bird", Decimal("0.7")), ("Regular", Decimal("1")), ("VIP", Decimal("4")),
+         ("Table for 4", Decimal("12"))]
+
+GATES = ["North", "South", "Main", "VIP"]
+
+MAX_PAYOUT = Decimal("5000000")    # Payout.amount holds 8 integer digits
+
+
+# Fields Django would otherwise stamp with "now" on insert
+TIMESTAMP_FIELDS = [
+    (Event, "created_at"), (Order, "created_at"), (Attendee, "registered_at"),
+    (Attendee, "changed_at"), (SavedEvent, "created_at"), (Payout, "created_at"),
+    (ContactMessage, "created_at"), (Organizer, "joined_at"), (Profile, "created_at"),
+    (LedgerEntry, "created_at"),
+]
+
+
+@contextlib.contextmanager
+def historical_timestamps():
+    """
+    Let bulk_create keep the created_at/registered_at values we set,
+    instead of auto_now(_add) overwriting them with the current time.
+    """
+    saved = []
+    for model, name in TIMESTAMP_FIELDS:
+        field = model._meta.get_field(name)
+        saved.append((field, field.auto_now, field.auto_now_add))
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class SeedConflict(Exception):
+    pass
+
+
+class Seeder:
+
+    def __init__(self, scale=1.0, seed=1, anchor=None, batch_size=2000, progress=None):
+        self.scale = scale
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.anchor = anchor or timezone.localdate()
+        self.latest = timezone.make_aware(datetime.datetime.combine(self.anchor, datetime.time(23, 59)))
+        self.batch_size = batch_size
+        self.progress = progress or (lambda message: None)
+
+        self.prefix = f"seed{seed}-"
+        self.counts = defaultdict(int)
+        self.balances = defaultdict(lambda: defaultdict(Decimal))
+        self.password = None
+
+    def count(self, base):
+        return max(int(base * self.scale), 1)
+
+    def moment(self, day, hour_from=8, hour_to=22):
+        """
+        An aware datetime at a random time of `day`, never after the anchor.
+        """
+        value = datetime.datetime.combine(
+            day,
+            datetime.time(self.rng.randrange(hour_from, hour_to), self.rng.randrange(60)),
+        )
+        return min(timezone.make_aware(value), self.latest)
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def _create(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        self.counts[model._meta.model_name] += len(objects)
+        return objects
+
+    # -----------------------------------------------------------------------
+
+    def run(self):
+        if User.objects.filter(username__startswith=self.prefix).exists():
+            raise SeedConflict(
+                f"Users named {self.prefix}* already exist: this seed was loaded before. "
+                f"Use another --seed."
+            )
+
+        started = time.monotonic()
+        with historical_timestamps():
+            with transaction.atomic():
+                self._categories()
+                self._buyers()
+                self._organizers()
+
+            for first in range(0, self.count(EVENTS), EVENTS_PER_CHUNK):
+                with transaction.atomic():
+                    self._events(first, min(first + EVENTS_PER_CHUNK, self.count(EVENTS)))
+                self.progress(
+                    f"  {self.counts['event']} events, {self.counts['order']} orders "
+                    f"({time.monotonic() - started:.0f}s)"
+                )
+
+            with transaction.atomic():
+                self._payouts()
+                self._balances()
+                self._contact_messages()
+
+        self.progress("Rebuilding event cards, tier sales, daily sales, rankings and the search index...")
+        with transaction.atomic():
+            cards.rebuild_all_cards()
+            cards.rebuild_all_ticket_sales()
+        analytics.backfill()
+        rankings.rebuild_all()
+        search.rebuild_index()
+        sections.bump(sections.EVENTS, sections.SALES, sections.CATEGORIES)
+
+        return dict(self.counts)
+
+    # -----------------------------------------------------------------------
+
+    def _categories(self):
+        existing = dict(Category.objects.filter(name__in=CATEGORIES).values_list("name", "pk"))
+        missing = [Category(name=name) for name in CATEGORIES if name not in existing]
+        self._create(Category, missing)
+        self.categories = list(Category.objects.filter(name__in=CATEGORIES).order_by("pk"))
+        # Some categories are much busier than others
+        self.category_weights = [1 / (rank + 1) for rank in range(len(self.categories))]
+
+    def _person(self):
+        return self.rng.choice(FIRST_NAMES), self.rng.choice(LAST_NAMES)
+
+    def _users(self, count, kind):
+        # Hashing is deliberately slow: do it once and share the hash
+        self.password = self.password or make_password(PASSWORD)
+        users = []
+        for n in range(count):
+            first, last = self._person()
+            username = f"{self.prefix}{kind}{n}"
+            users.append(User(
+                username=username,
+                first_name=first,
+                last_name=last,
+                email=f"{username}@example.com",
+                password=self.password,
+                date_joined=self.moment(self.anchor - datetime.timedelta(days=self.rng.randrange(900))),
+            ))
+        return self._create(User, users)
+
+    def _buyers(self):
+        users = self._users(self.count(USERS), "user")
+        self._create(Profile, [
+            Profile(
+                user=user,
+                phone=f"080{self.rng.randrange(10**8):08d}",
+                gender=self.rng.choice(["male", "female", ""]),
+                created_at=user.date_joined,
+            )
+            for user in users
+        ])
+        # Only what orders and attendees need, not the model instances
+        self.buyers = [(user.pk, user.get_full_name(), user.email) for user in users]
+
+    def _organizers(self):
+        users = self._users(self.count(ORGANIZERS), "org")
+        organizers = self._create(Organizer, [
+            Organizer(
+                user=user,
+                organization_name=f"{user.last_name} {self.rng.choice(['Events', 'Live', 'Hub', 'Concepts'])}",
+                email=user.email,
+                verified=self.rng.random() < 0.6,
+                joined_at=user.date_joined,
+            )
+            for user in users
+        ])
+        self.organizers = [organizer.pk for organizer in organizers]
+        # A few organizers run most of the events
+        self.organizer_weights = [self.rng.paretovariate(1.2) for _ in organizers]
+
+    # -----------------------------------------------------------------------
+
+    def _event_date(self):
+        # Two thirds in the past (denser towards today), the rest coming up
+        if self.rng.random() < 0.65:
+            return self.anchor - datetime.timedelta(days=int(730 * self.rng.random() ** 2) + 1)
+        return self.anchor + datetime.timedelta(days=int(180 * self.rng.random() ** 1.5))
+
+    def _event_status(self, date):
+        roll = self.rng.random()
+        if roll < 0.05:
+            return "cancelled"
+        if date < self.anchor and roll < 0.75:
+            return "completed"
+        return "active"
+
+    def _events(self, first, last):
+        events, tiers, orders, items, attendees, saves = [], [], [], [], [], []
+
+        for _ in range(first, last):
+            date = self._event_date()
+            state = "lagos" if self.rng.random() < 0.7 else "abuja"
+            title = " ".join(self.rng.choice(words) for words in TITLE_WORDS)
+            event = Event(
+                organizer_id=self.rng.choices(self.organizers, weights=self.organizer_weights)[0],
+                category=self.rng.choices(self.categories, weights=self.category_weights)[0],
+                title=f"{title} {date.year}",
+                description=f"{title}: a day of {title.split()[1].lower()} in {state.title()}.",
+                date=date,
+                start_time=datetime.time(self.rng.choice([10, 12, 16, 18, 19])),
+                end_time=datetime.time(self.rng.choice([20, 21, 22, 23])),
+                venue=self.rng.choice(VENUES),
+                state=state,
+                city=self.rng.choice(CITIES[state]),
+                status=self._event_status(date),
+                event_type=self.rng.choices(["physical", "online", "hybrid"], weights=[75, 15, 10])[0],
+                created_at=self.moment(date - datetime.timedelta(days=self.rng.randrange(14, 120))),
+            )
+            events.append(event)
+
+            event_tiers = self._tiers(event)
+            tiers.extend(event_tiers)
+            self._orders(event, event_tiers, orders, items, attendees)
+            saves.extend(self._saves(event))
+
+        self._create(Event, events)
+        self._create(Ticket, tiers)
+        self._create(Order, orders)
+        self._create(OrderItem, items)
+        self._create(Attendee, attendees)
+        self._create(SavedEvent, saves)
+        self._create(LedgerEntry, [entry for order in orders for entry in self._sale_entries(order)])
+
+    def _tiers(self, event):
+        if self.rng.random() < 0.08:
+            return [Ticket(event=event, name="Free", price=Decimal("0"),
+                           quantity_available=self.rng.randrange(100, 3000))]
+
+        base = Decimal(self.rng.randrange(4, 41) * 500)    # ₦2,000 - ₦20,000
+        count = self.rng.choices([1, 2, 3, 4], weights=[20, 40, 30, 10])[0]
+        chosen = TIERS[1:1 + count] if count < 4 else TIERS
+        return [
+            Ticket(
+                event=event,
+                name=name,
+                price=(base * factor).quantize(Decimal("1")),
+                # Capacity for now; what is left is worked out after the orders
+                quantity_available=self.rng.randrange(50, 2000) // (4 if factor > 1 else 1),
+            )
+            for name, factor in chosen
+        ]
+
+    def _orders(self, event, tiers, orders, items, attendees):
+        remaining = {id(tier): tier.quantity_available for tier in tiers}
+        sold = defaultdict(int)
+
+        past = event.date < self.anchor
+        wanted = min(int(ORDERS_PER_EVENT * 0.23 * self.rng.paretovariate(1.3)), ORDERS_PER_EVENT * 40)
+        opened = event.created_at.date()
+        closes = min(event.date, self.anchor)
+        window = max((closes - opened).days, 0)
+
+        for _ in range(wanted):
+            lines = []
+            for tier in self.rng.sample(tiers, 2 if len(tiers) > 1 and self.rng.random() < 0.15 else 1):
+                quantity = self.rng.choices([1, 2, 3, 4], weights=[70, 20, 6, 4])[0]
+                if remaining[id(tier)] >= quantity:
+                    lines.append((tier, quantity))
+            if not lines:
+                continue
+
+            if all(tier.price == 0 for tier, _ in lines):
+                status = "paid"
+            else:
+                status = self.rng.choices(
+                    ["paid", "failed", "pending"],
+                    weights=[78, 17, 5] if past else [70, 15, 15],
+                )[0]
+
+            user_id, full_name, email = self.rng.choice(self.buyers)
+            created_at = self.moment(opened + datetime.timedelta(days=self.rng.randint(0, window)))
+            order = Order(
+                user_id=user_id,
+                event=event,
+                total_amount=sum(tier.price * quantity for tier, quantity in lines),
+                reference=str(self.uuid()),
+                status=status,
+                created_at=created_at,
+            )
+            orders.append(order)
+            items.extend(OrderItem(order=order, ticket=tier, quantity=quantity) for tier, quantity in lines)
+
+            if status != "paid":
+                continue
+
+            for tier, quantity in lines:
+                remaining[id(tier)] -= quantity
+                sold[id(tier)] += quantity
+
+            # One attendee row per booking (booking_ref is unique)
+            checked_in = past and event.status != "cancelled" and self.rng.random() < 0.85
+            attendees.append(Attendee(
+                event=event,
+                user_id=user_id,
+                ticket=lines[0][0],
+                full_name=full_name,
+                email=email,
+                tickets_qty=sum(quantity for _, quantity in lines),
+                payment_status="free" if order.total_amount == 0 else "paid",
+                booking_ref=order.reference,
+                registered_at=created_at,
+                changed_at=created_at,
+                checked_in_at=self.moment(event.date, 16, 21) if checked_in else None,
+                check_in_gate=self.rng.choice(GATES) if checked_in else "",
+            ))
+
+        for tier in tiers:
+            tier.quantity_available = remaining[id(tier)]
+            tier.quantity_sold = sold[id(tier)]
+
+    def _saves(self, event):
+        wanted = min(int(SAVES_PER_EVENT * self.rng.expovariate(1)), len(self.buyers))
+        return [
+            SavedEvent(
+                user_id=self.buyers[index][0],
+                event=event,
+                created_at=self.moment(event.created_at.date()),
+            )
+            for index in self.rng.sample(range(len(self.buyers)), wanted)
+        ]
+
+    # -----------------------------------------------------------------------
+    # Ledger (what signals.py + ledger.py would have posted)
+
+    def _posting(self, organizer_id, kind, lines, created_at, **link):
+        posting = self.uuid()
+        return [
+            LedgerEntry(
+                posting=posting, organizer_id=organizer_id, account=account,
+                kind=kind, amount=amount, created_at=created_at, **link
+            )
+            for account, amount in lines
+            if amount
+        ]
+
+    def _sale_entries(self, order):
+        if order.status != "paid" or not order.total_amount:
+            return []
+
+        organizer_id = order.event.organizer_id
+        fee = ledger.fee_for(order.total_amount)
+        balance = self.balances[organizer_id]
+        balance["available"] += order.total_amount - fee
+        balance["earned"] += order.total_amount - fee
+        balance["fees"] += fee
+
+        return self._posting(
+            organizer_id, "sale",
+            [("sales", -order.total_amount), ("organizer", order.total_amount - fee), ("fees", fee)],
+            order.created_at,
+            order_id=order.pk,
+        )
+
+    def _payouts(self):
+        payouts, entries = [], []
+
+        for organizer_id in sorted(self.balances):
+            balance = self.balances[organizer_id]
+            if self.rng.random() < 0.4:
+                continue
+
+            for _ in range(self.rng.randint(1, 4)):
+                # Whole naira: SQLite sums decimals as floats, and millions of
+                # kobo amounts would make verify_ledger report rounding noise
+                amount = (balance["available"] * Decimal(self.rng.uniform(0.2, 0.6))).quantize(Decimal("1"))
+                amount = min(amount, MAX_PAYOUT)
+                if amount < 1000:
+                    break
+
+                status = self.rng.choices(["paid", "approved", "pending", "rejected"], weights=[60, 15, 15, 10])[0]
+                payout = Payout(
+                    organizer_id=organizer_id,
+                    amount=amount,
+                    status=status,
+                    reference=f"PO-{self.uuid().hex[:12]}",
+                    created_at=self.moment(self.anchor - datetime.timedelta(days=self.rng.randrange(365))),
+                )
+                payouts.append(payout)
+
+                if status != "rejected":
+                    balance["available"] -= amount
+                    balance["paid_out"] += amount
+
+        self._create(Payout, payouts)
+        for payout in payouts:
+            if payout.status != "rejected":
+                entries.extend(self._posting(
+                    payout.organizer_id, "payout",
+                    [("organizer", -payout.amount), ("payouts", payout.amount)],
+                    payout.created_at,
+                    payout_id=payout.pk,
+                ))
+        self._create(LedgerEntry, entries)
+
+    def _balances(self):
+        self._create(OrganizerBalance, [
+            OrganizerBalance(organizer_id=organizer_id, **balance)
+            for organizer_id, balance in self.balances.items()
+        ])
+
+    # -----------------------------------------------------------------------
+
+    def _contact_messages(self):
+        messages = []
+        for _ in range(self.count(CONTACT_MESSAGES)):
+            first, last = self._person()
+            subject = self.rng.choice(["ticket", "organizer", "support"])
+            messages.append(ContactMessage(
+                name=f"{first} {last}",
+                email=f"{first.lower()}.{last.lower()}@example.com",
+                subject=subject,
+                message=f"Hello, I have a question about a {subject} matter.",
+                created_at=self.moment(self.anchor - datetime.timedelta(days=self.rng.randrange(365))),
+                is_resolved=self.rng.random() < 0.7,
+            ))
+        self._create(ContactMessage, messages)
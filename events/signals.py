@@ -0,0 +1,259 @@
+"""
+Model signal receivers. Connected in EventsConfig.ready().
+"""
+from django.contrib.auth.models import User
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import analytics, cards, checkin, dashboard, gate_manifest, images, jobs, ledger, rankings, search, sections, viewcounts
+from .models import Attendee, Category, Event, Order, OrderItem, Organizer, Payout, SavedEvent, Ticket
+
+
+# Sent after an Order is saved with a different status than it had
+# (including creation, where old_status is None).
+# Arguments: order, old_status, new_status
+order_status_changed = Signal()
+
+
+# ---------------------------------------------------------------------------
+# Events and categories
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Event)
+def event_saved(sender, instance, created=False, raw=False, **kwargs):
+    sections.bump(sections.EVENTS)
+    # raw=True means loaddata; rebuild the derived data afterwards
+    if raw:
+        return
+    search.index_event(instance)
+    cards.event_saved(instance, created)
+    rankings.event_saved(instance)
+    _queue_derivatives(instance, "image")
+    if created:
+        dashboard.invalidate_organizer_stats(instance.organizer_id)
+
+
+@receiver(post_delete, sender=Event)
+def event_deleted(sender, instance, **kwargs):
+    sections.bump(sections.EVENTS)
+    search.remove_event(instance.pk)
+    gate_manifest.event_deleted(instance.pk)
+    dashboard.invalidate_organizer_stats(instance.organizer_id)
+
+
+def _queue_derivatives(instance, field_name):
+    # Resizing takes long enough to notice, so it happens in the worker
+    if not images.is_current(instance, field_name):
+        jobs.enqueue(
+            "images.refresh",
+            model=instance._meta.label,
+            pk=instance.pk,
+            field=field_name,
+        )
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created=False, raw=False, **kwargs):
+    sections.bump(sections.CATEGORIES)
+    # A brand new category has no events yet
+    if created or raw:
+        return
+    search.update_category(instance.pk, instance.name)
+    cards.category_renamed(instance)
+
+
+@receiver(post_delete, sender=Category)
+def category_deleted(sender, instance, **kwargs):
+    sections.bump(sections.CATEGORIES)
+    # Event.category is SET_NULL, so the events are uncategorised by now
+    search.update_category(None, "")
+    cards.category_deleted()
+
+
+# ---------------------------------------------------------------------------
+# Tickets
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created=False, raw=False, **kwargs):
+    sections.bump(sections.EVENTS)
+    if raw:
+        return
+    if created:
+        cards.ticket_created(instance)
+    cards.tickets_changed(instance.event_id)
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    sections.bump(sections.EVENTS)
+    cards.tickets_changed(instance.event_id, deleted=True)
+
+
+# ---------------------------------------------------------------------------
+# Orders
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+
+    old_status = None if created else getattr(instance, "_loaded_status", None)
+    new_status = instance.status
+    instance._loaded_status = new_status
+
+    if old_status != new_status:
+        order_status_changed.send(
+            sender=Order,
+            order=instance,
+            old_status=old_status,
+            new_status=new_status,
+        )
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, origin=None, **kwargs):
+    sections.bump(sections.SALES)
+    if instance.status == "paid":
+        cards.paid_order_deleted(instance)
+        if not _deleting_organizer(origin, ledger.organizer_of(instance)):
+            ledger.reverse_sale(instance)
+    dashboard.order_changed(instance)
+
+
+@receiver(order_status_changed)
+def update_card_totals(sender, order, old_status, new_status, **kwargs):
+    cards.order_status_changed(order, old_status, new_status)
+
+
+@receiver(order_status_changed)
+def update_daily_sales(sender, order, old_status, new_status, **kwargs):
+    analytics.order_status_changed(order, old_status, new_status)
+
+
+@receiver(order_status_changed)
+def post_to_ledger(sender, order, old_status, new_status, **kwargs):
+    ledger.order_status_changed(order, old_status, new_status)
+
+
+@receiver(order_status_changed)
+def update_rankings(sender, order, old_status, new_status, **kwargs):
+    rankings.order_status_changed(order, old_status, new_status)
+
+
+@receiver(order_status_changed)
+def update_attendee_admission(sender, order, old_status, new_status, **kwargs):
+    checkin.order_status_changed(order, old_status, new_status)
+
+
+@receiver(order_status_changed)
+def invalidate_dashboard_stats(sender, order, **kwargs):
+    dashboard.order_changed(order)
+
+
+@receiver(order_status_changed)
+def invalidate_sales_sections(sender, order, **kwargs):
+    # Hot and popular events are ranked by tickets sold / orders placed
+    sections.bump(sections.SALES)
+
+
+@receiver(post_save, sender=OrderItem)
+def order_item_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+
+    if created:
+        analytics.order_line_placed(instance.ticket_id, instance.order.created_at)
+
+    if instance.order.status == "paid":
+        if created:
+            cards.paid_item_changed(instance.order.event_id, instance.ticket_id, instance.quantity)
+            rankings.paid_item_changed(
+                instance.order.event_id, instance.quantity, instance.order.created_at
+            )
+        else:
+            # Quantity edited on a paid order (admin): recount the event
+            # (the ranking catches up at the next rebuild_rankings)
+            cards.rebuild_card(instance.order.event)
+            cards.tier_changed(instance.ticket_id)
+
+
+@receiver(post_delete, sender=OrderItem)
+def order_item_deleted(sender, instance, **kwargs):
+    order = Order.objects.filter(pk=instance.order_id).values("status", "event_id", "created_at").first()
+    if order is None:
+        return
+
+    if order["status"] == "paid":
+        cards.paid_item_changed(order["event_id"], instance.ticket_id, -instance.quantity)
+        rankings.paid_item_changed(order["event_id"], -instance.quantity, order["created_at"])
+    elif order["status"] == "pending":
+        # Booking again replaces a pending order's lines: don't count it twice
+        analytics.order_line_placed(instance.ticket_id, order["created_at"], count=-1)
+
+
+# ---------------------------------------------------------------------------
+# Attendees
+# ---------------------------------------------------------------------------
+
+@receiver(post_delete, sender=Attendee)
+def attendee_deleted(sender, instance, origin=None, **kwargs):
+    # Whole event (or organizer) going away: no scanner needs telling
+    if isinstance(origin, (Event, Organizer)) or getattr(origin, "model", None) in (Event, Organizer):
+        return
+    gate_manifest.attendee_deleted(instance)
+
+
+# ---------------------------------------------------------------------------
+# Saved events
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=SavedEvent)
+def saved_event_saved(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        rankings.event_bookmarked(instance)
+
+
+@receiver(post_delete, sender=SavedEvent)
+def saved_event_deleted(sender, instance, **kwargs):
+    rankings.event_unbookmarked(instance)
+
+
+# ---------------------------------------------------------------------------
+# Event views
+# ---------------------------------------------------------------------------
+
+@receiver(request_finished)
+def flush_view_counts(sender, **kwargs):
+    # After the response has been sent, so nobody waits for the write
+    viewcounts.flush_if_due()
+
+
+# ---------------------------------------------------------------------------
+# Payouts
+# ---------------------------------------------------------------------------
+
+@receiver(post_save, sender=Payout)
+def payout_saved(sender, instance, created=False, raw=False, **kwargs):
+    if not raw:
+        ledger.payout_saved(instance, created)
+
+
+@receiver(post_delete, sender=Payout)
+def payout_deleted(sender, instance, origin=None, **kwargs):
+    if not _deleting_organizer(origin, instance.organizer_id):
+        ledger.payout_deleted(instance)
+
+
+def _deleting_organizer(origin, organizer_id):
+    # True when this delete cascades from the organizer (or its user): its
+    # ledger is going away too, and a reversal posted to it now would point
+    # at a row that is about to disappear
+    if isinstance(origin, Organizer):
+        return origin.pk == organizer_id
+    if isinstance(origin, User):
+        return Organizer.objects.filter(user=origin, pk=organizer_id).exists()
+    # Bulk queryset delete of organizers/users: assume the worst
+    return getattr(origin, "model", None) in (Organizer, User)
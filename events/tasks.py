@@ -0,0 +1,36 @@
+"""
+Jobs run by the background worker (see jobs.py). Imported by
+EventsConfig.ready() so every process knows the registered names.
+"""
+import datetime
+
+from django.apps import apps
+
+from . import images, jobs, reconciliation
+from .models import Order
+
+
+@jobs.job("images.refresh", max_attempts=3)
+def refresh_image(model, pk, field, force=False):
+    """
+    Build the resized copies of one image field (queued on upload).
+    """
+    instance = apps.get_model(model).objects.filter(pk=pk).first()
+    if instance is not None:
+        images.refresh(instance, field, force=force)
+
+
+@jobs.job("payments.verify", max_attempts=8, retry_delay=datetime.timedelta(minutes=1))
+def verify_payment(reference):
+    """
+    Ask Paystack about an order the buyer came back for while Paystack
+    was unreachable. Retried (with backoff) until Paystack answers.
+    """
+    order = Order.objects.select_related("user").filter(reference=reference, status="pending").first()
+    if order is None:
+        # The webhook or the buyer got there first
+        return
+
+    report = reconciliation.reconcile_order(order)
+    if report.unchanged:
+        raise RuntimeError(f"Payment {reference} is still in progress at Paystack")
@@ -0,0 +1,58 @@
+"""
+{% picture %}: render an image field through its resized derivatives.
+
+    {% load images %}
+    {% picture event.image "card" class="rounded-4 w-100" alt=event.title %}
+
+gives a <picture> with a WebP srcset, a JPEG srcset fallback and the
+"card" JPEG as src, so the browser downloads the smallest file that fills
+the slot. Images without derivatives (not built yet) fall back to a plain
+<img> of the original.
+"""
+from django import template
+from django.forms.utils import flatatt
+from django.utils.html import format_html
+
+from events import images
+
+
+register = template.Library()
+
+# Rendered width of each slot, for the sizes attribute
+SLOT_SIZES = {
+    "thumb": "160px",
+    "card": "(max-width: 576px) 100vw, (max-width: 992px) 50vw, 33vw",
+    "hero": "100vw",
+}
+
+
+@register.simple_tag
+def picture(field_file, size="card", sizes=None, **attrs):
+    if not field_file:
+        return ""
+
+    attrs.setdefault("alt", "")
+    attrs.setdefault("loading", "lazy")
+    attrs.setdefault("decoding", "async")
+
+    derivatives = getattr(field_file.instance, images.derivatives_field(field_file.field.name), None) or {}
+    slot = (derivatives.get("sizes") or {}).get(size)
+
+    # Not built yet, or built for an image that has since been replaced
+    if slot is None or derivatives.get("source") != field_file.name:
+        return format_html("<img{}>", flatatt({"src": field_file.url, **attrs}))
+
+    storage = field_file.storage
+    sizes = sizes or SLOT_SIZES.get(size, "100vw")
+
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}"><img{}></picture>',
+        images.srcset(derivatives, "webp", storage),
+        sizes,
+        flatatt({
+            "src": storage.url(slot["jpeg"]),
+            "srcset": images.srcset(derivatives, "jpeg", storage),
+            "sizes": sizes,
+            **attrs,
+        }),
+    )
@@ -1,3 +1,2495 @@
-from django.test import TestCase
+import datetime
+import hashlib
+import hmac
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection, connections
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.template import Context, Template
+from django.http import HttpResponse
+from django.template import engines
+from django.test import Client, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import (
+    analytics, benchmarks, cards, checkin, dashboard, exports, fulfilment, gate_manifest, images,
+    inventory, jobs, ledger, page_cache, pagination, paystack, rankings, reconciliation, reference,
+    search, sections, urls, viewcounts, webhooks,
+)
+from .instrumentation import RequestMetricsMiddleware, fingerprint
+from .paystack import CircuitBreaker, PaystackClient, PaystackError, PaystackUnavailable
+from .paystack_stub import StubPaystackServer
+from .models import (
+    Attendee, Category, ContactMessage, DailySales, DeadJob, Event, EventCard, EventRanking, EventViews,
+    Job, Order, OrderItem, Organizer, PaymentEvent, Payout, Profile, RemovedBooking, SavedEvent, Ticket,
+    TicketHold, TicketSales,
+)
 
 # Create your tests here.
+
+
+def make_event(title="Lagos Tech Fest", days_ahead=10, **kwargs):
+    """
+    Create an organizer + event (+ category) for tests.
+    """
+    owner = User.objects.create_user(username=f"org-{uuid.uuid4().hex[:8]}")
+    organizer = Organizer.objects.create(user=owner, organization_name="Pointa Events")
+    category = Category.objects.create(name="Tech")
+
+    return Event.objects.create(
+        organizer=organizer,
+        category=category,
+        title=title,
+        date=timezone.now().date() + datetime.timedelta(days=days_ahead),
+        state="lagos",
+        **kwargs
+    )
+
+
+def make_order(event, ticket, quantity, user=None):
+    user = user or User.objects.create_user(username=f"buyer-{uuid.uuid4().hex[:8]}")
+    order = Order.objects.create(
+        user=user,
+        event=event,
+        total_amount=ticket.price * quantity,
+        reference=str(uuid.uuid4()),
+    )
+    OrderItem.objects.create(order=order, ticket=ticket, quantity=quantity)
+    return order
+
+
+def bump_in_another_process(*namespaces):
+    """
+    Bump section versions from a separate manage.py process, with its own
+    connection to the tests' cache directory.
+    """
+    names = ", ".join(f"sections.{namespace}" for namespace in namespaces)
+    subprocess.run(
+        [sys.executable, "manage.py", "shell", "-c", f"from events import sections; sections.bump({names})"],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, "DJANGO_CACHE_DIR": settings.CACHES["default"]["LOCATION"]},
+        check=True,
+        capture_output=True,
+    )
+
+
+_test_cache = None
+
+
+def setUpModule():
+    # settings.CACHES is a directory shared with any server running from
+    # this checkout: the tests get one of their own
+    global _test_cache
+    location = tempfile.mkdtemp(prefix="pointa-test-cache-")
+    _test_cache = override_settings(CACHES={"default": {**settings.CACHES["default"], "LOCATION": location}})
+    _test_cache.enable()
+
+
+def tearDownModule():
+    # Don't leave views counted by the tests for the exit-time flush: by
+    # then the connection points at the development database again
+    viewcounts.discard()
+
+    location = settings.CACHES["default"]["LOCATION"]
+    _test_cache.disable()
+    shutil.rmtree(location, ignore_errors=True)
+
+
+class SearchTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.jazz = make_event(title="Jazz Festival")
+        self.brunch = make_event(title="Sunday Brunch", description="Live jazz all afternoon")
+        self.talk = make_event(title="Founders Talk", venue="Landmark Centre")
+
+    def search(self, q):
+        return list(search.search_events(Event.objects.all(), q))
+
+    def indexed(self, event_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT title, category FROM {search.FTS_TABLE} WHERE rowid = %s", [event_id])
+            return cursor.fetchone()
+
+    def test_fts_is_available_in_tests(self):
+        self.assertTrue(search.search_available())
+
+    def test_title_matches_rank_above_description_matches(self):
+        results = self.search("jazz")
+        self.assertEqual(results, [self.jazz, self.brunch])
+        self.assertLess(results[0].search_rank, results[1].search_rank)
+
+    def test_last_word_matches_as_prefix(self):
+        self.assertEqual(self.search("fest"), [self.jazz])
+        self.assertEqual(self.search("jazz fes"), [self.jazz])
+        self.assertEqual(self.search("landm"), [self.talk])
+
+    def test_only_the_last_word_is_a_prefix(self):
+        self.assertEqual(self.search("fest jazz"), [])
+
+    def test_saving_an_event_reindexes_it(self):
+        self.jazz.title = "Highlife Evening"
+        self.jazz.save()
+
+        self.assertEqual(self.search("highlife"), [self.jazz])
+        self.assertEqual(self.search("festival"), [])
+
+    def test_deleting_an_event_removes_its_row(self):
+        event_id = self.jazz.pk
+        self.jazz.delete()
+
+        self.assertIsNone(self.indexed(event_id))
+        self.assertEqual(self.search("jazz"), [self.brunch])
+
+    def test_renaming_a_category_rewrites_its_events(self):
+        category = self.talk.category
+        category.name = "Startups"
+        category.save()
+
+        self.assertEqual(self.search("startups"), [self.talk])
+        self.assertEqual(self.indexed(self.jazz.pk)[1], "Tech")
+
+    def test_deleting_a_category_blanks_its_events(self):
+        self.talk.category.delete()
+
+        self.assertEqual(self.indexed(self.talk.pk)[1], "")
+        self.assertNotIn(self.talk, self.search("tech"))
+
+    def test_falls_back_to_icontains_without_fts(self):
+        with mock.patch.object(search, "_available", False):
+            results = self.search("brunch")
+
+        self.assertEqual(results, [self.brunch])
+        self.assertEqual(results[0].search_rank, 0.0)
+
+    def test_query_without_words_falls_back_to_icontains(self):
+        self.assertEqual(search.build_match_query('"*(-'), "")
+        self.assertEqual(self.search('"*(-'), [])
+
+        self.brunch.title = "Brunch & Co."
+        self.brunch.save()
+        self.assertEqual(self.search("&"), [self.brunch])
+
+    def test_search_syntax_is_not_passed_to_fts(self):
+        self.assertEqual(search.build_match_query('jazz" OR NEAR(fest'), '"jazz" "or" "near" "fest"*')
+        self.assertEqual(self.search('jazz" OR'), [])
+
+    def test_events_list_searches(self):
+        response = self.client.get(reverse("events_list"), {"q": "jazz"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context["upcoming_events"]), [self.jazz, self.brunch])
+
+    def test_rebuild_search_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {search.FTS_TABLE}")
+        self.assertEqual(self.search("jazz"), [])
+
+        out = io.StringIO()
+        call_command("rebuild_search_index", batch_size=2, stdout=out)
+
+        self.assertIn("Indexed 3 events", out.getvalue())
+        self.assertEqual(self.search("jazz"), [self.jazz, self.brunch])
+        self.assertEqual(self.indexed(self.talk.pk), ("Founders Talk", "Tech"))
+
+    def test_rebuild_search_index_needs_fts(self):
+        with mock.patch.object(search, "_available", False):
+            with self.assertRaises(CommandError):
+                call_command("rebuild_search_index", stdout=io.StringIO())
+
+
+class EventCardTests(TestCase):
+
+    def setUp(self):
+        self.event = make_event()
+        self.vip = Ticket.objects.create(event=self.event, name="VIP", price=20000, quantity_available=10)
+        self.regular = Ticket.objects.create(event=self.event, name="Regular", price=5000, quantity_available=40)
+
+    def card(self):
+        return EventCard.objects.get(event=self.event)
+
+    def pay(self, ticket, quantity):
+        order = make_order(self.event, ticket, quantity)
+        order.status = "paid"
+        order.save()
+        return order
+
+    def snapshot(self):
+        return {
+            card.event_id: (
+                card.category_name, card.has_tickets, card.min_price, card.max_price,
+                card.total_capacity, card.total_sold, card.paid_orders, card.revenue,
+            )
+            for card in EventCard.objects.all()
+        }
+
+    def test_new_event_gets_an_empty_card(self):
+        event = make_event(title="Quiet Night")
+        card = EventCard.objects.get(event=event)
+
+        self.assertEqual(card.category_name, "Tech")
+        self.assertFalse(card.has_tickets)
+        self.assertIsNone(card.min_price)
+        self.assertEqual((card.total_capacity, card.total_sold, card.paid_orders), (0, 0, 0))
+
+    def test_ticket_writes_update_price_range_and_capacity(self):
+        card = self.card()
+        self.assertTrue(card.has_tickets)
+        self.assertEqual((card.min_price, card.max_price, card.total_capacity), (5000, 20000, 50))
+
+        self.regular.price = 3000
+        self.regular.quantity_available = 30
+        self.regular.save()
+        card = self.card()
+        self.assertEqual((card.min_price, card.max_price, card.total_capacity), (3000, 20000, 40))
+
+        self.vip.delete()
+        card = self.card()
+        self.assertEqual((card.min_price, card.max_price, card.total_capacity), (3000, 3000, 30))
+
+        self.regular.delete()
+        self.assertFalse(self.card().has_tickets)
+
+    def test_orders_moving_in_and_out_of_paid(self):
+        self.pay(self.vip, 2)
+        order = self.pay(self.regular, 3)
+
+        card = self.card()
+        self.assertEqual((card.total_sold, card.paid_orders, card.revenue), (5, 2, 55000))
+
+        # A pending order was never counted, so deleting it changes nothing
+        make_order(self.event, self.regular, 4).delete()
+        self.assertEqual(self.card().paid_orders, 2)
+
+        order.status = "failed"
+        order.save()
+        card = self.card()
+        self.assertEqual((card.total_sold, card.paid_orders, card.revenue), (2, 1, 40000))
+
+    def test_lines_added_to_and_removed_from_a_paid_order(self):
+        order = self.pay(self.vip, 1)
+        item = OrderItem.objects.create(order=order, ticket=self.regular, quantity=2)
+        self.assertEqual(self.card().total_sold, 3)
+
+        item.delete()
+        self.assertEqual(self.card().total_sold, 1)
+
+        order.delete()
+        card = self.card()
+        self.assertEqual((card.total_sold, card.paid_orders, card.revenue), (0, 0, 0))
+
+    def test_category_rename_and_delete(self):
+        category = self.event.category
+        category.name = "Technology"
+        category.save()
+        self.assertEqual(self.card().category_name, "Technology")
+
+        category.delete()
+        self.assertEqual(self.card().category_name, "")
+
+    def test_rebuild_matches_the_live_deltas(self):
+        other = make_event(title="Abuja Jazz Night")
+        Ticket.objects.create(event=other, name="Regular", price=7000, quantity_available=20)
+
+        self.pay(self.vip, 2)
+        refunded = self.pay(self.regular, 3)
+        self.pay(self.regular, 1)
+        refunded.status = "failed"
+        refunded.save()
+        OrderItem.objects.create(order=self.pay(self.vip, 1), ticket=self.regular, quantity=2)
+        other.category.delete()
+
+        live = self.snapshot()
+        tiers = {s.ticket_id: (s.sold, s.paid_orders, s.revenue) for s in TicketSales.objects.all()}
+
+        out = io.StringIO()
+        call_command("rebuild_event_cards", stdout=out)
+
+        self.assertIn("Rebuilt 2 event cards and 3 ticket tiers", out.getvalue())
+        self.assertEqual(self.snapshot(), live)
+        self.assertEqual({s.ticket_id: (s.sold, s.paid_orders, s.revenue) for s in TicketSales.objects.all()}, tiers)
+
+
+class PaginationTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        # Seven events on the same day: only the id breaks the tie
+        self.events = [make_event(title=f"Lagos Night {i}") for i in range(7)]
+        self.events += [make_event(title=f"Lagos Day {i}", days_ahead=20) for i in range(2)]
+
+    def walk_forward(self, queryset, ordering, page_size=3):
+        pages, cursor = [], None
+        while True:
+            page = pagination.paginate(queryset, ordering, cursor=cursor, page_size=page_size)
+            pages.append(page)
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_forward_and_back_with_tied_sort_keys(self):
+        queryset = Event.objects.all()
+        expected = list(queryset.order_by("date", "id"))
+
+        pages = self.walk_forward(queryset, ("date",))
+        self.assertEqual([len(page) for page in pages], [3, 3, 3])
+        self.assertEqual([event for page in pages for event in page], expected)
+        self.assertFalse(pages[0].has_previous)
+        self.assertFalse(pages[-1].has_next)
+
+        # Back from the last page gives the same pages in reverse
+        page, backwards = pages[-1], []
+        while page.has_previous:
+            page = pagination.paginate(queryset, ("date",), cursor=page.previous_cursor, page_size=3)
+            backwards.append(page.items)
+        self.assertEqual(backwards, [pages[1].items, pages[0].items])
+        self.assertTrue(page.has_next)
+
+    def test_descending_order(self):
+        queryset = Event.objects.all()
+        pages = self.walk_forward(queryset, ("-date",), page_size=4)
+
+        self.assertEqual(
+            [event for page in pages for event in page],
+            list(queryset.order_by("-date", "-id")),
+        )
+
+    def test_bad_cursors_give_the_first_page(self):
+        first = pagination.paginate(Event.objects.all(), ("date",), page_size=3)
+        second = pagination.paginate(Event.objects.all(), ("date",), cursor=first.next_cursor, page_size=3)
+
+        cursors = [
+            "not-a-cursor",
+            first.next_cursor[:-2] + ("AA" if not first.next_cursor.endswith("AA") else "BB"),
+            signing.dumps({"v": ["2026-01-01", 1], "d": "next"}, salt="another.salt", compress=True),
+            pagination.encode_cursor(["2026-01-01"], "next"),           # wrong size
+            pagination.encode_cursor(["2026-01-01", 1], "sideways"),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                page = pagination.paginate(Event.objects.all(), ("date",), cursor=cursor, page_size=3)
+                self.assertEqual(page.items, first.items)
+                self.assertFalse(page.has_previous)
+
+        self.assertNotEqual(second.items, first.items)
+
+    def test_bad_cursor_in_the_events_list_is_not_an_error(self):
+        response = self.client.get(reverse("events_list"), {"cursor": "tampered", "format": "json"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["events"]), 9)
+
+    def test_search_results_page_in_rank_order(self):
+        # Different ranks, and ties broken by date and id
+        self.events[4].title = "Lagos Lagos Night"
+        self.events[4].save()
+        self.events[8].description = "Lagos by day"
+        self.events[8].save()
+
+        queryset = search.search_events(Event.objects.all(), "lagos")
+        expected = list(queryset)
+        self.assertEqual(len(expected), 9)
+
+        pages = self.walk_forward(queryset, ("search_rank", "date", "id"), page_size=2)
+        self.assertEqual([event for page in pages for event in page], expected)
+        self.assertEqual(expected[0], self.events[4])
+
+    def test_events_list_json(self):
+        Ticket.objects.create(event=self.events[0], name="Regular", price=5000, quantity_available=10)
+
+        response = self.client.get(reverse("events_list"), {"format": "json"})
+        data = response.json()
+
+        self.assertEqual(set(data), {"events", "next_cursor", "previous_cursor"})
+        self.assertIsNone(data["next_cursor"])
+        self.assertIsNone(data["previous_cursor"])
+        self.assertEqual(
+            set(data["events"][0]),
+            {"id", "title", "date", "venue", "city", "state", "category", "min_price", "image", "url"},
+        )
+        self.assertEqual(data["events"][0]["id"], self.events[0].pk)
+        self.assertEqual(data["events"][0]["min_price"], "5000.00")
+
+    def test_events_list_json_pages_with_cursors(self):
+        self.events += [make_event(title=f"Lagos Week {i}", days_ahead=30) for i in range(pagination.DEFAULT_PAGE_SIZE)]
+
+        seen, cursor = [], None
+        for _ in range(10):
+            params = {"format": "json"}
+            if cursor:
+                params["cursor"] = cursor
+            data = self.client.get(reverse("events_list"), params).json()
+            seen += [event["id"] for event in data["events"]]
+            cursor = data["next_cursor"]
+            if cursor is None:
+                break
+
+        self.assertEqual(seen, [event.pk for event in Event.objects.order_by("date", "id")])
+
+
+class InventoryTests(TestCase):
+
+    def setUp(self):
+        self.event = make_event()
+        self.ticket = Ticket.objects.create(
+            event=self.event, name="Regular", price=5000, quantity_available=10
+        )
+
+    def test_hold_then_commit_sells_tickets(self):
+        order = make_order(self.event, self.ticket, 3)
+        inventory.place_hold(order, self.ticket, 3)
+
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.quantity_available, 7)
+        self.assertEqual(self.ticket.quantity_sold, 0)
+
+        inventory.commit_order(order)
+
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.quantity_available, 7)
+        self.assertEqual(self.ticket.quantity_sold, 3)
+        self.assertEqual(order.holds.get().status, "converted")
+
+    def test_hold_fails_when_not_enough_left(self):
+        order = make_order(self.event, self.ticket, 11)
+
+        with self.assertRaises(inventory.InsufficientInventory):
+            inventory.place_hold(order, self.ticket, 11)
+
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.quantity_available, 10)
+        self.assertFalse(TicketHold.objects.exists())
+
+    def test_release_is_idempotent(self):
+        order = make_order(self.event, self.ticket, 4)
+        hold = inventory.place_hold(order, self.ticket, 4)
+
+        self.assertTrue(inventory.release_hold(hold))
+        self.assertFalse(inventory.release_hold(hold))
+
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.quantity_available, 10)
+
+    def test_expired_holds_are_released(self):
+        order = make_order(self.event, self.ticket, 2)
+        past = timezone.now() - datetime.timedelta(minutes=inventory.HOLD_MINUTES + 1)
+        inventory.place_hold(order, self.ticket, 2, now=past)
+
+        self.assertEqual(inventory.release_expired_holds(), 1)
+
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.quantity_available, 10)
+
+    def test_commit_after_expiry_sells_from_stock_or_fails(self):
+        order = make_order(self.event, self.ticket, 6)
+        hold = inventory.place_hold(order, self.ticket, 6)
+        inventory.release_hold(hold)
+
+        # Someone else buys most of the stock in the meantime
+        other = make_order(self.event, self.ticket, 5)
+        inventory.place_hold(other, self.ticket, 5)
+
+        with self.assertRaises(inventory.InsufficientInventory):
+            inventory.commit_order(order)
+
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.quantity_available, 5)
+        self.assertEqual(self.ticket.quantity_sold, 0)
+
+
+class InventoryConcurrencyTests(TransactionTestCase):
+    """
+    Many buyers hitting one tier at the same time must never oversell.
+    """
+
+    STOCK = 25
+    BUYERS = 12
+    ATTEMPTS = 5
+
+    def test_no_oversell_under_concurrent_holds(self):
+        event = make_event()
+        ticket = Ticket.objects.create(
+            event=event, name="Flash sale", price=1000, quantity_available=self.STOCK
+        )
+        orders = [make_order(event, ticket, 1) for _ in range(self.BUYERS)]
+
+        start = threading.Barrier(self.BUYERS)
+        won = []
+        errors = []
+
+        def buyer(order):
+            start.wait()
+            try:
+                for _ in range(self.ATTEMPTS):
+                    for _retry in range(50):
+                        try:
+                            inventory.place_hold(order, ticket, 1)
+                            won.append(order.pk)
+                        except inventory.InsufficientInventory:
+                            pass
+                        except OperationalError:
+                            # SQLite writer lock busy: try again
+                            continue
+                        break
+            except Exception as exc:  # pragma: no cover - reported below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=buyer, args=(order,)) for order in orders]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+
+        ticket.refresh_from_db()
+        held = sum(TicketHold.objects.filter(ticket=ticket).values_list("quantity", flat=True))
+
+        # Every attempt beyond the stock must have been refused
+        self.assertEqual(len(won), self.STOCK)
+        self.assertEqual(held, self.STOCK)
+        self.assertEqual(ticket.quantity_available, 0)
+
+
+class InitializePaymentTests(TestCase):
+    """
+    /pay/<id>/ sends the buyer to checkout, also again after a failure.
+    """
+
+    def setUp(self):
+        self.stub = StubPaystackServer().start()
+        self.addCleanup(self.stub.stop)
+        client = PaystackClient(base_url=self.stub.url, max_retries=0, backoff=0)
+        patcher = mock.patch.object(paystack, "get_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.event = make_event()
+        self.ticket = Ticket.objects.create(event=self.event, name="Regular", price=5000, quantity_available=10)
+        self.order = make_order(self.event, self.ticket, 2)
+        inventory.place_hold(self.order, self.ticket, 2)
+        self.client.force_login(self.order.user)
+
+    def pay(self):
+        return self.client.get(reverse("initialize_payment", args=[self.order.pk]))
+
+    def test_paid_order_is_not_sent_to_checkout_again(self):
+        fulfilment.fulfil_order(self.order)
+        reference = self.order.reference
+
+        response = self.pay()
+
+        self.assertRedirects(response, reverse("my_tickets"), fetch_redirect_response=False)
+        self.order.refresh_from_db()
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.order.status, self.order.reference), ("paid", reference))
+        self.assertEqual((self.ticket.quantity_available, self.ticket.quantity_sold), (8, 2))
+        self.assertEqual(EventCard.objects.get(event=self.event).paid_orders, 1)
+        self.assertEqual(self.stub.requests, [])
+
+    def test_failed_order_is_held_again(self):
+        fulfilment.fail_order(self.order)
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.ticket.quantity_available, 10)
+
+        response = self.pay()
+
+        self.order.refresh_from_db()
+        self.ticket.refresh_from_db()
+        self.assertEqual(response["Location"], f"{self.stub.url}/pay/{self.order.reference}")
+        self.assertEqual(self.order.status, "pending")
+        self.assertEqual(self.ticket.quantity_available, 8)
+        self.assertEqual(self.order.holds.filter(status="active").count(), 1)
+
+        # Paid through the new checkout: sold once, from the new hold
+        self.assertEqual(fulfilment.fulfil_order(self.order), fulfilment.PAID)
+        self.ticket.refresh_from_db()
+        self.assertEqual((self.ticket.quantity_available, self.ticket.quantity_sold), (8, 2))
+
+    def test_failed_order_whose_tickets_sold_out_stays_failed(self):
+        fulfilment.fail_order(self.order)
+        other = make_order(self.event, self.ticket, 9)
+        inventory.place_hold(other, self.ticket, 9)
+
+        response = self.pay()
+
+        self.assertRedirects(
+            response, reverse("event_detail", args=[self.event.pk]), fetch_redirect_response=False
+        )
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "failed")
+        self.assertFalse(self.order.holds.filter(status="active").exists())
+
+
+class PaystackClientTests(SimpleTestCase):
+    """
+    The Paystack client against a local stub server.
+    """
+
+    def setUp(self):
+        self.stub = StubPaystackServer().start()
+        self.addCleanup(self.stub.stop)
+        self.client = PaystackClient(
+            secret_key="sk_test",
+            base_url=self.stub.url,
+            timeout=(1, 0.5),
+            max_retries=2,
+            backoff=0.01,
+            breaker=CircuitBreaker(threshold=2, cooldown=60),
+        )
+
+    def test_initialize_then_verify(self):
+        data = self.client.initialize_transaction("a@b.com", 500000, "ref-1", "http://x/verify/")
+        self.assertTrue(data["authorization_url"].endswith("/pay/ref-1"))
+
+        self.stub.transactions["ref-1"]["status"] = "success"
+        self.assertEqual(self.client.verify_transaction("ref-1")["status"], "success")
+
+        metrics = self.client.metrics()
+        self.assertEqual(metrics["initialize"]["calls"], 1)
+        self.assertEqual(metrics["verify"]["calls"], 1)
+
+    def test_unknown_reference_is_an_error_not_an_outage(self):
+        with self.assertRaises(paystack.TransactionNotFound):
+            self.client.verify_transaction("missing")
+        self.assertEqual(self.client.breaker.state, "closed")
+
+    def test_rejected_calls_are_not_taken_for_unknown_references(self):
+        self.stub.fail_next(1, status=401)
+
+        with self.assertRaises(PaystackError) as ctx:
+            self.client.verify_transaction("ref-3")
+        self.assertNotIsInstance(ctx.exception, (PaystackUnavailable, paystack.TransactionNotFound))
+
+    def test_verify_is_retried_on_server_errors(self):
+        self.stub.transactions["ref-2"] = {"status": "success"}
+        self.stub.fail_next(2, status=503)
+
+        self.assertEqual(self.client.verify_transaction("ref-2")["status"], "success")
+        self.assertEqual(len(self.stub.requests), 3)
+
+    def test_initialize_is_not_retried(self):
+        self.stub.fail_next(1, status=502)
+
+        with self.assertRaises(PaystackUnavailable):
+            self.client.initialize_transaction("a@b.com", 100, "ref-3", "http://x/")
+        self.assertEqual(len(self.stub.requests), 1)
+
+    def test_read_timeout(self):
+        self.stub.delay = 1
+        self.client.max_retries = 0
+
+        with self.assertRaises(PaystackUnavailable):
+            self.client.verify_transaction("slow")
+
+    def test_breaker_opens_and_fails_fast(self):
+        self.client.max_retries = 0
+        self.stub.fail_next(2)
+
+        for _ in range(2):
+            with self.assertRaises(PaystackUnavailable):
+                self.client.verify_transaction("ref-4")
+
+        self.assertEqual(self.client.breaker.state, "open")
+        with self.assertRaises(PaystackUnavailable):
+            self.client.verify_transaction("ref-4")
+
+        # The third call never reached the server
+        self.assertEqual(len(self.stub.requests), 2)
+        self.assertEqual(self.client.metrics()["verify"]["rejected"], 1)
+
+
+class PaystackWebhookTests(TestCase):
+
+    def setUp(self):
+        self.event = make_event()
+        self.ticket = Ticket.objects.create(
+            event=self.event, name="Regular", price=5000, quantity_available=10
+        )
+        self.order = make_order(self.event, self.ticket, 2)
+        inventory.place_hold(self.order, self.ticket, 2)
+
+    def post_webhook(self, payload, secret=None):
+        body = json.dumps(payload).encode()
+        signature = hmac.new(
+            (secret or settings.PAYSTACK_SECRET_KEY).encode(), body, hashlib.sha512
+        ).hexdigest()
+        return self.client.post(
+            reverse("paystack_webhook"),
+            data=body,
+            content_type="application/json",
+            HTTP_X_PAYSTACK_SIGNATURE=signature,
+        )
+
+    def charge_success(self, amount=None):
+        return {
+            "event": "charge.success",
+            "data": {
+                "id": 1001,
+                "reference": self.order.reference,
+                "status": "success",
+                "amount": amount if amount is not None else 1000000,
+            },
+        }
+
+    def test_bad_signature_is_rejected(self):
+        response = self.post_webhook(self.charge_success(), secret="wrong")
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(PaymentEvent.objects.exists())
+
+    def test_webhook_only_enqueues(self):
+        response = self.post_webhook(self.charge_success())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(PaymentEvent.objects.get().status, "pending")
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "pending")
+
+    def test_worker_fulfils_once_for_duplicate_deliveries(self):
+        self.post_webhook(self.charge_success())
+        self.post_webhook(self.charge_success())
+        self.assertEqual(PaymentEvent.objects.count(), 1)
+
+        self.assertEqual(webhooks.process_pending_events(), 1)
+        self.assertEqual(webhooks.process_pending_events(), 0)
+
+        self.order.refresh_from_db()
+        self.ticket.refresh_from_db()
+        self.assertEqual(self.order.status, "paid")
+        self.assertEqual(self.ticket.quantity_sold, 2)
+        self.assertEqual(Attendee.objects.filter(booking_ref=self.order.reference).count(), 1)
+        self.assertEqual(PaymentEvent.objects.get().status, "done")
+
+    def test_multi_tier_order_is_one_booking(self):
+        vip = Ticket.objects.create(event=self.event, name="VIP", price=20000, quantity_available=5)
+        OrderItem.objects.create(order=self.order, ticket=vip, quantity=1)
+        inventory.place_hold(self.order, vip, 1)
+        self.order.total_amount += vip.price
+        self.order.save()
+
+        self.post_webhook(self.charge_success(amount=3000000))
+        webhooks.process_pending_events()
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "paid")
+        self.assertEqual(len(self.order.reference), 36)
+
+        attendee = Attendee.objects.get(event=self.event)
+        self.assertEqual(attendee.booking_ref, self.order.reference)
+        self.assertEqual((attendee.ticket, attendee.tickets_qty), (self.ticket, 3))
+
+    def test_amount_mismatch_is_retried_not_fulfilled(self):
+        self.post_webhook(self.charge_success(amount=100))
+        webhooks.process_pending_events()
+
+        event = PaymentEvent.objects.get()
+        self.assertEqual(event.status, "pending")
+        self.assertGreater(event.available_at, timezone.now())
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "pending")
+
+    def test_verify_payment_uses_stored_webhook(self):
+        self.post_webhook(self.charge_success())
+        self.client.force_login(self.order.user)
+
+        # No Paystack server is reachable here: the webhook must be enough
+        response = self.client.get(reverse("verify_payment"), {"reference": self.order.reference})
+
+        self.assertRedirects(
+            response,
+            reverse("payment_success") + f"?reference={self.order.reference}",
+            fetch_redirect_response=False,
+        )
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "paid")
+
+
+class ReconciliationTests(TestCase):
+    """
+    reconcile() against the local Paystack stand-in.
+    """
+
+    def setUp(self):
+        self.stub = StubPaystackServer().start()
+        self.addCleanup(self.stub.stop)
+        self.paystack = PaystackClient(base_url=self.stub.url, max_retries=0, backoff=0)
+
+        event = make_event()
+        ticket = Ticket.objects.create(event=event, name="Regular", price=1000, quantity_available=100)
+        self.orders = {}
+        for outcome in ["success", "success", "abandoned", "failed", "ongoing", None]:
+            order = make_order(event, ticket, 1)
+            inventory.place_hold(order, ticket, 1)
+            if outcome:
+                self.stub.transactions[order.reference] = {"status": outcome, "amount": 100000}
+            self.orders.setdefault(outcome, []).append(order)
+
+        self.fresh = make_order(event, ticket, 1)
+        self.backdate(Order.objects.exclude(pk=self.fresh.pk), datetime.timedelta(hours=2))
+
+    def backdate(self, orders, age):
+        placed = timezone.now() - age
+        orders.update(created_at=placed)
+        TicketHold.objects.filter(order__in=orders).update(
+            expires_at=placed + datetime.timedelta(minutes=inventory.HOLD_MINUTES)
+        )
+
+    def test_stale_orders_are_resolved(self):
+        report = reconciliation.reconcile(client=self.paystack, batch_size=2, concurrency=3)
+
+        self.assertEqual(report.checked, 6)
+        self.assertEqual(report.paid, 2)
+        self.assertEqual(report.failed, 2)  # failed, unknown reference
+        self.assertEqual(report.unchanged, 2)  # ongoing, abandoned two hours ago
+        self.assertEqual(report.errors, 0)
+
+        statuses = dict(Order.objects.values_list("reference", "status"))
+        for order in self.orders["success"]:
+            self.assertEqual(statuses[order.reference], "paid")
+        for order in self.orders["failed"] + self.orders[None]:
+            self.assertEqual(statuses[order.reference], "failed")
+        for order in self.orders["ongoing"] + self.orders["abandoned"]:
+            self.assertEqual(statuses[order.reference], "pending")
+
+        # Too recent to touch
+        self.assertEqual(statuses[self.fresh.reference], "pending")
+
+    def test_long_abandoned_checkout_is_failed(self):
+        abandoned = self.orders["abandoned"][0]
+        self.backdate(Order.objects.filter(pk=abandoned.pk), datetime.timedelta(days=2))
+
+        reconciliation.reconcile(client=self.paystack)
+
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.status, "failed")
+
+    def test_restarted_checkout_is_not_stale(self):
+        ongoing = self.orders["ongoing"][0]
+        inventory.renew_holds(ongoing)  # initialize_payment a minute ago
+
+        report = reconciliation.reconcile(client=self.paystack)
+
+        self.assertEqual(report.checked, 5)
+        self.assertNotIn(ongoing.reference, [reference for reference, _ in report.problems])
+
+    def test_paystack_errors_leave_orders_pending(self):
+        # e.g. a revoked secret key: not an answer about the payment
+        self.stub.fail_next(100, status=401)
+
+        report = reconciliation.reconcile(client=self.paystack)
+
+        self.assertEqual(report.errors, 6)
+        self.assertEqual(report.failed, 0)
+        self.assertEqual(len(report.problems), 6)
+        self.assertEqual(Order.objects.filter(status="pending").count(), 7)
+
+    def test_one_broken_order_does_not_stop_the_batch(self):
+        broken = self.orders["success"][0]
+        fulfil = fulfilment.fulfil_order
+
+        def fulfil_order(order, *args, **kwargs):
+            if order.pk == broken.pk:
+                raise ValueError("boom")
+            return fulfil(order, *args, **kwargs)
+
+        with mock.patch.object(fulfilment, "fulfil_order", fulfil_order), \
+                self.assertLogs("events.reconciliation", "ERROR"):
+            report = reconciliation.reconcile(client=self.paystack, batch_size=10)
+
+        self.assertEqual(report.errors, 1)
+        self.assertEqual(report.paid, 1)
+        self.assertEqual(report.failed, 2)
+        broken.refresh_from_db()
+        self.assertEqual(broken.status, "pending")
+        self.assertEqual(Order.objects.get(pk=self.orders["success"][1].pk).status, "paid")
+
+    def test_unreachable_paystack_leaves_orders_pending(self):
+        self.stub.fail_next(100, status=503)
+        self.paystack.breaker.threshold = 1000
+
+        report = reconciliation.reconcile(client=self.paystack)
+
+        self.assertEqual(report.unreachable, 6)
+        self.assertEqual(report.errors, 0)
+        self.assertEqual(Order.objects.filter(status="pending").count(), 7)
+
+    def test_paystack_is_not_called_inside_a_transaction(self):
+        main = connections["default"]
+        depth = len(main.atomic_blocks)  # the test's own transaction
+        depths = []
+        verify = reconciliation._verify
+
+        def slow_verify(client, reference):
+            time.sleep(0.05)
+            depths.append(len(main.atomic_blocks))
+            return verify(client, reference)
+
+        with mock.patch.object(reconciliation, "_verify", slow_verify):
+            report = reconciliation.reconcile(client=self.paystack, batch_size=3, concurrency=2)
+
+        self.assertEqual(report.checked, 6)
+        self.assertEqual(depths, [depth] * 6)
+
+
+class OrganizerDashboardTests(TestCase):
+
+    def setUp(self):
+        self.event = make_event()
+        self.organizer = self.event.organizer
+        self.ticket = Ticket.objects.create(
+            event=self.event, name="Regular", price=5000, quantity_available=100
+        )
+        self.orders = [make_order(self.event, self.ticket, 1) for _ in range(25)]
+
+    def tearDown(self):
+        dashboard.invalidate_organizer_stats(self.organizer.pk)
+
+    def test_stats_are_two_queries(self):
+        fulfilment.fulfil_order(self.orders[0])
+        EventViews.objects.create(day=timezone.localdate(), event=self.event, views=7, impressions=40)
+        dashboard.invalidate_organizer_stats(self.organizer.pk)
+
+        # Orders, then views
+        with self.assertNumQueries(2):
+            stats = dashboard.organizer_stats(self.organizer)
+
+        self.assertEqual(stats["total_events"], 1)
+        self.assertEqual(stats["total_orders"], 25)
+        self.assertEqual(stats["total_paid_orders"], 1)
+        self.assertEqual(stats["total_revenue"], 5000)
+        self.assertEqual(stats["total_views"], 7)
+        self.assertEqual(stats["total_impressions"], 40)
+
+    def test_cached_stats_are_dropped_when_an_order_is_paid(self):
+        self.assertEqual(dashboard.organizer_stats(self.organizer)["total_paid_orders"], 0)
+
+        with self.assertNumQueries(0):
+            dashboard.organizer_stats(self.organizer)
+
+        fulfilment.fulfil_order(self.orders[0])
+        self.assertEqual(dashboard.organizer_stats(self.organizer)["total_paid_orders"], 1)
+
+    def test_order_feed_is_paginated_in_constant_queries(self):
+        self.client.force_login(self.organizer.user)
+        dashboard.organizer_stats(self.organizer)  # warm the stats cache
+
+        # session + user + organizer, then orders + items + tickets
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse("org_dashboard"))
+
+        page = response.context["orders"]
+        self.assertEqual(len(page), 20)
+        self.assertTrue(page.has_next)
+
+        response = self.client.get(reverse("org_dashboard"), {"cursor": page.next_cursor})
+        self.assertEqual(len(response.context["orders"]), 5)
+
+
+class SalesRollupTests(TestCase):
+
+    def setUp(self):
+        self.event = make_event()
+        self.vip = Ticket.objects.create(event=self.event, name="VIP", price=20000, quantity_available=10)
+        self.regular = Ticket.objects.create(event=self.event, name="Regular", price=5000, quantity_available=50)
+
+    def buy(self, ticket, quantity):
+        order = make_order(self.event, ticket, quantity)
+        inventory.place_hold(order, ticket, quantity)
+        fulfilment.fulfil_order(order)
+        return order
+
+    def test_paid_orders_roll_up_per_event_and_tier(self):
+        self.buy(self.vip, 2)
+        self.buy(self.regular, 3)
+        self.buy(self.regular, 1)
+
+        card = EventCard.objects.get(event=self.event)
+        self.assertEqual((card.total_sold, card.paid_orders, card.revenue), (6, 3, 60000))
+
+        vip, regular = self.vip.sales, self.regular.sales
+        vip.refresh_from_db()
+        regular.refresh_from_db()
+        self.assertEqual((vip.sold, vip.paid_orders, vip.revenue), (2, 1, 40000))
+        self.assertEqual((regular.sold, regular.paid_orders, regular.revenue), (4, 2, 20000))
+
+    def test_leaving_paid_is_taken_off_and_matches_rebuild(self):
+        self.buy(self.vip, 2)
+        order = self.buy(self.regular, 3)
+
+        order.status = "failed"
+        order.save()
+
+        card = EventCard.objects.get(event=self.event)
+        sales = {s.ticket_id: (s.sold, s.paid_orders, s.revenue) for s in TicketSales.objects.all()}
+        self.assertEqual((card.total_sold, card.paid_orders, card.revenue), (2, 1, 40000))
+        self.assertEqual(sales[self.regular.pk], (0, 0, 0))
+
+        cards.rebuild_all_cards()
+        cards.rebuild_all_ticket_sales()
+
+        rebuilt = EventCard.objects.get(event=self.event)
+        self.assertEqual((rebuilt.total_sold, rebuilt.paid_orders, rebuilt.revenue), (2, 1, 40000))
+        self.assertEqual(
+            {s.ticket_id: (s.sold, s.paid_orders, s.revenue) for s in TicketSales.objects.all()},
+            sales,
+        )
+
+    def test_organizer_pages_do_not_query_per_event(self):
+        organizer = self.event.organizer
+        for i in range(5):
+            event = Event.objects.create(
+                organizer=organizer,
+                title=f"Event {i}",
+                date=self.event.date,
+                venue="Landmark Centre",
+            )
+            Ticket.objects.create(event=event, name="Regular", price=5000, quantity_available=10)
+
+        self.client.force_login(organizer.user)
+
+        # session + user + organizer + the page's one query
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("my_events"))
+        self.assertEqual(len(response.context["events"]), 6)
+
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse("organizer_tickets"))
+        self.assertEqual(response.context["total_tiers"], 7)
+
+
+class DailySalesTests(TestCase):
+
+    def setUp(self):
+        self.event = make_event()
+        self.ticket = Ticket.objects.create(event=self.event, name="Regular", price=5000, quantity_available=50)
+        self.today = timezone.localdate()
+
+    def buy(self, quantity):
+        order = make_order(self.event, self.ticket, quantity)
+        inventory.place_hold(order, self.ticket, quantity)
+        fulfilment.fulfil_order(order)
+        return order
+
+    def test_orders_are_appended_to_todays_bucket(self):
+        self.buy(2)
+        self.buy(1)
+        make_order(self.event, self.ticket, 4)  # placed, never paid
+
+        stats = analytics.totals(self.today, self.today, organizer=self.event.organizer)
+        self.assertEqual(stats["revenue"], 15000)
+        self.assertEqual(stats["tickets_sold"], 3)
+        self.assertEqual((stats["paid_orders"], stats["orders_placed"]), (2, 3))
+        self.assertAlmostEqual(stats["conversion"], 2 / 3)
+
+        self.assertEqual(DailySales.objects.count(), 1)
+
+    def test_reversal_and_range_queries(self):
+        order = self.buy(2)
+        order.status = "failed"
+        order.save()
+
+        week = analytics.by_day(self.today - datetime.timedelta(days=6), self.today)
+        self.assertEqual(len(week), 7)
+        self.assertEqual(week[-1]["revenue"], 0)
+        self.assertEqual(week[0]["orders_placed"], 0)
+
+        other = make_event(title="Other")
+        self.assertEqual(analytics.totals(self.today, self.today, organizer=other.organizer)["orders_placed"], 0)
+
+    def test_backfill_matches_incremental_rollup(self):
+        self.buy(2)
+        self.buy(3)
+        make_order(self.event, self.ticket, 1)
+        incremental = analytics.totals(self.today, self.today)
+
+        lines_read, buckets = analytics.backfill(chunk_size=2)
+
+        self.assertEqual((lines_read, buckets), (3, 1))
+        self.assertEqual(analytics.totals(self.today, self.today), incremental)
+
+    def test_multi_tier_order_counts_once_per_tier(self):
+        vip = Ticket.objects.create(event=self.event, name="VIP", price=20000, quantity_available=10)
+        order = make_order(self.event, self.ticket, 2)
+        OrderItem.objects.create(order=order, ticket=vip, quantity=1)
+        order.status = "paid"
+        order.save()
+
+        tiers = {row["ticket_id"]: row for row in analytics.by_tier(self.today, self.today)}
+        self.assertEqual((tiers[vip.pk]["paid_orders"], tiers[vip.pk]["revenue"]), (1, 20000))
+        self.assertEqual((tiers[self.ticket.pk]["paid_orders"], tiers[self.ticket.pk]["tickets_sold"]), (1, 2))
+
+        stats = analytics.totals(self.today, self.today)
+        self.assertEqual((stats["orders_placed"], stats["paid_orders"], stats["conversion"]), (2, 2, 1.0))
+
+        analytics.backfill()
+        self.assertEqual(analytics.totals(self.today, self.today), stats)
+
+    def test_sales_count_on_the_day_the_order_was_placed(self):
+        order = make_order(self.event, self.ticket, 2)
+        later = timezone.now() + datetime.timedelta(days=2)
+
+        with mock.patch("django.utils.timezone.now", return_value=later):
+            order.status = "paid"
+            order.save()
+        self.assertEqual(DailySales.objects.get().day, self.today)
+        self.assertEqual(analytics.totals(self.today, self.today)["paid_orders"], 1)
+
+        # Reversed later still: taken off the same bucket
+        with mock.patch("django.utils.timezone.now", return_value=later + datetime.timedelta(days=1)):
+            order.status = "failed"
+            order.save()
+        bucket = DailySales.objects.get()
+        self.assertEqual((bucket.day, bucket.paid_orders, bucket.revenue), (self.today, 0, 0))
+
+        order.status = "paid"
+        order.save()
+        live = list(DailySales.objects.values_list("day", "ticket_id", "paid_orders", "tickets_sold", "revenue"))
+        analytics.backfill()
+        self.assertEqual(
+            list(DailySales.objects.values_list("day", "ticket_id", "paid_orders", "tickets_sold", "revenue")),
+            live,
+        )
+
+
+class LedgerTests(TestCase):
+
+    def setUp(self):
+        self.event = make_event()
+        self.organizer = self.event.organizer
+        self.ticket = Ticket.objects.create(event=self.event, name="Regular", price=10000, quantity_available=50)
+
+    def buy(self, quantity):
+        order = make_order(self.event, self.ticket, quantity)
+        inventory.place_hold(order, self.ticket, quantity)
+        fulfilment.fulfil_order(order)
+        return order
+
+    def test_paid_orders_credit_the_balance_net_of_fees(self):
+        with mock.patch.object(ledger, "FEE_PERCENT", Decimal("5")):
+            self.buy(1)
+            order = self.buy(2)
+
+        balance = ledger.get_balance(self.organizer)
+        self.assertEqual((balance.available, balance.earned, balance.fees), (28500, 28500, 1500))
+
+        order.status = "failed"
+        order.save()
+        balance.refresh_from_db()
+        self.assertEqual(balance.available, 9500)
+        self.assertEqual(ledger.verify(), [])
+
+    def test_payout_request_cannot_spend_the_same_balance_twice(self):
+        self.buy(3)
+        self.client.force_login(self.organizer.user)
+
+        self.client.post(reverse("payouts"))
+        self.client.post(reverse("payouts"))
+
+        self.assertEqual(Payout.objects.count(), 1)
+        self.assertEqual(Payout.objects.get().amount, 30000)
+        self.assertEqual(ledger.get_balance(self.organizer).available, 0)
+
+        with self.assertRaises(ledger.InsufficientBalance):
+            ledger.request_payout(self.organizer, amount=1)
+
+    def test_rejected_payout_is_credited_back(self):
+        self.buy(1)
+        payout = ledger.request_payout(self.organizer)
+
+        payout.status = "rejected"
+        payout.save()
+
+        self.assertEqual(ledger.get_balance(self.organizer).available, 10000)
+        self.assertEqual(ledger.verify(), [])
+
+    def test_balance_read_is_one_query(self):
+        for _ in range(5):
+            self.buy(1)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(ledger.get_balance(self.organizer).available, 50000)
+
+    def test_verify_reports_drift(self):
+        self.buy(1)
+        Order.objects.filter(event=self.event).update(total_amount=1)
+
+        self.assertEqual(len(ledger.verify()), 1)
+
+
+class AttendeeExportTests(TestCase):
+
+    def setUp(self):
+        self.event = make_event()
+        self.ticket = Ticket.objects.create(event=self.event, name="VIP", price=20000, quantity_available=10)
+        for _ in range(3):
+            order = make_order(self.event, self.ticket, 2)
+            inventory.place_hold(order, self.ticket, 2)
+            fulfilment.fulfil_order(order)
+
+        self.client.force_login(self.event.organizer.user)
+        self.url = reverse("export_attendees", args=[self.event.pk])
+
+    def test_csv_is_streamed_with_ticket_tier(self):
+        response = self.client.get(self.url)
+
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(","), exports.HEADER)
+        self.assertEqual(len(lines), 4)
+        self.assertIn(",VIP,20000.00,2,paid,", lines[1])
+
+    def test_jsonl(self):
+        response = self.client.get(self.url, {"format": "jsonl"})
+
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]["ticket_tier"], "VIP")
+        self.assertEqual(rows[0]["tickets_qty"], 2)
+        self.assertEqual(len({row["booking_ref"] for row in rows}), 3)
+
+    def test_multi_tier_booking_has_a_row_per_tier(self):
+        regular = Ticket.objects.create(event=self.event, name="Regular", price=5000, quantity_available=10)
+        order = make_order(self.event, self.ticket, 1)
+        OrderItem.objects.create(order=order, ticket=regular, quantity=3)
+        inventory.hold_order(order)
+        fulfilment.fulfil_order(order)
+
+        response = self.client.get(self.url, {"format": "jsonl"})
+
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        booking = [row for row in rows if row["booking_ref"] == order.reference]
+        self.assertEqual(
+            [(row["ticket_tier"], row["ticket_price"], row["tickets_qty"]) for row in booking],
+            [("VIP", "20000.00", 1), ("Regular", "5000.00", 3)],
+        )
+        self.assertEqual(len(rows), 5)
+
+    def test_other_organizers_cannot_export(self):
+        other = make_event(title="Other")
+        self.client.force_login(other.organizer.user)
+
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+
+class CheckInTests(TestCase):
+
+    def setUp(self):
+        self.event = make_event()
+        self.ticket = Ticket.objects.create(event=self.event, name="Regular", price=5000, quantity_available=10)
+        self.order = make_order(self.event, self.ticket, 1)
+        inventory.place_hold(self.order, self.ticket, 1)
+        fulfilment.fulfil_order(self.order)
+
+        self.payload = checkin.qr_payload(self.event.pk, self.order.reference)
+        self.client.force_login(self.event.organizer.user)
+        self.url = reverse("check_in_scan", args=[self.event.pk])
+
+    def scan(self, payload, **extra):
+        return self.client.post(
+            self.url, json.dumps({"payload": payload, **extra}), content_type="application/json"
+        ).json()
+
+    def test_second_scan_is_refused(self):
+        first = self.scan(self.payload, gate="North")
+        second = self.scan(self.payload, gate="South")
+
+        self.assertEqual((first["result"], first["admit"]), (checkin.CHECKED_IN, True))
+        self.assertEqual((second["result"], second["admit"]), (checkin.ALREADY_CHECKED_IN, False))
+        self.assertEqual(second["gate"], "North")
+
+    def test_forged_and_foreign_codes_are_rejected(self):
+        other = make_event(title="Other")
+
+        self.assertEqual(self.scan(self.payload + "x")["result"], checkin.INVALID)
+        self.assertEqual(self.scan(checkin.qr_payload(other.pk, self.order.reference))["result"], checkin.WRONG_EVENT)
+        self.assertEqual(self.scan(checkin.qr_payload(self.event.pk, "nope"))["result"], checkin.NOT_FOUND)
+
+    def test_reversed_order_is_not_admitted_until_paid_again(self):
+        attendee = Attendee.objects.get(booking_ref=self.order.reference)
+        Attendee.objects.filter(pk=attendee.pk).update(changed_at=timezone.now() - datetime.timedelta(days=1))
+
+        # Charge reversed: the webhook/reconciler fails the paid order
+        self.assertTrue(fulfilment.set_order_status(self.order, "failed", ["paid"]))
+
+        reversed_at = Attendee.objects.get(pk=attendee.pk).changed_at
+        self.assertGreater(reversed_at, attendee.changed_at)
+        self.assertEqual(self.scan(self.payload)["result"], checkin.NOT_PAID)
+
+        # Marked paid again in the admin
+        self.order.status = "paid"
+        self.order.save()
+
+        attendee.refresh_from_db()
+        self.assertEqual(attendee.payment_status, "paid")
+        self.assertGreater(attendee.changed_at, reversed_at)
+        self.assertEqual(self.scan(self.payload)["result"], checkin.CHECKED_IN)
+
+    def test_scan_is_an_update_and_a_read(self):
+        with self.assertNumQueries(2):
+            result, _ = checkin.check_in(self.event.pk, self.payload)
+        self.assertEqual(result, checkin.CHECKED_IN)
+
+    def test_batch_applies_queued_scans_in_order(self):
+        response = self.client.post(
+            reverse("check_in_batch", args=[self.event.pk]),
+            json.dumps({"gate": "East", "scans": [
+                {"payload": self.payload, "scanned_at": "2026-05-01T18:00:00+01:00"},
+                {"payload": self.payload},
+                {"payload": "garbage"},
+            ]}),
+            content_type="application/json",
+        )
+
+        results = [r["result"] for r in response.json()["results"]]
+        self.assertEqual(results, [checkin.CHECKED_IN, checkin.ALREADY_CHECKED_IN, checkin.INVALID])
+
+        attendee = Attendee.objects.get(booking_ref=self.order.reference)
+        self.assertEqual(attendee.check_in_gate, "East")
+        self.assertEqual(attendee.checked_in_at.isoformat(), "2026-05-01T17:00:00+00:00")
+
+    def test_multi_tier_order_is_one_code_for_all_its_tickets(self):
+        vip = Ticket.objects.create(event=self.event, name="VIP", price=20000, quantity_available=5)
+        order = make_order(self.event, self.ticket, 2)
+        OrderItem.objects.create(order=order, ticket=vip, quantity=1)
+        inventory.place_hold(order, self.ticket, 2)
+        inventory.place_hold(order, vip, 1)
+        self.assertEqual(fulfilment.fulfil_order(order), fulfilment.PAID)
+
+        # The code the buyer sees on their tickets page
+        buyer = Client()
+        buyer.force_login(order.user)
+        [shown] = buyer.get(reverse("my_tickets")).context["orders"]
+        self.assertEqual(shown.qr_payload, checkin.qr_payload(self.event.pk, order.reference))
+
+        first = self.scan(shown.qr_payload, gate="North")
+        second = self.scan(shown.qr_payload)
+
+        self.assertEqual((first["result"], first["tickets"]), (checkin.CHECKED_IN, 3))
+        self.assertEqual(second["result"], checkin.ALREADY_CHECKED_IN)
+
+    def test_only_the_organizer_can_scan(self):
+        other = make_event(title="Other")
+        self.client.force_login(other.organizer.user)
+
+        response = self.client.post(self.url, json.dumps({"payload": self.payload}), content_type="application/json")
+        self.assertEqual(response.status_code, 404)
+
+
+class GateManifestTests(TestCase):
+
+    def setUp(self):
+        self.event = make_event()
+        self.ticket = Ticket.objects.create(event=self.event, name="VIP", price=5000, quantity_available=10)
+        self.order = make_order(self.event, self.ticket, 1)
+        inventory.place_hold(self.order, self.ticket, 1)
+        fulfilment.fulfil_order(self.order)
+
+        self.key = gate_manifest.gate_key(self.event.pk)
+        self.client.force_login(self.event.organizer.user)
+
+    def download(self, since=0):
+        response = self.client.get(reverse("gate_manifest", args=[self.event.pk]), {"since": since})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Gate-Key"], self.key.hex())
+        return gate_manifest.read(response.content, self.key), int(response["X-Manifest-Version"])
+
+    def test_full_manifest_admits_paid_attendees(self):
+        manifest, version = self.download()
+
+        self.assertEqual(manifest["event_id"], self.event.pk)
+        self.assertEqual(manifest["version"], version)
+        self.assertEqual(gate_manifest.lookup(manifest, self.key, self.order.reference), "VIP")
+        self.assertIsNone(gate_manifest.lookup(manifest, self.key, "NOPE"))
+
+    def test_tampered_manifest_is_rejected(self):
+        data, _ = gate_manifest.build(self.event)
+        tampered = data[:-40] + bytes([data[-40] ^ 1]) + data[-39:]
+
+        with self.assertRaises(gate_manifest.InvalidManifest):
+            gate_manifest.read(tampered, self.key)
+        with self.assertRaises(gate_manifest.InvalidManifest):
+            gate_manifest.read(data, gate_manifest.gate_key(self.event.pk + 1))
+
+    def test_delta_carries_only_changes(self):
+        _, version = self.download()
+        # Push existing rows out of the overlap window, as if bought last week
+        Attendee.objects.update(changed_at=timezone.now() - datetime.timedelta(days=7))
+        _, version = self.download()
+
+        late = make_order(self.event, self.ticket, 1)
+        inventory.place_hold(late, self.ticket, 1)
+        fulfilment.fulfil_order(late)
+
+        # Charge reversed
+        fulfilment.set_order_status(self.order, "failed", ["paid"])
+
+        delta, new_version = self.download(since=version)
+
+        self.assertGreater(new_version, version)
+        self.assertEqual(delta["hashes"], [gate_manifest.ref_hash(self.key, late.reference)])
+        self.assertEqual(delta["removed"], [gate_manifest.ref_hash(self.key, self.order.reference)])
+
+    def test_delta_revokes_deleted_attendees(self):
+        Attendee.objects.update(changed_at=timezone.now() - datetime.timedelta(days=7))
+        _, version = self.download()
+
+        Attendee.objects.get(booking_ref=self.order.reference).delete()
+
+        delta, new_version = self.download(since=version)
+
+        self.assertGreater(new_version, version)
+        self.assertEqual(delta["hashes"], [])
+        self.assertEqual(delta["removed"], [gate_manifest.ref_hash(self.key, self.order.reference)])
+
+        report = gate_manifest.merge_check_ins(self.event, [{"booking_ref": self.order.reference}])
+        self.assertEqual((report["revoked"], report["unknown"]), (1, 0))
+
+        # Nothing to revoke once the event itself is gone
+        self.event.delete()
+        self.assertFalse(RemovedBooking.objects.exists())
+
+    def test_offline_check_ins_are_merged_earliest_first(self):
+        response = self.client.post(
+            reverse("gate_manifest_check_ins", args=[self.event.pk]),
+            json.dumps({"gate": "North", "check_ins": [
+                {"booking_ref": self.order.reference, "scanned_at": "2026-05-01T18:30:00+00:00"},
+                {"booking_ref": self.order.reference, "scanned_at": "2026-05-01T18:00:00+00:00", "gate": "South"},
+                {"booking_ref": "UNKNOWN"},
+            ]}),
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.json(), {"merged": 1, "already": 0, "duplicates": 1, "revoked": 0, "unknown": 1})
+        attendee = Attendee.objects.get(booking_ref=self.order.reference)
+        self.assertEqual(attendee.check_in_gate, "South")
+        self.assertEqual(attendee.checked_in_at.isoformat(), "2026-05-01T18:00:00+00:00")
+
+        # A later upload of a later scan doesn't move the check-in
+        report = gate_manifest.merge_check_ins(
+            self.event, [{"booking_ref": self.order.reference, "scanned_at": "2026-05-01T19:00:00+00:00"}]
+        )
+        self.assertEqual(report["already"], 1)
+
+    def test_offline_scans_of_revoked_tickets_are_not_merged(self):
+        fulfilment.set_order_status(self.order, "failed", ["paid"])
+        revoked = Attendee.objects.get(booking_ref=self.order.reference)
+
+        report = gate_manifest.merge_check_ins(self.event, [
+            {"booking_ref": self.order.reference, "scanned_at": "2026-05-01T18:00:00+00:00"},
+            {"booking_ref": "UNKNOWN"},
+        ])
+
+        self.assertEqual(report, {"merged": 0, "already": 0, "duplicates": 0, "revoked": 1, "unknown": 1})
+        revoked.refresh_from_db()
+        self.assertIsNone(revoked.checked_in_at)
+
+
+class ImageDerivativeTests(TestCase):
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def upload(self, width=2000, height=1000, mode="RGB", name="party.png"):
+        buffer = io.BytesIO()
+        Image.new(mode, (width, height), "red").save(buffer, "PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+    def event_with_image(self, **image):
+        event = make_event(image=self.upload(**image))
+        jobs.run_pending()
+        event.refresh_from_db()
+        return event
+
+    def test_upload_builds_every_size_in_both_formats(self):
+        event = make_event(image=self.upload())
+        self.assertEqual(Job.objects.get().name, "images.refresh")
+        self.assertEqual(jobs.run_pending(), 1)
+        event.refresh_from_db()
+
+        derivatives = event.image_derivatives
+        self.assertEqual(derivatives["source"], event.image.name)
+        self.assertEqual({size: entry["width"] for size, entry in derivatives["sizes"].items()},
+                         {"thumb": 160, "card": 640, "hero": 1600})
+
+        card = derivatives["sizes"]["card"]
+        with event.image.storage.open(card["webp"]) as f:
+            self.assertEqual((Image.open(f).format, Image.open(f).size), ("WEBP", (640, 320)))
+        with event.image.storage.open(card["jpeg"]) as f:
+            self.assertEqual(Image.open(f).format, "JPEG")
+
+    def test_new_derivatives_invalidate_cached_event_pages(self):
+        make_event(image=self.upload())
+        before = sections.versions([sections.EVENTS])
+
+        jobs.run_pending()
+
+        self.assertGreater(sections.versions([sections.EVENTS])[0], before[0])
+
+    def test_profile_pictures_get_no_derivative_jobs(self):
+        Profile.objects.create(user=User.objects.create_user("pic"), profile_pic=self.upload(name="me.png"))
+
+        self.assertFalse(Job.objects.filter(name="images.refresh").exists())
+
+    def test_names_are_content_hashed_and_never_upscaled(self):
+        small = self.event_with_image(width=300, height=200, mode="RGBA")
+        same = self.event_with_image(width=300, height=200, mode="RGBA")
+
+        small_sizes = small.image_derivatives["sizes"]
+        self.assertEqual(small_sizes["hero"]["width"], 300)
+        self.assertEqual(small_sizes["thumb"]["width"], 160)
+        # Same bytes → same hash in both names, even though the originals differ
+        self.assertEqual(
+            small_sizes["card"]["jpeg"].split(".")[1],
+            same.image_derivatives["sizes"]["card"]["jpeg"].split(".")[1],
+        )
+
+    def test_picture_tag_renders_srcset(self):
+        event = self.event_with_image()
+        html = Template('{% load images %}{% picture event.image "card" class="w-100" alt=event.title %}').render(
+            Context({"event": event})
+        )
+
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn(".thumb.webp 160w", html)
+        self.assertIn(".hero.jpg 1600w", html)
+        self.assertIn('src="/media/' + event.image_derivatives["sizes"]["card"]["jpeg"], html)
+        self.assertIn('alt="Lagos Tech Fest"', html)
+
+    def test_backfill_builds_missing_derivatives(self):
+        event = make_event(image=self.upload())
+        Event.objects.filter(pk=event.pk).update(image_derivatives={})
+
+        html = Template("{% load images %}{% picture event.image %}").render(
+            Context({"event": Event.objects.get(pk=event.pk)})
+        )
+        self.assertEqual(html, f'<img alt="" decoding="async" loading="lazy" src="{event.image.url}">')
+
+        call_command("build_image_derivatives", stdout=io.StringIO())
+        event.refresh_from_db()
+        self.assertEqual(event.image_derivatives["source"], event.image.name)
+
+
+class JobQueueTests(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(jobs.REGISTRY)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.calls = []
+
+        @jobs.job("test.record")
+        def record(value):
+            self.calls.append(value)
+
+        @jobs.job("test.flaky", max_attempts=2, retry_delay=datetime.timedelta(seconds=10))
+        def flaky():
+            raise RuntimeError("boom")
+
+    def test_job_runs_once_and_is_counted(self):
+        jobs.enqueue("test.record", value=1)
+
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(jobs.run_pending(), 0)
+        self.assertEqual(self.calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+        stats = jobs.metrics()["test.record"]
+        self.assertEqual((stats["succeeded"], stats["failed"], stats["queued"]), (1, 0, 0))
+
+    def test_delayed_job_waits(self):
+        jobs.enqueue("test.record", delay=datetime.timedelta(minutes=5), value=2)
+
+        self.assertEqual(jobs.run_pending(), 0)
+        self.assertEqual(jobs.metrics()["test.record"]["queued"], 1)
+        self.assertEqual(jobs.run_pending(now=timezone.now() + datetime.timedelta(minutes=6)), 1)
+        self.assertEqual(self.calls, [2])
+
+    def test_failing_job_backs_off_then_goes_to_dead_letter(self):
+        jobs.enqueue("test.flaky")
+
+        jobs.run_pending()
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.attempts), ("pending", 1))
+        self.assertGreater(job.available_at, timezone.now() + datetime.timedelta(seconds=5))
+        self.assertEqual(jobs.run_pending(), 0)
+
+        jobs.run_pending(now=timezone.now() + datetime.timedelta(seconds=11))
+        self.assertFalse(Job.objects.exists())
+        dead = DeadJob.objects.get()
+        self.assertEqual((dead.name, dead.attempts), ("test.flaky", 2))
+        self.assertIn("boom", dead.last_error)
+
+        stats = jobs.metrics()["test.flaky"]
+        self.assertEqual((stats["succeeded"], stats["failed"], stats["dead"]), (0, 1, 1))
+
+        self.assertEqual(jobs.requeue(DeadJob.objects.all()), 1)
+        self.assertEqual(Job.objects.get().attempts, 0)
+        self.assertFalse(DeadJob.objects.exists())
+
+    def test_unknown_names_are_refused_or_buried(self):
+        with self.assertRaises(jobs.UnknownJob):
+            jobs.enqueue("test.missing")
+
+        Job.objects.create(name="test.removed")
+        jobs.run_pending()
+        self.assertEqual(DeadJob.objects.get().name, "test.removed")
+
+    def test_job_stuck_on_a_dead_worker_is_picked_up_again(self):
+        job = jobs.enqueue("test.record", value=3)
+        Job.objects.filter(pk=job.pk).update(
+            status="processing", attempts=1, locked_at=timezone.now() - jobs.STALE_LOCK * 2
+        )
+
+        self.assertEqual(jobs.run_pending(), 1)
+        self.assertEqual(self.calls, [3])
+
+    def test_lock_counts_from_when_the_job_starts(self):
+        later = timezone.now() + jobs.STALE_LOCK * 2
+
+        @jobs.job("test.steal")
+        def steal():
+            # Another worker looking for stale jobs while this one runs
+            self.calls.append(jobs.claim(now=later + datetime.timedelta(seconds=1), worker="other"))
+
+        jobs.enqueue("test.steal")
+        claimed, = jobs.claim()
+
+        # Started late (queued behind long jobs): its lock is fresh anyway
+        with mock.patch.object(timezone, "now", return_value=later):
+            self.assertTrue(jobs.run(claimed))
+        self.assertEqual(self.calls, [[]])
+
+    def test_job_taken_over_while_waiting_is_skipped(self):
+        jobs.enqueue("test.record", value=1)
+        claimed, = jobs.claim()
+
+        taken, = jobs.claim(now=timezone.now() + jobs.STALE_LOCK * 2, worker="other")
+
+        self.assertFalse(jobs.run(claimed))
+        self.assertEqual(self.calls, [])
+        self.assertTrue(jobs.run(taken))
+        self.assertEqual(self.calls, [1])
+
+
+class PaymentVerifyJobTests(TestCase):
+
+    def setUp(self):
+        self.stub = StubPaystackServer().start()
+        self.addCleanup(self.stub.stop)
+        client = PaystackClient(base_url=self.stub.url, max_retries=0, backoff=0)
+        patcher = mock.patch.object(paystack, "get_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        event = make_event()
+        ticket = Ticket.objects.create(event=event, name="Regular", price=1000, quantity_available=10)
+        self.order = make_order(event, ticket, 1)
+        inventory.place_hold(self.order, ticket, 1)
+        self.stub.transactions[self.order.reference] = {"status": "success", "amount": 100000}
+
+    def test_unreachable_paystack_is_retried_in_the_background(self):
+        self.stub.fail_next(1, status=503)
+        self.client.force_login(self.order.user)
+
+        response = self.client.get(reverse("verify_payment"), {"reference": self.order.reference})
+
+        self.assertRedirects(response, reverse("payment_failed"), fetch_redirect_response=False)
+        job = Job.objects.get()
+        self.assertEqual((job.name, job.kwargs), ("payments.verify", {"reference": self.order.reference}))
+
+        jobs.run_pending(now=timezone.now() + datetime.timedelta(minutes=2))
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "paid")
+        self.assertFalse(Job.objects.exists())
+
+    def test_unreadable_answer_leaves_the_order_pending(self):
+        # e.g. a wrong secret key: Paystack answers 401
+        self.stub.fail_next(1, status=401)
+        self.client.force_login(self.order.user)
+
+        response = self.client.get(reverse("verify_payment"), {"reference": self.order.reference})
+
+        self.assertRedirects(response, reverse("payment_failed"), fetch_redirect_response=False)
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "pending")
+        self.assertTrue(self.order.holds.filter(status="active").exists())
+        self.assertEqual(Job.objects.get().name, "payments.verify")
+
+    def test_checkout_still_open_leaves_the_order_pending(self):
+        self.stub.transactions[self.order.reference]["status"] = "ongoing"
+        self.client.force_login(self.order.user)
+
+        self.client.get(reverse("verify_payment"), {"reference": self.order.reference})
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "pending")
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_unknown_reference_fails_the_order(self):
+        del self.stub.transactions[self.order.reference]
+        self.client.force_login(self.order.user)
+
+        self.client.get(reverse("verify_payment"), {"reference": self.order.reference})
+
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.status, "failed")
+        self.assertFalse(self.order.holds.filter(status="active").exists())
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(
+    REQUEST_METRICS_SAMPLE_RATE=1.0, REQUEST_METRICS_SLOW_MS=10_000, REQUEST_METRICS_SERVER_TIMING=True
+)
+class RequestMetricsTests(TestCase):
+
+    def setUp(self):
+        self.events = [make_event(title=f"Event {i}") for i in range(3)]
+
+    def n_plus_one_view(self, request):
+        # One lookup per event: the pattern the middleware should expose
+        titles = [Event.objects.filter(pk=event.pk).first().title for event in self.events]
+        html = engines["django"].from_string("{% for t in titles %}{{ t }}{% endfor %}").render({"titles": titles})
+        return HttpResponse(html)
+
+    def timing(self, response):
+        return dict(
+            (part.split(";")[0], part) for part in response["Server-Timing"].split(", ")
+        )
+
+    def test_server_timing_reports_queries_and_templates(self):
+        response = RequestMetricsMiddleware(self.n_plus_one_view)(RequestFactory().get("/"))
+
+        timing = self.timing(response)
+        self.assertIn('desc="3 queries (2 similar)"', timing["db"])
+        self.assertIn("tpl;dur=", timing["tpl"])
+        self.assertIn("total;dur=", timing["total"])
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0.0)
+    def test_unsampled_requests_only_get_total_time(self):
+        response = RequestMetricsMiddleware(self.n_plus_one_view)(RequestFactory().get("/"))
+
+        self.assertEqual(list(self.timing(response)), ["total"])
+
+    @override_settings(REQUEST_METRICS_MAX_SIMILAR=2)
+    def test_repeated_queries_are_logged(self):
+        with self.assertLogs("events.requests", "WARNING") as logs:
+            RequestMetricsMiddleware(self.n_plus_one_view)(RequestFactory().get("/some/page/"))
+
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual((entry["path"], entry["queries"], entry["similar_queries"]), ("/some/page/", 3, 2))
+        self.assertEqual(entry["repeated"][0]["count"], 3)
+
+    def test_fingerprint_collapses_literals(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM "t" WHERE "t"."id" IN (%s, %s, %s) LIMIT 21'),
+            'SELECT * FROM "t" WHERE "t"."id" IN (...) LIMIT ?',
+        )
+
+    @override_settings(REQUEST_METRICS_SERVER_TIMING=False, REQUEST_METRICS_MAX_SIMILAR=2)
+    def test_header_can_be_off_without_turning_off_the_log(self):
+        with self.assertLogs("events.requests", "WARNING"):
+            response = RequestMetricsMiddleware(self.n_plus_one_view)(RequestFactory().get("/"))
+
+        self.assertNotIn("Server-Timing", response)
+
+    def test_real_pages_carry_the_header(self):
+        response = self.client.get(reverse("events_list"))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("db;dur=", response["Server-Timing"])
+
+
+class BudgetData:
+    """
+    A realistic spread of data for QueryBudgetTests: an organizer with
+    upcoming and past events, several ticket tiers each, and a buyer with
+    paid orders, attendees and saved events. grow() adds more of
+    everything, so a view whose query count depends on data size shows up.
+    """
+
+    def __init__(self):
+        self.categories = [Category.objects.create(name=name) for name in ["Tech", "Music", "Food"]]
+
+        owner = User.objects.create_user(username="budget-org", email="org@example.com")
+        self.organizer = Organizer.objects.create(user=owner, organization_name="Budget Events")
+
+        self.buyer = User.objects.create_user(username="budget-buyer", email="buyer@example.com")
+        Profile.objects.create(user=self.buyer)
+
+        self.events = []
+        self.paid_orders = []
+        self.pending_orders = []
+
+    def grow(self, count):
+        for i in range(count):
+            n = len(self.events)
+            event = Event.objects.create(
+                organizer=self.organizer,
+                category=self.categories[n % len(self.categories)],
+                title=f"Budget event {n}",
+                # Mostly upcoming, every third one in the past
+                date=timezone.now().date() + datetime.timedelta(days=-5 if n % 3 == 2 else 5 + n),
+                state="lagos",
+            )
+            tiers = [
+                Ticket.objects.create(event=event, name=name, price=price, quantity_available=500)
+                for name, price in [("Regular", 2000), ("VIP", 10000), ("Table", 50000)]
+            ]
+            self.events.append(event)
+
+            for tier in tiers[:2]:
+                order = make_order(event, tier, 2, user=self.buyer)
+                inventory.place_hold(order, tier, 2)
+                fulfilment.fulfil_order(order)
+                self.paid_orders.append(order)
+
+            self.pending_orders.append(make_order(event, tiers[2], 1, user=self.buyer))
+            SavedEvent.objects.create(user=self.buyer, event=event)
+
+
+def _event(data):
+    return {"args": [data.events[0].pk]}
+
+
+# Every route in events/urls.py: (url name, how to call it, {role: max queries}).
+# GET for everything; POST-only routes answer 405 without touching the data.
+QUERY_BUDGETS = [
+    ("home", {}, {"anonymous": 4, "user": 7, "organizer": 7}),
+    ("signup", {}, {"anonymous": 0, "user": 0, "organizer": 0}),
+    ("dashboard", {}, {"anonymous": 0, "user": 6, "organizer": 3}),
+    ("logout", {}, {"anonymous": 0, "user": 4, "organizer": 4}),
+    ("user_login", {}, {"anonymous": 0, "user": 0, "organizer": 0}),
+    ("organizer_signup", {}, {"anonymous": 0, "user": 0, "organizer": 0}),
+    ("organizer_login", {}, {"anonymous": 0, "user": 0, "organizer": 0}),
+    ("org_dashboard", {}, {"anonymous": 0, "user": 3, "organizer": 8}),
+    ("organizer_logout", {}, {"anonymous": 0, "user": 4, "organizer": 4}),
+    ("create_event", {}, {"anonymous": 0, "user": 3, "organizer": 4}),
+    ("event_detail", _event, {"anonymous": 4, "user": 8, "organizer": 8}),
+    ("events_list", {}, {"anonymous": 4, "user": 7, "organizer": 7}),
+    ("booking_confirm", _event, {"anonymous": 0, "user": 4, "organizer": 4}),
+    ("initialize_payment", lambda data: {"args": [data.pending_orders[0].pk]},
+     {"anonymous": 0, "user": 5, "organizer": 3}),
+    ("verify_payment", lambda data: {"query": {"reference": data.paid_orders[0].reference}},
+     {"anonymous": 0, "user": 3, "organizer": 3}),
+    ("paystack_webhook", {}, {"anonymous": 0, "user": 0, "organizer": 0}),
+    ("payment_success", lambda data: {"query": {"reference": data.paid_orders[0].reference}},
+     {"anonymous": 1, "user": 1, "organizer": 1}),
+    ("payment_failed", {}, {"anonymous": 0, "user": 0, "organizer": 0}),
+    ("my_events", {}, {"anonymous": 0, "user": 3, "organizer": 4}),
+    ("edit_event", _event, {"anonymous": 0, "user": 3, "organizer": 6}),
+    ("delete_event", _event, {"anonymous": 0, "user": 3, "organizer": 4}),
+    ("export_attendees", _event, {"anonymous": 0, "user": 3, "organizer": 6}),
+    ("check_in_scan", _event, {"anonymous": 0, "user": 2, "organizer": 2}),
+    ("check_in_batch", _event, {"anonymous": 0, "user": 2, "organizer": 2}),
+    ("gate_manifest", _event, {"anonymous": 0, "user": 3, "organizer": 7}),
+    ("gate_manifest_check_ins", _event, {"anonymous": 0, "user": 2, "organizer": 2}),
+    ("organizer_profile", {}, {"anonymous": 0, "user": 3, "organizer": 3}),
+    ("organizer_tickets", {}, {"anonymous": 0, "user": 3, "organizer": 4}),
+    ("payouts", {}, {"anonymous": 0, "user": 3, "organizer": 6}),
+    ("upcoming_events", {}, {"anonymous": 0, "user": 3, "organizer": 3}),
+    ("my_tickets", {}, {"anonymous": 0, "user": 5, "organizer": 3}),
+    ("past_events", {}, {"anonymous": 0, "user": 3, "organizer": 3}),
+    ("saved_events", {}, {"anonymous": 0, "user": 3, "organizer": 3}),
+    ("edit_profile", {}, {"anonymous": 0, "user": 2, "organizer": 2}),
+    ("toggle_save_event", _event, {"anonymous": 0, "user": 6, "organizer": 6}),
+    ("newsletter_subscribe", {}, {"anonymous": 0, "user": 0, "organizer": 0}),
+    ("about", {}, {"anonymous": 1, "user": 4, "organizer": 4}),
+    ("contact", {}, {"anonymous": 1, "user": 4, "organizer": 4}),
+]
+
+
+@override_settings(REQUEST_METRICS_SAMPLE_RATE=0.0)
+class QueryBudgetTests(TestCase):
+    """
+    Every route, as every kind of visitor, stays within its query budget,
+    and runs the same number of queries with 3x the data (no N+1).
+    """
+
+    SMALL, LARGE = 3, 9
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = BudgetData()
+        cls.data.grow(cls.SMALL)
+
+    def setUp(self):
+        # initialize_payment talks to Paystack
+        client = mock.Mock()
+        client.initialize_transaction.return_value = {"authorization_url": "https://checkout.example/x"}
+        patcher = mock.patch.object(paystack, "get_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def login(self, role):
+        self.client.logout()
+        if role == "user":
+            self.client.force_login(self.data.buyer)
+        elif role == "organizer":
+            self.client.force_login(self.data.organizer.user)
+
+    def count_queries(self, name, call, role):
+        call = call(self.data) if callable(call) else call
+        self.login(role)
+        # Budgets are for cold dashboard/section caches (the worst case)
+        cache.clear()
+
+        url = reverse(name, args=call.get("args", []))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, call.get("query", {}))
+            if hasattr(response, "streaming_content"):
+                b"".join(response.streaming_content)
+        return len(queries), response.status_code
+
+    def measure(self):
+        return {
+            (name, role): self.count_queries(name, call, role)
+            for name, call, budgets in QUERY_BUDGETS
+            for role in budgets
+        }
+
+    def test_every_route_has_a_budget(self):
+        routes = {pattern.name for pattern in urls.urlpatterns}
+        self.assertEqual(routes - {name for name, _, _ in QUERY_BUDGETS}, set())
+
+    def test_views_stay_within_budget_and_do_not_grow_with_data(self):
+        small = self.measure()
+        self.data.grow(self.LARGE - self.SMALL)
+        large = self.measure()
+
+        for name, _, budgets in QUERY_BUDGETS:
+            for role, budget in budgets.items():
+                with self.subTest(view=name, role=role):
+                    queries, status = small[name, role]
+                    self.assertLess(status, 500)
+                    self.assertLessEqual(queries, budget)
+                    self.assertEqual(
+                        large[name, role][0], queries,
+                        f"{name} ({role}) ran {queries} queries with {self.SMALL} events "
+                        f"and {large[name, role][0]} with {self.LARGE}",
+                    )
+
+
+class SeedingTests(TestCase):
+    anchor = datetime.date(2026, 3, 1)
+
+    def seed(self, **options):
+        options = {"scale": 0.005, "seed": 3, "anchor": self.anchor, **options}
+        call_command("seed_pointa", stdout=io.StringIO(), **options)
+
+    def snapshot(self):
+        return list(
+            Order.objects.order_by("reference")
+            .values_list("reference", "status", "total_amount", "created_at", "event__title", "user__username")
+        )
+
+    def test_seeded_data_is_consistent(self):
+        self.seed()
+
+        self.assertEqual(Event.objects.count(), 20)
+        self.assertEqual(User.objects.filter(username__startswith="seed3-user").count(), 100)
+        self.assertEqual(Profile.objects.count(), 100)
+        self.assertTrue(Order.objects.filter(status="paid").exists())
+        self.assertTrue(Order.objects.filter(status="failed").exists())
+
+        # What signals and services would have produced
+        self.assertEqual(ledger.verify(), [])
+        self.assertEqual(EventCard.objects.count(), 20)
+        self.assertEqual(
+            Attendee.objects.count(),
+            Order.objects.filter(status="paid").count(),
+        )
+        for ticket in Ticket.objects.all():
+            sold = sum(
+                OrderItem.objects.filter(ticket=ticket, order__status="paid").values_list("quantity", flat=True)
+            )
+            self.assertEqual(ticket.quantity_sold, sold)
+        self.assertFalse(Order.objects.filter(created_at__date__gt=self.anchor).exists())
+
+    def test_same_seed_gives_same_data(self):
+        self.seed()
+        first = self.snapshot()
+        User.objects.filter(username__startswith="seed3-").delete()
+        self.seed()
+
+        self.assertEqual(self.snapshot(), first)
+
+        User.objects.filter(username__startswith="seed3-").delete()
+        self.seed(seed=4)
+        self.assertNotEqual(self.snapshot(), first)
+
+    def test_seed_is_not_loaded_twice(self):
+        self.seed()
+
+        with self.assertRaises(CommandError):
+            self.seed()
+
+
+class FlowBenchmarkTests(TestCase):
+
+    def setUp(self):
+        event = make_event()
+        Ticket.objects.create(event=event, name="Regular", price=5000, quantity_available=100)
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.output = f"{directory}/results.json"
+
+    def result(self, endpoints):
+        return {"mode": "client", "workers": 1, "concurrency": 1, "endpoints": endpoints}
+
+    def endpoint(self, p95=10.0, rps=100.0, queries=5.0, errors=0):
+        return {"p95_ms": p95, "rps": rps, "queries": queries, "errors": errors}
+
+    def test_client_run_covers_the_flow_and_leaves_nothing_behind(self):
+        orders = Order.objects.count()
+
+        call_command(
+            "benchmark_flows", iterations=2, warmup=0, output=self.output, stdout=io.StringIO(),
+        )
+
+        with open(self.output) as f:
+            report = json.load(f)
+        endpoints = report["endpoints"]
+        for name in ["home", "events_list[all]", "events_list[combined]", "event_detail",
+                     "booking_confirm", "initialize_payment", "verify_payment", "org_dashboard", "payouts"]:
+            self.assertEqual(endpoints[name]["errors"], 0, name)
+            self.assertIsNotNone(endpoints[name]["queries"])
+        self.assertEqual(endpoints["verify_payment"]["requests"], 2)
+        self.assertEqual(endpoints["event_detail"]["requests"], 4)
+
+        self.assertEqual(Order.objects.count(), orders)
+        self.assertFalse(User.objects.filter(username__startswith=benchmarks.BENCH_PREFIX).exists())
+
+    def test_compare_with_baseline(self):
+        baseline = self.result({"home": self.endpoint(), "event_detail": self.endpoint()})
+
+        self.assertEqual(benchmarks.compare(baseline, baseline), [])
+        # Small absolute changes are noise
+        self.assertEqual(benchmarks.compare(self.result({"home": self.endpoint(p95=10.9)}), baseline), [])
+
+        problems = benchmarks.compare(
+            self.result({
+                "home": self.endpoint(p95=15.0, queries=6.0),
+                "event_detail": self.endpoint(rps=50.0, errors=1),
+            }),
+            baseline,
+        )
+        self.assertEqual(len(problems), 4)
+        self.assertIn("home: p95 10.0ms → 15.0ms", problems)
+
+        other_mode = dict(baseline, mode="server")
+        self.assertIn("mode differs", benchmarks.compare(other_mode, baseline)[0])
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        self.assertEqual(benchmarks.percentile(values, 0.5), 50)
+        self.assertEqual(benchmarks.percentile(values, 0.95), 95)
+        self.assertEqual(benchmarks.percentile(values, 0.99), 99)
+        self.assertEqual(benchmarks.percentile([7], 0.99), 7)
+        self.assertEqual(benchmarks.percentile([], 0.5), 0.0)
+
+
+class SectionCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.event = make_event()
+        self.ticket = Ticket.objects.create(event=self.event, name="Regular", price=5000, quantity_available=50)
+
+    def get_home(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("home"))
+        return response, len(queries)
+
+    def test_home_sections_are_served_from_the_cache_until_events_change(self):
+        _, cold = self.get_home()
+        response, warm = self.get_home()
+
+        self.assertEqual(warm, 0)
+        self.assertLess(warm, cold)
+        self.assertContains(response, "Lagos Tech Fest")
+
+        make_event(title="Abuja Jazz Night")
+        response, queries = self.get_home()
+
+        self.assertContains(response, "Abuja Jazz Night")
+        self.assertGreater(queries, 0)
+
+    def test_orders_only_invalidate_sales_sections(self):
+        before = sections.versions([sections.EVENTS, sections.SALES])
+
+        order = make_order(self.event, self.ticket, 2)
+        after_create = sections.versions([sections.EVENTS, sections.SALES])
+        order.status = "paid"
+        order.save()
+
+        self.assertEqual(after_create[0], before[0])
+        self.assertGreater(after_create[1], before[1])
+        self.assertGreater(sections.versions([sections.SALES])[0], after_create[1])
+
+    def test_versions_are_bumped_again_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Category.objects.create(name="Music")
+            inside = sections.versions([sections.CATEGORIES])
+
+        self.assertGreater(sections.versions([sections.CATEGORIES])[0], inside[0])
+
+    def test_parameters_are_normalized(self):
+        self.assertEqual(
+            sections.section_key("list", {"location": ["lagos", "abuja"], "q": " jazz ", "city": ""}),
+            sections.section_key("list", {"q": "jazz", "location": ["abuja", "lagos"]}),
+        )
+        self.assertNotEqual(
+            sections.section_key("list", {"category": "1"}),
+            sections.section_key("list", {"category": "2"}),
+        )
+
+    def test_only_one_worker_recomputes_a_missing_section(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "value"
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(sections.cached("slow", [sections.EVENTS], compute)))
+            for _ in range(6)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["value"] * 6)
+        self.assertEqual(len(calls), 1)
+
+    def test_stale_value_is_served_while_another_worker_recomputes(self):
+        sections.cached("list", [sections.EVENTS], lambda: "old")
+        sections.bump(sections.EVENTS)
+
+        # Another worker holds the lock
+        cache.add(f"{sections.section_key('list', {})}:lock", True)
+        self.assertEqual(sections.cached("list", [sections.EVENTS], lambda: "new"), "old")
+
+        cache.delete(f"{sections.section_key('list', {})}:lock")
+        self.assertEqual(sections.cached("list", [sections.EVENTS], lambda: "new"), "new")
+
+
+class PageCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.event = make_event()
+        Ticket.objects.create(event=self.event, name="Regular", price=5000, quantity_available=50)
+
+    def get(self, url, client=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = (client or Client()).get(url)
+        return response, len(queries)
+
+    def test_hits_skip_the_database_and_templates(self):
+        url = reverse("event_detail", args=[self.event.id])
+        first, _ = self.get(url)
+        response, queries = self.get(url)
+
+        self.assertEqual(first["X-Page-Cache"], "miss")
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        self.assertEqual(queries, 0)
+        self.assertEqual(response.templates, [])
+        self.assertContains(response, "Lagos Tech Fest")
+
+    def test_a_change_made_by_another_process_invalidates_the_page(self):
+        url = reverse("event_detail", args=[self.event.id])
+        self.get(url)
+        self.assertEqual(self.get(url)[0]["X-Page-Cache"], "hit")
+
+        # As another worker's signal receivers would after an event changed
+        bump_in_another_process("EVENTS")
+
+        self.assertEqual(self.get(url)[0]["X-Page-Cache"], "miss")
+        self.assertEqual(self.get(url)[0]["X-Page-Cache"], "hit")
+
+    def test_query_parameters_are_normalized(self):
+        self.get(reverse("events_list") + "?q=fest&location=lagos&location=abuja&utm_source=x&min_price=")
+        response, _ = self.get(reverse("events_list") + "?location=abuja&location=lagos&q=fest&fbclid=abc")
+        other, _ = self.get(reverse("events_list") + "?q=jazz")
+
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        self.assertEqual(other["X-Page-Cache"], "miss")
+
+    def test_visitors_with_a_session_or_messages_bypass_the_cache(self):
+        self.get(reverse("home"))
+
+        logged_in = Client()
+        logged_in.force_login(User.objects.create_user(username="fan"))
+        response, _ = self.get(reverse("home"), logged_in)
+        self.assertEqual(response["X-Page-Cache"], "bypass")
+
+        with_messages = Client()
+        with_messages.cookies["messages"] = "pending"
+        response, _ = self.get(reverse("home"), with_messages)
+        self.assertEqual(response["X-Page-Cache"], "bypass")
+
+    def test_each_visitor_gets_their_own_csrf_token(self):
+        first, _ = self.get(reverse("contact"))
+        visitor = Client(enforce_csrf_checks=True)
+        response, _ = self.get(reverse("contact"), visitor)
+
+        self.assertEqual(response["X-Page-Cache"], "hit")
+        self.assertNotContains(response, page_cache.CSRF_PLACEHOLDER.decode())
+        token = page_cache._CSRF_INPUT.search(response.content).group(1).decode()
+        self.assertNotIn(token, first.content.decode())
+
+        response = visitor.post(reverse("contact"), {
+            "csrfmiddlewaretoken": token,
+            "name": "Ada", "email": "ada@example.com", "subject": "support", "message": "Hello",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(ContactMessage.objects.filter(email="ada@example.com").exists())
+
+    def test_changes_invalidate_cached_pages(self):
+        url = reverse("event_detail", args=[self.event.id])
+        self.get(url)
+
+        self.event.title = "Lagos Tech Fest 2"
+        self.event.save()
+        response, _ = self.get(url)
+
+        self.assertEqual(response["X-Page-Cache"], "miss")
+        self.assertContains(response, "Lagos Tech Fest 2")
+
+    def test_counters(self):
+        self.get(reverse("home"))
+        self.get(reverse("home"))
+        self.get(reverse("home"))
+        logged_in = Client()
+        logged_in.force_login(User.objects.create_user(username="fan"))
+        self.get(reverse("home"), logged_in)
+
+        self.assertEqual(page_cache.stats(), {"hit": 2, "miss": 1, "bypass": 1})
+
+        out = io.StringIO()
+        call_command("page_cache_stats", "--reset", stdout=out)
+        self.assertIn("67%", out.getvalue())
+        self.assertEqual(page_cache.stats(), {"hit": 0, "miss": 0, "bypass": 0})
+
+
+class ReferenceDataTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        reference.clear()
+        self.music = Category.objects.create(name="Music")
+
+    def test_categories_are_loaded_once_per_process(self):
+        with self.assertNumQueries(1):
+            reference.categories()
+        with self.assertNumQueries(0):
+            self.assertEqual(reference.categories(), [self.music])
+            self.assertEqual(reference.category(str(self.music.id)), self.music)
+
+        self.assertIsNone(reference.category("not-a-number"))
+        self.assertIsNone(reference.category(self.music.id + 1))
+
+    def test_category_changes_reload_every_process(self):
+        reference.categories()
+        Category.objects.create(name="Tech")
+
+        self.assertEqual([category.name for category in reference.categories()], ["Music", "Tech"])
+
+        # Changed through another worker
+        Category.objects.filter(id=self.music.id).update(name="Live Music")
+        bump_in_another_process("CATEGORIES")
+        self.assertEqual(reference.category(self.music.id).name, "Live Music")
+
+    def test_pages_get_categories_from_the_context_processor(self):
+        make_event()
+        self.client.force_login(User.objects.create_user(username="fan"))
+        self.client.get(reverse("events_list"))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("events_list"))
+
+        self.assertContains(response, "Music")
+        self.assertEqual(response.context["available_locations"], ["lagos", "abuja"])
+        self.assertFalse(any('FROM "events_category"' in query["sql"] for query in queries))
+
+
+class RankingTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        viewcounts.discard()
+        self.event = make_event()
+        self.ticket = Ticket.objects.create(event=self.event, name="Regular", price=5000, quantity_available=50)
+        self.other = make_event(title="Abuja Jazz Night")
+        self.other.state = "abuja"
+        self.other.save()
+
+    def score(self, event):
+        return EventRanking.objects.get(event=event).score
+
+    def test_paid_tickets_count_and_refunds_take_them_off(self):
+        order = make_order(self.event, self.ticket, 3)
+        self.assertEqual(self.score(self.event), 0)
+
+        order.status = "paid"
+        order.save()
+        self.assertAlmostEqual(self.score(self.event), 3 * rankings.weight("ticket", order.created_at))
+        self.assertEqual(rankings.top(2), [self.event, self.other])
+
+        order.status = "failed"
+        order.save()
+        self.assertAlmostEqual(self.score(self.event), 0)
+
+    def test_saves_count_until_removed(self):
+        saved = SavedEvent.objects.create(user=User.objects.create_user(username="fan"), event=self.other)
+        self.assertEqual(rankings.top(2), [self.other, self.event])
+
+        saved.delete()
+        self.assertAlmostEqual(self.score(self.other), 0)
+
+    def test_recent_activity_outranks_older_activity(self):
+        month_ago = timezone.now() - datetime.timedelta(days=30)
+        rankings.record_views({self.event.id: 100}, at=month_ago)
+        rankings.record_views({self.other.id: 1})
+
+        self.assertEqual(rankings.top(2), [self.other, self.event])
+
+    def test_lists_are_filtered_by_category_state_and_date(self):
+        past = make_event(title="Last Year", days_ahead=-10)
+        rankings.record_views({past.id: 50, self.event.id: 1})
+
+        self.assertEqual(rankings.top(5), [self.event, self.other])
+        self.assertEqual(rankings.top(5, states=["abuja"]), [self.other])
+        self.assertEqual(rankings.top(5, category=self.event.category_id), [self.event])
+
+        self.event.state = "abuja"
+        self.event.save()
+        self.assertEqual(rankings.top(5, states=["abuja"]), [self.event, self.other])
+
+    def test_events_list_popular_reads_the_ranking(self):
+        self.client.force_login(User.objects.create_user(username="fan"))
+        rankings.record_views({self.other.id: 5})
+
+        response = self.client.get(reverse("events_list"))
+        self.assertEqual(response.context["popular_events"], [self.other, self.event])
+
+        response = self.client.get(reverse("events_list") + "?q=lagos")
+        self.assertEqual(response.context["popular_events"], [self.event])
+
+    def test_detail_views_are_counted(self):
+        self.client.get(reverse("event_detail", args=[self.event.id]))
+        viewcounts.flush()
+
+        ranking = EventRanking.objects.get(event=self.event)
+        self.assertGreater(ranking.view_score, 0)
+        self.assertEqual(ranking.score, ranking.view_score)
+
+    def test_rebuild_matches_incremental_scores_and_keeps_views(self):
+        order = make_order(self.event, self.ticket, 2)
+        order.status = "paid"
+        order.save()
+        SavedEvent.objects.create(user=User.objects.create_user(username="fan"), event=self.other)
+        rankings.record_views({self.other.id: 3})
+        before = dict(EventRanking.objects.values_list("event_id", "score"))
+
+        out = io.StringIO()
+        call_command("rebuild_rankings", stdout=out)
+
+        self.assertIn("Rescored 2 events", out.getvalue())
+        for event_id, score in EventRanking.objects.values_list("event_id", "score"):
+            self.assertAlmostEqual(score / before[event_id], 1)
+
+
+class ViewCountTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        viewcounts.discard()
+        self.event = make_event()
+        self.other = make_event(title="Abuja Jazz Night")
+
+    def test_views_are_buffered_and_written_in_one_batch(self):
+        self.client.get(reverse("event_detail", args=[self.event.id]))
+        # Page cache hits count too, still without a query
+        with self.assertNumQueries(0):
+            self.client.get(reverse("event_detail", args=[self.event.id]))
+            self.client.get(reverse("event_detail", args=[self.event.id]))
+
+        self.assertEqual(viewcounts.pending()[(timezone.localdate(), self.event.id)][0], 3)
+        self.assertFalse(EventViews.objects.exists())
+
+        viewcounts.flush()
+        self.client.get(reverse("event_detail", args=[self.event.id]))
+        viewcounts.flush()
+
+        row = EventViews.objects.get(event=self.event)
+        self.assertEqual((row.day, row.views), (timezone.localdate(), 4))
+        self.assertGreater(EventRanking.objects.get(event=self.event).view_score, 0)
+        self.assertEqual(viewcounts.pending(), {})
+
+    def test_listings_count_impressions_once_per_page(self):
+        self.client.get(reverse("home"))
+        self.client.get(reverse("events_list"))
+        viewcounts.flush()
+
+        counts = dict(EventViews.objects.values_list("event_id", "impressions"))
+        self.assertEqual(counts, {self.event.id: 2, self.other.id: 2})
+
+    def test_finished_requests_flush_once_the_threshold_is_reached(self):
+        with mock.patch.multiple(viewcounts, FLUSH_THRESHOLD=2, FLUSH_SECONDS=3600):
+            self.client.get(reverse("event_detail", args=[self.event.id]))
+            self.assertFalse(EventViews.objects.exists())
+            self.client.get(reverse("event_detail", args=[self.other.id]))
+
+        self.assertEqual(EventViews.objects.count(), 2)
+
+    def test_failed_flushes_keep_the_counts(self):
+        viewcounts.record(RequestFactory().get("/"), views=[self.event.id, self.event.id])
+
+        with mock.patch.object(viewcounts, "_write", side_effect=OperationalError("database is locked")):
+            self.assertEqual(viewcounts.flush(), 0)
+
+        self.assertEqual(viewcounts.pending()[(timezone.localdate(), self.event.id)], (2, 0))
+        self.assertEqual(viewcounts.flush(), 1)
+        self.assertEqual(EventViews.objects.get(event=self.event).views, 2)
+
+    def test_deleted_events_are_skipped(self):
+        viewcounts.record(RequestFactory().get("/"), views=[self.event.id, self.other.id])
+        self.other.delete()
+
+        self.assertEqual(viewcounts.flush(), 1)
+        self.assertEqual(list(EventViews.objects.values_list("event_id", flat=True)), [self.event.id])
@@ -17,11 +17,17 @@ urlpatterns = [
     path('event/<int:event_id>/confirm/', views.booking_confirm, name='booking_confirm'),
     path("pay/<int:order_id>/", views.initialize_payment, name="initialize_payment"),
     path("verify-payment/", views.verify_payment, name="verify_payment"),
+    path("paystack/webhook/", views.paystack_webhook, name="paystack_webhook"),
     path("payment-success/", views.payment_success, name="payment_success"),
     path("payment-failed/", views.payment_failed, name="payment_failed"),
     path('org/my_events/', views.my_events, name='my_events'),
     path('edit/<int:pk>/', views.edit_event, name='edit_event'),
     path('delete/<int:pk>/',views.delete_event,name='delete_event'),
+    path('org/events/<int:pk>/attendees/export/', views.export_attendees, name='export_attendees'),
+    path('org/events/<int:pk>/check-in/', views.check_in_scan, name='check_in_scan'),
+    path('org/events/<int:pk>/check-in/batch/', views.check_in_batch, name='check_in_batch'),
+    path('org/events/<int:pk>/gate-manifest/', views.gate_manifest_download, name='gate_manifest'),
+    path('org/events/<int:pk>/gate-manifest/check-ins/', views.gate_manifest_check_ins, name='gate_manifest_check_ins'),
     path("org/profile/",views.organizer_profile,name="organizer_profile"),
     path('organizer/tickets/', views.organizer_tickets, name='organizer_tickets'),
     path('org/payouts/', views.payouts, name='payouts'),
@@ -0,0 +1,178 @@
+"""
+Event page views and listing impressions (EventViews).
+
+An UPDATE per event_detail hit would make every view a write, and on
+SQLite every write waits for the one writer lock. Instead each worker
+process counts in memory:
+
+    viewcounts.record(request, views=[event.id])
+    viewcounts.record(request, impressions=[e.id for e in shown])
+
+and writes them once VIEW_COUNTS_FLUSH_SECONDS have passed or
+VIEW_COUNTS_FLUSH_THRESHOLD have piled up. The check runs when a
+request finishes (signals.py), so the write happens after the response
+has gone out. One flush is a single batched upsert into the
+(day, event) rows of EventViews (executemany of INSERT ... ON CONFLICT
+DO UPDATE), plus the detail views added to the event rankings
+(rankings.record_views).
+
+Loss is bounded: a worker that exits normally flushes (atexit), and one
+that is killed loses at most what it counted since its last flush. A
+flush that fails (e.g. the database is locked) puts the counts back for
+the next one.
+
+Pages served from the page cache skip the view, so record() also notes
+the counts on the request; page_cache stores them with the page and
+replays them on every hit.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import rankings
+from .models import Event, EventViews
+
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SECONDS = getattr(settings, "VIEW_COUNTS_FLUSH_SECONDS", 30)
+FLUSH_THRESHOLD = getattr(settings, "VIEW_COUNTS_FLUSH_THRESHOLD", 1000)
+
+_lock = threading.Lock()
+
+# (day, event_id) -> [views, impressions]
+_pending = defaultdict(lambda: [0, 0])
+_pending_count = 0
+_last_flush = time.monotonic()
+
+
+def _add(views, impressions):
+    global _pending_count
+
+    today = timezone.localdate()
+    with _lock:
+        for event_id in views:
+            _pending[(today, event_id)][0] += 1
+        for event_id in impressions:
+            _pending[(today, event_id)][1] += 1
+        _pending_count += len(views) + len(impressions)
+
+
+def record(request, views=(), impressions=()):
+    """
+    Count detail-page views and listing impressions (an event shown
+    several times on one page counts once).
+    """
+    views, impressions = list(views), list(set(impressions))
+    _add(views, impressions)
+
+    noted = request.__dict__.setdefault("event_counts", {"views": [], "impressions": []})
+    noted["views"] += views
+    noted["impressions"] += impressions
+
+
+def replay(counts):
+    """
+    Count again what a cached page counted when it was rendered.
+    """
+    _add(counts["views"], counts["impressions"])
+
+
+def pending():
+    with _lock:
+        return {key: tuple(counts) for key, counts in _pending.items()}
+
+
+def discard():
+    """
+    Drop everything counted and not written yet (tests).
+    """
+    global _pending, _pending_count
+
+    with _lock:
+        _pending = defaultdict(lambda: [0, 0])
+        _pending_count = 0
+
+
+def flush_if_due():
+    if _pending_count >= FLUSH_THRESHOLD or time.monotonic() - _last_flush >= FLUSH_SECONDS:
+        flush()
+
+
+def flush():
+    """
+    Write everything counted so far. Returns the number of rows upserted.
+    """
+    global _pending, _pending_count, _last_flush
+
+    with _lock:
+        batch, _pending = _pending, defaultdict(lambda: [0, 0])
+        _pending_count = 0
+        _last_flush = time.monotonic()
+
+    if not batch:
+        return 0
+
+    try:
+        with transaction.atomic():
+            return _write(batch)
+    except DatabaseError as exc:
+        logger.warning("Could not write %s event view counts, keeping them: %s", len(batch), exc)
+        with _lock:
+            for key, (views, impressions) in batch.items():
+                _pending[key][0] += views
+                _pending[key][1] += impressions
+                _pending_count += views + impressions
+        return 0
+
+
+def _write(batch):
+    # Events deleted since they were viewed would break the foreign key
+    existing = set(
+        Event.objects.filter(pk__in={event_id for _, event_id in batch}).values_list("pk", flat=True)
+    )
+    rows = [
+        (day, event_id, views, impressions)
+        for (day, event_id), (views, impressions) in batch.items()
+        if event_id in existing
+    ]
+    if not rows:
+        return 0
+
+    table = EventViews._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT INTO {table} (day, event_id, views, impressions) VALUES (%s, %s, %s, %s) "
+            "ON CONFLICT (day, event_id) DO UPDATE SET "
+            f"views = {table}.views + excluded.views, "
+            f"impressions = {table}.impressions + excluded.impressions",
+            rows,
+        )
+
+    views = defaultdict(int)
+    for _, event_id, count, _ in rows:
+        views[event_id] += count
+    rankings.record_views({event_id: count for event_id, count in views.items() if count})
+
+    return len(rows)
+
+
+def totals(events):
+    """
+    {"views": n, "impressions": n} for a queryset of events, all time.
+    """
+    return EventViews.objects.filter(event__in=events).aggregate(
+        views=Coalesce(Sum("views"), 0),
+        impressions=Coalesce(Sum("impressions"), 0),
+    )
+
+
+atexit.register(flush)
@@ -1,21 +1,30 @@
+import datetime
+import json
 import uuid
-import requests
+import logging
 from django.conf import settings
-from django.db.models import Q, Count, Value, Min, DecimalField
-from django.db.models.functions import Coalesce
+from django.db import transaction
+from django.db.models import Q, F, DecimalField
 from django.utils.http import url_has_allowed_host_and_scheme
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
 from django.utils import timezone
 from django.urls import reverse
-from django.db.models import Sum
 from django.shortcuts import render, redirect , get_object_or_404
 from .forms import UserRegisterForm, OrganizerRegisterForm, UserLoginForm, EventForm, OrganizerLoginForm,TicketFormSet,OrganizerForm,UserForm,UserUpdateForm,NewsletterForm,ContactForm
 from django.contrib.auth import login as auth_login, authenticate, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from .models import Organizer, Profile, Event, Ticket, Order, Attendee, OrderItem, SavedEvent, Category, Payout
+from .models import Organizer, Profile, Event, Ticket, Order, Attendee, OrderItem, SavedEvent, Payout
+from .search import search_events
+from .pagination import paginate
+from .dashboard import organizer_stats
+from . import checkin, exports, fulfilment, gate_manifest, inventory, jobs, ledger, paystack, rankings, reconciliation, reference, sections, viewcounts, webhooks
 from django.contrib.auth.models import User
 
+logger = logging.getLogger(__name__)
+
 # Create your views here.
 
 
@@ -33,36 +42,53 @@ def home(request):
 
     if category_id:
         events = events.filter(category_id=category_id)
-        selected_category = Category.objects.filter(id=category_id).first()
+        selected_category = reference.category(category_id)
+
+    # The sections below are the same for every visitor: they come from
+    # the section cache, recomputed only after events/orders change
+    # (see sections.py)
 
     # Upcoming events (filtered if category selected)
-    upcoming_events = events.filter(
-        date__gte=now
-    ).order_by('date')[:6]
+    # select_related("card") → prices/category for every card in one query
+    upcoming_events = sections.cached(
+        "home.upcoming", [sections.EVENTS, sections.CATEGORIES],
+        lambda: list(events.filter(date__gte=now).select_related('card').order_by('date')[:6]),
+        category=category_id,
+    )
 
-        # OPTION B (if using Ticket model)
-    hot_events = events.filter(
-        date__gte=now
-    ).annotate(
-        total_sold=Coalesce(Sum('tickets__quantity_sold'), Value(0)),
-        min_price=Min('tickets__price')   
-    ).order_by('-total_sold', '-created_at')[:4]
+    # Hot events: read from the stored ranking (see rankings.py), which
+    # changes with every sale, save and view, so the list just expires
+    hot_events = sections.cached(
+        "home.hot", [sections.EVENTS, sections.CATEGORIES],
+        lambda: rankings.top(4, category=category_id),
+        timeout=rankings.CACHE_SECONDS,
+        category=category_id,
+    )
 
     # Past events (filtered if category selected)
-    past_events = events.filter(
-        date__lt=now
-    ).order_by('-date')
+    # Only the first page; the rest is reached through past_events
+    past_events = sections.cached(
+        "home.past", [sections.EVENTS],
+        lambda: paginate(
+            events.filter(date__lt=now),
+            ('-date', '-id'),
+        ),
+        category=category_id,
+    )
 
-    categories = Category.objects.all()
+    # Counted in memory, written in batches (viewcounts.py)
+    viewcounts.record(request, impressions=[
+        event.pk for event in [*upcoming_events, *hot_events, *past_events]
+    ])
 
     return render(request, 'events/index.html', {
         "upc": upcoming_events,
         "past": past_events,
-        "categories": categories,
         "selected_category": selected_category,
         "hot_events":hot_events,
     })
 
+
 def user_signup(request):
     if request.method == "POST":
         form = UserRegisterForm(request.POST)
@@ -145,29 +171,29 @@ def org_dashboard(request):
 
 
     org = request.user.organizer
-    # All events by this organizer
-    events = Event.objects.filter(organizer=org)
-
-    # All orders for these events
-    orders = Order.objects.filter(event__in=events).order_by('-created_at')  # latest first
-
-    # Dashboard stats
-    total_events = events.count()
-    total_attendees = orders.count()
-    total_revenue = sum(order.total_amount for order in orders if order.status == 'paid')
-    total_paid_orders = Order.objects.filter(
-        event__in=events,
-        status="paid"
-    ).count()
+
+    # Stats come from one aggregate query (cached until an order changes)
+    stats = organizer_stats(org)
+
+    # Latest orders first, one page at a time. select_related/prefetch_related
+    # load the buyer, event and ticket names the cards need in 3 queries total
+    orders = (
+        Order.objects
+        .filter(event__organizer=org)
+        .select_related("user", "event")
+        .prefetch_related("items__ticket")
+    )
+    orders = paginate(orders, ("-created_at", "-id"), cursor=request.GET.get("cursor"), page_size=20)
 
     context = {
         'organizer': org,
-        'events': events,
         'orders': orders,
-        'total_events': total_events,
-        'total_attendees': total_attendees,
-        'total_revenue': total_revenue,
-        'total_paid_orders': total_paid_orders,
+        'total_events': stats["total_events"],
+        'total_attendees': stats["total_orders"],
+        'total_revenue': stats["total_revenue"],
+        'total_paid_orders': stats["total_paid_orders"],
+        'total_views': stats["total_views"],
+        'total_impressions': stats["total_impressions"],
     }
     return render(request, 'events/org_dashboard.html', context)
 
@@ -202,18 +228,20 @@ def dashboard(request):
 
     # Upcoming Events (based on date)
 
-    upcoming_events = Event.objects.filter(
+    # Lists, so the template's counts don't run extra COUNT queries;
+    # select_related("organizer") for the "By <organizer>" line
+    upcoming_events = list(Event.objects.filter(
         order__user=user,
         order__status="paid",
         date__gte=now
-    ).distinct().order_by("date")[:3]
+    ).select_related("organizer").distinct().order_by("date")[:3])
 
     # Past events user booked
-    past_events = Event.objects.filter(
+    past_events = list(Event.objects.filter(
         order__user=user,
         order__status="paid",
         date__lt=now
-    ).distinct().order_by("-date")[:3]
+    ).distinct().order_by("-date")[:3])
 
 
     # Saved Events Count
@@ -258,9 +286,11 @@ def create_event(request):
             return redirect("my_events")
 
         else:
-            # DEBUG: print errors to console
-            print("Event Form Errors:", form.errors)            # Shows which fields are failing in the event form
-            print("Ticket Formset Errors:", ticket_formset.errors)  # Shows which tickets are invalid
+            logger.debug(
+                "Event form invalid: %s; ticket formset: %s",
+                form.errors.as_json(),
+                ticket_formset.errors,
+            )
 
     else:
         form = EventForm()
@@ -317,12 +347,10 @@ def events_list(request):
 
 
 
-    # 🔎 Search by name or category name
+    # 🔎 Full-text search (title, description, venue, city, category)
+    # Results come back best match first
     if q:
-        events = events.filter(
-            Q(title__icontains=q) |
-            Q(category__name__icontains=q)
-        )
+        events = search_events(events, q)
 
     # Filter by city input (top search bar)
     if city:
@@ -331,7 +359,7 @@ def events_list(request):
     #  Filter by category (dropdown)
     if category_id:
         events = events.filter(category_id=category_id)
-        selected_categories = Category.objects.filter(id=category_id).first()
+        selected_categories = reference.category(category_id)
 
     # Filter by multiple checkbox locations
     if locations:
@@ -345,40 +373,109 @@ def events_list(request):
     if max_price:
         events = events.filter(tickets__price__lte=max_price).distinct()
 
+    # select_related("card") → price and category for every card in one query
     upcoming_events = events.filter(
         date__gte=now
-    ).order_by("date")
+    ).select_related("card")
 
-    # Popular Events (most booked)
-    popular_events = events.filter(
-        date__gte=now
-    ).annotate(
-        order_count=Count("order")
-    ).order_by("-order_count", "date")[:3]
+    # Keyset pagination: ?cursor=... moves through the pages
+    # Search results keep their relevance order, everything else soonest first
+    if q:
+        upcoming_ordering = ("search_rank", "date", "id")
+    else:
+        upcoming_ordering = ("date", "id")
+
+    # Every section depends on the filters; the cache key is built from them
+    filters = {
+        "q": q,
+        "city": city,
+        "category": category_id,
+        "location": locations,
+        "min_price": min_price,
+        "max_price": max_price,
+    }
+
+    upcoming_events = sections.cached(
+        "events_list.upcoming", [sections.EVENTS, sections.CATEGORIES],
+        lambda: paginate(
+            upcoming_events,
+            upcoming_ordering,
+            cursor=request.GET.get("cursor"),
+        ),
+        cursor=request.GET.get("cursor"),
+        **filters,
+    )
+
+    # ?format=json → just this page of upcoming events (infinite scroll)
+    if request.GET.get("format") == "json":
+        viewcounts.record(request, impressions=[event.pk for event in upcoming_events])
+        return JsonResponse({
+            "events": [_event_card_json(request, event) for event in upcoming_events],
+            "next_cursor": upcoming_events.next_cursor,
+            "previous_cursor": upcoming_events.previous_cursor,
+        })
+
+    # Popular Events: the stored ranking (rankings.py). Category and
+    # location filters are columns of it; search and price filters rank
+    # the filtered events instead
+    def popular():
+        if q or city or min_price or max_price:
+            return rankings.ranked(events.filter(date__gte=now), 3)
+        return rankings.top(3, category=category_id, states=locations)
+
+    popular_events = sections.cached(
+        "events_list.popular", [sections.EVENTS, sections.CATEGORIES],
+        popular,
+        timeout=rankings.CACHE_SECONDS,
+        **filters,
+    )
 
     #  Recently Added
-    recent_events = events.filter(
-        date__gte=now
-    ).order_by("-created_at")[:4]
+    recent_events = sections.cached(
+        "events_list.recent", [sections.EVENTS, sections.CATEGORIES],
+        lambda: list(events.filter(
+            date__gte=now
+        ).select_related("card").order_by("-created_at")[:4]),
+        **filters,
+    )
 
-    categories = Category.objects.all()
-    available_locations = [choice[0] for choice in Event.STATE_CHOICES]
+    viewcounts.record(request, impressions=[
+        event.pk for event in [*upcoming_events, *popular_events, *recent_events]
+    ])
 
     return render(request, "events/events_list.html", {
         "events": events,
         "upcoming_events": upcoming_events,
         "recent_events": recent_events,
         "popular_events":popular_events,
-        "categories": categories,
         "selected_category": category_id,
         "selected_locations": locations,
         "q": q,
         "city": city,
-        "available_locations": available_locations,
         "selected_categories": selected_categories, 
     })
 
 
+def _event_card_json(request, event):
+    """
+    The fields an event card needs, for the JSON listing.
+    """
+    card = getattr(event, "card", None)
+
+    return {
+        "id": event.id,
+        "title": event.title,
+        "date": event.date.isoformat(),
+        "venue": event.venue,
+        "city": event.city,
+        "state": event.state,
+        "category": card.category_name if card else "",
+        "min_price": str(card.min_price) if card and card.min_price is not None else None,
+        "image": request.build_absolute_uri(event.image.url) if event.image else None,
+        "url": reverse("event_detail", args=[event.id]),
+    }
+
+
 def event_detail(request, event_id):
     """
     Show the details of a single event.
@@ -389,6 +486,7 @@ def event_detail(request, event_id):
     is_saved = False
     if request.user.is_authenticated:
         is_saved = SavedEvent.objects.filter(user=request.user, event=event).exists()
+    viewcounts.record(request, views=[event.id])
     context = {
         "event": event,
         "tickets": tickets,
@@ -400,9 +498,11 @@ def event_detail(request, event_id):
 @login_required
 def toggle_save_event(request, event_id):
     event = get_object_or_404(Event, id=event_id)
-    saved_item = SavedEvent.objects.filter(user=request.user, event=event)
+    # An instance, not a queryset: its delete fires post_delete (rankings)
+    # without a second query to collect the rows
+    saved_item = SavedEvent.objects.filter(user=request.user, event=event).first()
 
-    if saved_item.exists():
+    if saved_item is not None:
         saved_item.delete()
         saved = False
     else:
@@ -460,45 +560,55 @@ def booking_confirm(request, event_id):
             messages.error(request, "Invalid ticket quantity.")
             return redirect("event_detail", event_id=event.id)
 
-        if quantity > ticket.quantity_available:
-            messages.error(request, "Not enough tickets available.")
-            return redirect("event_detail", event_id=event.id)
+        # Put tickets from abandoned checkouts back on sale first
+        inventory.release_expired_holds(ticket=ticket)
 
         total_amount = ticket.price * quantity
 
+        try:
+            with transaction.atomic():
+
+                #  Check for existing pending order
+
+                existing_order = Order.objects.filter(
+                    user=request.user,
+                    event=event,
+                    status="pending"
+                ).first()
+
+                if existing_order:
+                    # Remove previous items (and their held tickets) to avoid duplicates
+                    inventory.release_order(existing_order)
+                    existing_order.items.all().delete()
+                    order = existing_order
+                    order.total_amount = total_amount
+                    order.save()
+                else:
+                    # Create a new order with a unique reference
+                    order = Order.objects.create(
+                        user=request.user,
+                        event=event,
+                        total_amount=total_amount,
+                        status="pending",
+                        reference=str(uuid.uuid4())  # ensures unique reference
+                    )
+
+
+                # Create OrderItem
+
+                OrderItem.objects.create(
+                    order=order,
+                    ticket=ticket,
+                    quantity=quantity
+                )
 
-        #  Check for existing pending order
-
-        existing_order = Order.objects.filter(
-            user=request.user,
-            event=event,
-            status="pending"
-        ).first()
-
-        if existing_order:
-            # Remove previous items to avoid duplicates
-            existing_order.items.all().delete()
-            order = existing_order
-            order.total_amount = total_amount
-            order.save()
-        else:
-            # Create a new order with a unique reference
-            order = Order.objects.create(
-                user=request.user,
-                event=event,
-                total_amount=total_amount,
-                status="pending",
-                reference=str(uuid.uuid4())  # ensures unique reference
-            )
-
-
-        # Create OrderItem
+                # Reserve the tickets while the user pays
+                # (fails if someone else got the last ones first)
+                inventory.place_hold(order, ticket, quantity)
 
-        OrderItem.objects.create(
-            order=order,
-            ticket=ticket,
-            quantity=quantity
-        )
+        except inventory.InsufficientInventory:
+            messages.error(request, "Not enough tickets available.")
+            return redirect("event_detail", event_id=event.id)
 
 
         # Send context to template
@@ -523,84 +633,131 @@ def booking_confirm(request, event_id):
 def initialize_payment(request, order_id):
     order = get_object_or_404(Order, id=order_id, user=request.user)
 
-    # generate unique reference
-    reference = str(uuid.uuid4())
-    order.reference = reference
-    order.status = "pending"
-    order.save()
+    # A paid order's tickets are already sold: paying again would sell
+    # them twice
+    if order.status not in ("pending", "failed"):
+        messages.info(request, "This order has already been paid.")
+        return redirect("my_tickets")
 
-    url = "https://api.paystack.co/transaction/initialize"
+    if order.status == "failed":
+        # Its holds went back on sale when it failed: reserve the tickets
+        # again before sending the buyer back to checkout
+        try:
+            with transaction.atomic():
+                if not fulfilment.set_order_status(order, "pending", ["failed"]):
+                    messages.info(request, "This order has already been paid.")
+                    return redirect("my_tickets")
+                inventory.hold_order(order)
+        except inventory.InsufficientInventory:
+            messages.error(request, "Not enough tickets available.")
+            return redirect("event_detail", event_id=order.event_id)
 
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-        "Content-Type": "application/json",
-    }
+    # generate unique reference (Paystack refuses one it has seen before)
+    reference = str(uuid.uuid4())
+    if not Order.objects.filter(pk=order.pk, status="pending").update(reference=reference):
+        # Paid in the meantime (webhook)
+        messages.info(request, "This order has already been paid.")
+        return redirect("my_tickets")
+    order.reference = reference
+    # The buyer is paying now: keep the tickets for them, and don't let
+    # reconcile_payments take the order for an abandoned checkout
+    inventory.renew_holds(order)
 
-    data = {
-        "email": request.user.email,
-        "amount": int(order.total_amount * 100),  # kobo
-        "reference": reference,
-        "callback_url": request.build_absolute_uri("/verify-payment/"),
-    }
+    try:
+        payment = paystack.get_client().initialize_transaction(
+            email=request.user.email,
+            amount=int(order.total_amount * 100),  # kobo
+            reference=reference,
+            callback_url=request.build_absolute_uri("/verify-payment/"),
+        )
+    except paystack.PaystackError:
+        logger.exception("Paystack initialize failed for order %s", order.id)
+        messages.error(request, "Unable to initialize payment.")
+        return redirect("event_detail", event_id=order.event_id)
 
-    response = requests.post(url, json=data, headers=headers)
-    response_data = response.json()
+    return redirect(payment["authorization_url"])
 
-    if response_data["status"]:
-        return redirect(response_data["data"]["authorization_url"])
-    else:
-        messages.error(request, "Unable to initialize payment.")
-        return redirect("booking_confirmation")
-    
 
 
 @login_required
 def verify_payment(request):
+    """
+    Paystack redirects the user here after checkout.
+    Orders are normally fulfilled by the webhook worker (see paystack_webhook),
+    so this is usually just a status lookup.
+    """
     reference = request.GET.get("reference")
+    order = get_object_or_404(Order, reference=reference, user=request.user)
 
-    url = f"https://api.paystack.co/transaction/verify/{reference}"
+    # The webhook already arrived but the worker hasn't got to it: apply it now
+    if order.status == "pending" and webhooks.process_reference(reference):
+        order.refresh_from_db()
 
-    headers = {
-        "Authorization": f"Bearer {settings.PAYSTACK_SECRET_KEY}",
-    }
-
-    response = requests.get(url, headers=headers)
-    response_data = response.json()
+    # No webhook yet: ask Paystack directly
+    if order.status == "pending":
+        try:
+            payment = paystack.get_client().verify_transaction(reference)
+        except paystack.TransactionNotFound:
+            # Checkout was never started for this reference: nothing was paid
+            payment = {"status": "failed"}
+        except paystack.PaystackError as exc:
+            # Unreachable, or an answer we can't read (wrong secret key, a
+            # proxy's error page): we can't tell whether the payment went
+            # through, so the order stays pending (and its tickets held)
+            # instead of being failed
+            logger.warning("Could not verify payment %s: %s", reference, exc)
+            payment = {}
+
+        status = payment.get("status")
+
+        if status == "success":
+            result = fulfilment.fulfil_order(order, amount=payment.get("amount"))
+
+            if result == fulfilment.SOLD_OUT:
+                messages.error(request, "Sorry, these tickets sold out before your payment completed. Please contact support for a refund.")
+                return redirect("payment_failed")
+
+            if result == fulfilment.AMOUNT_MISMATCH:
+                messages.error(request, "We couldn't match your payment to this order. Please contact support.")
+                return redirect("payment_failed")
+        elif status in reconciliation.NOT_PAID:
+            # Put the held tickets back on sale
+            fulfilment.fail_order(order)
+        else:
+            # No answer, or still in progress: keep asking in the
+            # background, so the order is settled even if the buyer never
+            # comes back
+            jobs.enqueue("payments.verify", delay=datetime.timedelta(minutes=1), reference=reference)
+            messages.error(request, "We couldn't confirm your payment yet. Please try again in a moment.")
+            return redirect("payment_failed")
 
-    if response_data["status"] and response_data["data"]["status"] == "success":
+        order.refresh_from_db()
 
-        order = Order.objects.get(reference=reference)
+    if order.status == "paid":
+        return redirect(reverse("payment_success") + f"?reference={reference}")
 
-        if order.status != "paid":
-            order.status = "paid"
-            order.save()
+    return redirect("payment_failed")
 
-            # Create attendees
-            for item in order.items.all():
-                Attendee.objects.create(
-                    event=order.event,
-                    user=order.user,
-                    full_name=order.user.get_full_name(),
-                    email=order.user.email,
-                    tickets_qty=item.quantity,
-                    payment_status="paid",
-                    booking_ref=reference
-                )
 
-                # Reduce ticket quantity
-                ticket = item.ticket
-                ticket.quantity_available -= item.quantity
-                ticket.save()
+@csrf_exempt
+@require_POST
+def paystack_webhook(request):
+    """
+    Paystack calls this for payment events. We only check the signature
+    and store the event; `manage.py process_payment_events` fulfils it.
+    """
+    signature = request.headers.get("X-Paystack-Signature", "")
+    if not webhooks.signature_is_valid(request.body, signature):
+        return HttpResponse(status=401)
 
-        return redirect(reverse("payment_success") + f"?reference={reference}")
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return HttpResponse(status=400)
 
-    else:
-        order = Order.objects.get(reference=reference)
-        order.status = "failed"
-        order.save()
+    webhooks.enqueue(payload)
+    return HttpResponse(status=200)
 
-        return redirect("payment_failed")
-    
 
 def payment_success(request):
     reference = request.GET.get("reference")
@@ -615,33 +772,23 @@ def payment_success(request):
 def payment_failed(request):
     return render(request, "events/failed.html")
 
+@login_required(login_url='organizer_login')
 def my_events(request):
         try:
             org = request.user.organizer
         except Organizer.DoesNotExist:
             return redirect('organizer_login')
     
-        events = Event.objects.filter(organizer=org)
-
+        # Capacity and sales come from the event's card: one query for the page
+        events = Event.objects.filter(organizer=org).select_related("card")
 
         for event in events:
+            card = getattr(event, "card", None)
 
-            # Total tickets available
-            total_tickets = Ticket.objects.filter(
-                event=event
-            ).aggregate(total=Sum('quantity_available'))
-
-            event.total_tickets = total_tickets['total'] or 0
-
-
-            # Tickets sold
-            sold = OrderItem.objects.filter(
-                order__event=event,
-                order__status="paid"
-            ).aggregate(total=Sum('quantity'))
-
-            event.tickets_sold = sold['total'] or 0
-
+            # Tickets still on sale / tickets sold
+            event.total_tickets = card.total_capacity if card else 0
+            event.tickets_sold = card.total_sold if card else 0
+            event.revenue = card.revenue if card else 0
 
             # Percentage
             if event.total_tickets > 0:
@@ -654,6 +801,7 @@ def my_events(request):
         return render(request, 'events/my_events.html', {"events":events, "now": timezone.now()})
 
 
+@login_required(login_url='organizer_login')
 def edit_event(request, pk):
     try:
         org = request.user.organizer
@@ -682,6 +830,7 @@ def edit_event(request, pk):
     })
 
 
+@login_required(login_url='organizer_login')
 def delete_event(request, pk):
 
     try:
@@ -702,6 +851,135 @@ def delete_event(request, pk):
 
     return redirect('my_events')
 
+@login_required(login_url='organizer_login')
+def export_attendees(request, pk):
+    """
+    Download an event's attendee list as CSV (default) or JSON Lines
+    (?format=jsonl). The file is streamed row by row, so even very large
+    events are exported without loading every attendee into memory.
+    """
+    try:
+        org = request.user.organizer
+    except Organizer.DoesNotExist:
+        return redirect('organizer_login')
+
+    event = get_object_or_404(Event, pk=pk, organizer=org)
+
+    export_format = request.GET.get("format", "csv")
+    if export_format not in exports.FORMATS:
+        export_format = "csv"
+
+    response = StreamingHttpResponse(
+        exports.stream(event, export_format),
+        content_type=exports.FORMATS[export_format],
+    )
+    response["Content-Disposition"] = f'attachment; filename="attendees-event-{event.pk}.{export_format}"'
+    return response
+
+
+def _scanner_request(request, pk):
+    """
+    Shared checks for the check-in endpoints: the event must belong to the
+    logged-in organizer and the body must be JSON.
+    Returns (data, None) or (None, error response).
+    """
+    if not Event.objects.filter(pk=pk, organizer__user=request.user).exists():
+        return None, JsonResponse({"error": "Event not found."}, status=404)
+
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return None, JsonResponse({"error": "Body must be JSON."}, status=400)
+
+    if not isinstance(data, dict):
+        return None, JsonResponse({"error": "Body must be a JSON object."}, status=400)
+    return data, None
+
+
+@login_required(login_url='organizer_login')
+@require_POST
+def check_in_scan(request, pk):
+    """
+    Gate scanner endpoint: {"payload": "<QR text>", "gate": "North"}
+    → {"result": "checked_in", "admit": true, "name": ..., ...}
+    """
+    data, error = _scanner_request(request, pk)
+    if error:
+        return error
+
+    result, attendee = checkin.check_in(pk, data.get("payload"), gate=data.get("gate") or "")
+    return JsonResponse(checkin.describe(result, attendee))
+
+
+@login_required(login_url='organizer_login')
+@require_POST
+def check_in_batch(request, pk):
+    """
+    Scans queued while a scanner was offline:
+    {"gate": "North", "scans": [{"payload": ..., "scanned_at": ...}, ...]}
+    → {"results": [...]} in the same order.
+    """
+    data, error = _scanner_request(request, pk)
+    if error:
+        return error
+
+    scans = data.get("scans")
+    if not isinstance(scans, list) or len(scans) > checkin.MAX_BATCH:
+        return JsonResponse(
+            {"error": f"scans must be a list of at most {checkin.MAX_BATCH} items."},
+            status=400,
+        )
+
+    results = checkin.check_in_batch(pk, scans, gate=data.get("gate") or "")
+    return JsonResponse({"results": results})
+
+
+@login_required(login_url='organizer_login')
+def gate_manifest_download(request, pk):
+    """
+    Offline manifest for an event's scanners (see gate_manifest.py).
+    ?since=<version> returns only what changed after that version.
+    """
+    event = get_object_or_404(Event, pk=pk, organizer__user=request.user)
+
+    try:
+        since = max(int(request.GET.get("since") or 0), 0)
+    except ValueError:
+        return JsonResponse({"error": "since must be a manifest version."}, status=400)
+
+    data, version = gate_manifest.build(event, since=since)
+
+    response = HttpResponse(data, content_type="application/octet-stream")
+    response["Content-Disposition"] = f'attachment; filename="gate-manifest-{event.pk}-{version}.bin"'
+    response["X-Manifest-Version"] = str(version)
+    response["X-Gate-Key"] = gate_manifest.gate_key(event.pk).hex()
+    response["Cache-Control"] = "no-store"
+    return response
+
+
+@login_required(login_url='organizer_login')
+@require_POST
+def gate_manifest_check_ins(request, pk):
+    """
+    Check-ins recorded offline against a manifest:
+    {"gate": "North", "check_ins": [{"booking_ref": ..., "scanned_at": ...}, ...]}
+    → {"merged": 120, "already": 3, "duplicates": 1, "revoked": 0, "unknown": 0}
+    """
+    data, error = _scanner_request(request, pk)
+    if error:
+        return error
+
+    check_ins = data.get("check_ins")
+    if not isinstance(check_ins, list) or len(check_ins) > gate_manifest.MAX_UPLOAD:
+        return JsonResponse(
+            {"error": f"check_ins must be a list of at most {gate_manifest.MAX_UPLOAD} items."},
+            status=400,
+        )
+
+    event = Event.objects.get(pk=pk)
+    return JsonResponse(gate_manifest.merge_check_ins(event, check_ins, gate=data.get("gate") or ""))
+
+
 @login_required(login_url='organizer_login')
 def organizer_profile(request):
     try:
@@ -735,22 +1013,31 @@ def organizer_tickets(request):
     except Organizer.DoesNotExist:
         return redirect('organizer_login')
 
-    events = Event.objects.filter(
-        organizer=organizer
-    ).prefetch_related('tickets')  # ← use your related_name here
-
-    total_tiers = 0
-    total_stock = 0
+    # One query: every event LEFT JOIN its tiers and their sales rollup.
+    # An event without tiers comes back as one row with ticket_id = None
+    rows = list(
+        Event.objects
+        .filter(organizer=organizer)
+        .order_by("date", "id", "tickets__id")
+        .values(
+            "id",
+            "title",
+            ticket_id=F("tickets__id"),
+            ticket_name=F("tickets__name"),
+            price=F("tickets__price"),
+            available=F("tickets__quantity_available"),
+            sold=F("tickets__sales__sold"),
+            revenue=F("tickets__sales__revenue"),
+        )
+    )
 
-    for event in events:
-        tiers = event.tickets.all()  # ← use related_name
-        total_tiers += tiers.count()
-        total_stock += sum(t.quantity_available for t in tiers)
+    tiers = [row for row in rows if row["ticket_id"] is not None]
 
     context = {
-        "events": events,
-        "total_tiers": total_tiers,
-        "total_stock": total_stock,
+        "rows": rows,
+        "total_tiers": len(tiers),
+        "total_stock": sum(row["available"] for row in tiers),
+        "total_sold": sum(row["sold"] or 0 for row in tiers),
     }
 
     return render(request, "events/organizer_tickets.html", context)
@@ -761,9 +1048,11 @@ def upcoming_events(request):
 
     now = timezone.now()
 
-    events = Event.objects.filter(
-        date__gte=now
-    ).order_by('date')
+    events = paginate(
+        Event.objects.filter(date__gte=now),
+        ('date', 'id'),
+        cursor=request.GET.get('cursor'),
+    )
 
     return render(request, 'events/upcoming_events.html', {
         "events": events
@@ -787,6 +1076,11 @@ def my_tickets(request):
         .order_by("-created_at")
     )
 
+    # Signed text for each ticket's QR code (scanned at the gate)
+    orders = list(orders)
+    for order in orders:
+        order.qr_payload = checkin.qr_payload(order.event_id, order.reference)
+
     context = {
         "orders": orders,
         "today": timezone.now().date(),  # Used to check past/upcoming
@@ -799,9 +1093,11 @@ def past_events(request):
 
     now = timezone.now()
 
-    events = Event.objects.filter(
-        date__lt=now
-    ).order_by('-date')
+    events = paginate(
+        Event.objects.filter(date__lt=now),
+        ('-date', '-id'),
+        cursor=request.GET.get('cursor'),
+    )
 
     return render(request, 'events/past_events.html', {
         "events": events
@@ -813,9 +1109,10 @@ def saved_events(request):
 
     user = request.user
 
-    saved = SavedEvent.objects.filter(
+    # event__category: every card shows the category
+    saved = list(SavedEvent.objects.filter(
         user=user
-    ).select_related('event')
+    ).select_related('event__category'))
 
     return render(request, 'events/saved_events.html', {
         "saved_events": saved
@@ -869,14 +1166,10 @@ def newsletter_subscribe(request):
 
 
 def about(request):
-    categories = Category.objects.all()
-
-    return render( request, 'events/about.html', {'categories':categories})
+    return render(request, 'events/about.html')
 
 def contact(request):
-    categories = Category.objects.all()
-
-    return render( request, 'events/contact.html', {'categories':categories})
+    return render(request, 'events/contact.html')
 
 
 @login_required(login_url='organizer_login')  #  User must be logged in first
@@ -891,64 +1184,34 @@ def payouts(request):
     # Get the organizer object linked to the logged-in user
     organizer = request.user.organizer
 
-    #  STEP 2: Calculate TOTAL earnings from PAID orders only
-    # We filter orders:
-    # - That belong to events created by this organizer
-    # - That have status = "paid"
-    total_earnings = Order.objects.filter(
-        event__organizer=organizer,  # Orders for this organizer's events
-        status="paid"  # Only successful payments
-    ).aggregate(
-        total=Coalesce(
-            Sum("total_amount"),  # Add up total_amount
-            0,  # If no orders exist, return 0 instead of None
-            output_field=DecimalField()
-        )
-    )["total"]
-
-    #  STEP 3: Calculate how much has ALREADY been paid out
-    # Only include payouts that have status = "paid"
-    total_paid_out = Payout.objects.filter(
-        organizer=organizer,
-        status="paid"
-    ).aggregate(
-        total=Coalesce(
-            Sum("amount"),
-            0,
-            output_field=DecimalField()
-        )
-    )["total"]
-
-    #  STEP 4: Available balance = earnings - already paid payouts
-    available_balance = total_earnings - total_paid_out
+    #  STEP 2: Read the organizer's running balance
+    # The ledger keeps it up to date as orders are paid and payouts
+    # requested, so this is a single row lookup (no summing of orders)
+    balance = ledger.get_balance(organizer)
 
-    #  STEP 5: Handle payout request submission (POST request)
+    #  STEP 3: Handle payout request submission (POST request)
     if request.method == "POST":
 
-        # Prevent payout if balance is zero or negative
-        if available_balance <= 0:
+        # Request the full available balance. The check and the debit
+        # happen together, so a double-submitted form can't pay out twice
+        try:
+            ledger.request_payout(organizer)
+        except ledger.InsufficientBalance:
             messages.error(request, "You have no available balance.")
             return redirect("payouts")
 
-        # Create new payout request with full available balance
-        Payout.objects.create(
-            organizer=organizer,
-            amount=available_balance,
-            status="pending"  # Default is pending approval
-        )
-
         messages.success(request, "Payout request submitted successfully.")
         return redirect("payouts")
 
-    #  STEP 6: Fetch payout history for this organizer
+    #  STEP 4: Fetch payout history for this organizer
     payout_history = Payout.objects.filter(
         organizer=organizer
     ).order_by("-created_at")  # Show newest first
 
-    #  STEP 7: Send data to template
+    #  STEP 5: Send data to template
     context = {
-        "available_balance": available_balance,
-        "total_earnings": total_earnings,
+        "available_balance": balance.available,
+        "total_earnings": balance.earned,
         "payout_history": payout_history,
     }
 
@@ -956,8 +1219,6 @@ def payouts(request):
 
 
 def contact(request):
-    categories = Category.objects.all()
-
     if request.method == "POST":
         form = ContactForm(request.POST)
 
@@ -970,6 +1231,5 @@ def contact(request):
         form = ContactForm()
 
     return render(request, 'events/contact.html', {
-        'categories': categories,
         'form': form
     })
\ No newline at end of file
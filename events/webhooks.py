@@ -0,0 +1,159 @@
+"""
+Paystack webhook ingestion.
+
+The webhook view does the minimum inside the request: check the HMAC
+signature, store the delivery as a PaymentEvent, answer 200. Fulfilment
+(order → paid, tickets sold, attendees created) happens afterwards in
+process_pending_events(), run by ``python manage.py process_payment_events``.
+
+Paystack re-sends a webhook until it gets a 200, and may deliver the same
+event twice; deliveries are de-duplicated on event_key and fulfilment is
+idempotent, so processing an event twice is harmless.
+"""
+import datetime
+import hashlib
+import hmac
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import fulfilment
+from .models import Order, PaymentEvent
+
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETRY_DELAY = datetime.timedelta(seconds=30)    # doubled on every attempt
+STALE_LOCK = datetime.timedelta(minutes=5)      # worker died mid-event
+
+
+def signature_is_valid(body, signature, secret=None):
+    """
+    Paystack signs the raw body with HMAC-SHA512 using the secret key.
+    """
+    if not signature:
+        return False
+
+    secret = secret or settings.PAYSTACK_SECRET_KEY
+    expected = hmac.new(secret.encode(), body, hashlib.sha512).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def enqueue(payload):
+    """
+    Store a webhook delivery. Returns the PaymentEvent, or None if this
+    delivery was already stored.
+    """
+    event_type = payload.get("event", "")
+    data = payload.get("data") or {}
+    reference = str(data.get("reference") or "")
+
+    event_key = f"{event_type}:{data.get('id') or reference}"[:150]
+
+    try:
+        with transaction.atomic():
+            return PaymentEvent.objects.create(
+                event_key=event_key,
+                event_type=event_type[:50],
+                reference=reference[:100],
+                payload=payload,
+            )
+    except IntegrityError:
+        return None
+
+
+def process_pending_events(batch_size=100, now=None):
+    """
+    Process one batch of due events. Returns the number processed.
+    Several workers can run this at once: each event is claimed with a
+    conditional update before it is touched.
+    """
+    now = now or timezone.now()
+
+    due = PaymentEvent.objects.filter(
+        Q(status="pending", available_at__lte=now) |
+        Q(status="processing", locked_at__lt=now - STALE_LOCK)
+    ).order_by("available_at").values_list("pk", flat=True)[:batch_size]
+
+    processed = 0
+    for event_id in list(due):
+        claimed = PaymentEvent.objects.filter(
+            Q(pk=event_id),
+            Q(status="pending") | Q(status="processing", locked_at__lt=now - STALE_LOCK)
+        ).update(status="processing", locked_at=timezone.now(), attempts=F("attempts") + 1)
+
+        if claimed:
+            process_event(PaymentEvent.objects.get(pk=event_id))
+            processed += 1
+
+    return processed
+
+
+def process_event(event):
+    """
+    Apply one claimed event and record the outcome on it.
+    """
+    try:
+        note = _apply(event)
+    except Exception as exc:
+        logger.exception("Payment event %s failed", event.pk)
+
+        if event.attempts >= MAX_ATTEMPTS:
+            event.status = "failed"
+        else:
+            event.status = "pending"
+            event.available_at = timezone.now() + RETRY_DELAY * (2 ** (event.attempts - 1))
+
+        event.last_error = repr(exc)
+        event.locked_at = None
+        event.save(update_fields=["status", "available_at", "last_error", "locked_at"])
+        return
+
+    event.status = "done"
+    event.last_error = note or ""
+    event.locked_at = None
+    event.processed_at = timezone.now()
+    event.save(update_fields=["status", "last_error", "locked_at", "processed_at"])
+
+
+def process_reference(reference):
+    """
+    Process any stored, not yet handled event for one payment reference
+    right away (used by verify_payment when the user is redirected back).
+    Returns True if there was one.
+    """
+    found = False
+    for event in PaymentEvent.objects.filter(reference=reference, status="pending"):
+        claimed = PaymentEvent.objects.filter(pk=event.pk, status="pending").update(
+            status="processing", locked_at=timezone.now(), attempts=F("attempts") + 1
+        )
+        if claimed:
+            event.refresh_from_db()
+            process_event(event)
+            found = True
+    return found
+
+
+def _apply(event):
+    if event.event_type != "charge.success":
+        return f"ignored {event.event_type}"
+
+    order = (
+        Order.objects
+        .select_related("user")
+        .filter(reference=event.reference)
+        .first()
+    )
+    if order is None:
+        return "unknown reference"
+
+    amount = (event.payload.get("data") or {}).get("amount")
+    result = fulfilment.fulfil_order(order, amount=amount)
+
+    if result == fulfilment.AMOUNT_MISMATCH:
+        raise ValueError(f"Charged amount {amount} does not match order {order.reference}")
+    return result